@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import shutil
+import socket
+import tempfile
+import subprocess
+from pathlib import Path
+from contextlib import asynccontextmanager
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _find_binary(name: str, pg_bin: str | None) -> str:
+    if pg_bin:
+        return str(Path(pg_bin) / name)
+
+    found = shutil.which(name)
+    if found:
+        return found
+
+    # Debian/Ubuntu packages don't put server binaries on PATH
+    candidates = sorted(Path("/usr/lib/postgresql").glob(f"*/bin/{name}"), reverse=True)
+    if candidates:
+        return str(candidates[0])
+
+    raise SystemExit(f"{name} not found, install Postgres, pass --pg-bin or use --dsn.")
+
+
+@asynccontextmanager
+async def throwaway_postgres(pg_bin: str | None):
+    """Starts a temporary Postgres cluster, yields its dsn and removes it afterwards."""
+    initdb = _find_binary("initdb", pg_bin)
+    pg_ctl = _find_binary("pg_ctl", pg_bin)
+    directory = Path(tempfile.mkdtemp(prefix="tortoise-bench-"))
+    data_directory = directory / "data"
+    port = _free_port()
+
+    subprocess.run(
+        [initdb, "-D", str(data_directory), "-U", "postgres", "-A", "trust", "--no-sync"],
+        check=True,
+        stdout=subprocess.DEVNULL
+    )
+    # fsync off, numbers are for comparing strategies not for absolute durability cost
+    subprocess.run(
+        [
+            pg_ctl, "-D", str(data_directory), "-l", str(directory / "postgres.log"), "-w",
+            "-o", f"-p {port} -k {directory} -c listen_addresses='' -c fsync=off -c synchronous_commit=off",
+            "start"
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL
+    )
+
+    try:
+        yield f"postgresql://postgres@/postgres?host={directory}&port={port}"
+    finally:
+        subprocess.run([pg_ctl, "-D", str(data_directory), "-m", "immediate", "stop"], stdout=subprocess.DEVNULL)
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,152 @@
+"""
+Benchmarks ProgressionManager bulk upsert strategies used by the RoleProgression five minute flush.
+
+Every strategy gets the same cache (half the users already have an activity row, half are new) on the same
+seeded table. Measured per run:
+    - total time and throughput (rows/s)
+    - lock wait: longest time a concurrent single row UPDATE on a user in the cache (what mark_active does)
+      was blocked while the flush was running
+
+By default a throwaway Postgres cluster is created with initdb in a temporary directory and removed afterwards,
+initdb/pg_ctl have to be on PATH or in directory passed with --pg-bin. Pass --dsn (or set BENCHMARK_DATABASE_URL)
+to use an existing database instead, tables in it will be modified.
+
+Usage:
+    python -m benchmarks.progression_flush
+    python -m benchmarks.progression_flush --sizes 100 10000 --repeats 3 --strategies unnest copy
+"""
+from __future__ import annotations
+
+import os
+import time
+import random
+import asyncio
+import argparse
+import statistics
+
+import asyncpg
+
+from bot.manager import Database, ProgressionManager
+from bot.migrator import Migrator
+from benchmarks.postgres import throwaway_postgres
+
+
+GUILD_ID = 577192344529404154
+OTHER_GUILD_ID = 123456789012345678
+STRATEGIES = {
+    "loop": "add_messages_bulk",
+    "executemany": "add_messages_bulkops",
+    "unnest": "add_messages_bulk_unnest",
+    "copy": "add_messages_bulk_copy",
+}
+DEFAULT_SIZES = (100, 10_000, 100_000)
+
+
+async def seed(db: Database, existing_users: int, other_guild_users: int):
+    """Fills activity with rows for benchmark guild and some unrelated guild so the index isn't trivially small."""
+    await db.pool.execute("TRUNCATE activity")
+    records = [(GUILD_ID, user_id, random.randint(1, 5000)) for user_id in range(1, existing_users + 1)]
+    records += [(OTHER_GUILD_ID, user_id, random.randint(1, 5000)) for user_id in range(1, other_guild_users + 1)]
+    await db.pool.copy_records_to_table("activity", records=records, columns=("guild_id", "user_id", "messages"))
+    await db.pool.execute("VACUUM ANALYZE activity")
+
+
+def build_cache(size: int, existing_users: int) -> dict[int, int]:
+    """Half of the users already have a row, the other half are new, same as a busy day in the guild."""
+    existing = random.sample(range(1, existing_users + 1), min(size // 2, existing_users))
+    new = range(existing_users + 1, existing_users + 1 + size - len(existing))
+    return {user_id: random.randint(1, 50) for user_id in [*existing, *new]}
+
+
+async def probe_lock_wait(dsn: str, user_id: int, stop: asyncio.Event) -> float:
+    """Repeatedly updates one row that the flush also touches, returns the longest single update time."""
+    connection = await asyncpg.connect(dsn)
+    longest = 0.0
+    try:
+        while not stop.is_set():
+            start = time.perf_counter()
+            await connection.execute(
+                "UPDATE activity SET active = active WHERE guild_id=$1 AND user_id=$2",
+                GUILD_ID,
+                user_id
+            )
+            longest = max(longest, time.perf_counter() - start)
+            await asyncio.sleep(0.001)
+    finally:
+        await connection.close()
+    return longest
+
+
+async def run_once(dsn: str, db: Database, manager: ProgressionManager, strategy: str, cache: dict[int, int],
+                   existing_users: int) -> tuple[float, float]:
+    # Remove rows inserted by previous run so every run sees the same existing/new split
+    await db.pool.execute("DELETE FROM activity WHERE guild_id=$1 AND user_id > $2", GUILD_ID, existing_users)
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_lock_wait(dsn, next(iter(cache)), stop))
+    await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    await getattr(manager, STRATEGIES[strategy])(GUILD_ID, cache)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    return elapsed, await probe
+
+
+async def benchmark(dsn: str, args: argparse.Namespace):
+    # Large seeds and flushes are expected to take a while
+    db = Database(dsn, command_timeout=None)
+    await db.connect()
+    try:
+        await Migrator(db).migrate()
+        manager = ProgressionManager(db)
+        await seed(db, args.existing_users, args.other_guild_users)
+
+        print("| strategy | users | median s | min s | rows/s | max lock wait ms |")
+        print("|---|---|---|---|---|---|")
+        for size in args.sizes:
+            cache = build_cache(size, args.existing_users)
+            for strategy in args.strategies:
+                timings, lock_waits = [], []
+                for _ in range(args.repeats):
+                    elapsed, lock_wait = await run_once(dsn, db, manager, strategy, cache, args.existing_users)
+                    timings.append(elapsed)
+                    lock_waits.append(lock_wait)
+
+                median = statistics.median(timings)
+                print(
+                    f"| {strategy} | {size} | {median:.4f} | {min(timings):.4f} | {size / median:,.0f} "
+                    f"| {max(lock_waits) * 1000:.1f} |"
+                )
+    finally:
+        await db.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=os.getenv("BENCHMARK_DATABASE_URL"), help="use existing database")
+    parser.add_argument("--pg-bin", help="directory with initdb and pg_ctl")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="cache sizes (users)")
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=list(STRATEGIES))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--existing-users", type=int, default=200_000, help="seeded rows in benchmark guild")
+    parser.add_argument("--other-guild-users", type=int, default=200_000, help="seeded rows in another guild")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    random.seed(args.seed)
+
+    if args.dsn:
+        await benchmark(args.dsn, args)
+        return
+
+    async with throwaway_postgres(args.pg_bin) as dsn:
+        await benchmark(dsn, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
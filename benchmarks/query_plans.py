@@ -0,0 +1,207 @@
+"""
+Checks that no query registered by the managers plans a sequential scan.
+
+Tables are seeded with enough rows for the planner to prefer an index wherever a usable one exists, then every
+registered query is EXPLAINed with sample arguments derived from its parameter types. Exits with status 1 and
+lists the offending queries if any of them scans a whole table, so a new query or a dropped index is caught
+before it reaches production. Queries that read the whole table on purpose are listed in FULL_SCAN_ALLOWED.
+
+Database setup is the same as in benchmarks.progression_flush, a throwaway cluster by default or --dsn.
+
+Usage:
+    python -m benchmarks.query_plans
+    python -m benchmarks.query_plans --dsn postgresql://localhost/tortoise_test
+"""
+from __future__ import annotations
+
+import os
+import sys
+import asyncio
+import argparse
+from datetime import datetime, timezone
+
+from bot.manager import (
+    Database, ProgressionManager, AFKManager, PointsManager, RetentionManager, TeamManager, GiveawayManager,
+    DutyManager, StateManager, ArchiveManager
+)
+from bot.migrator import Migrator
+from benchmarks.postgres import throwaway_postgres
+
+
+# Startup cache loads, meant to read every row
+FULL_SCAN_ALLOWED = {
+    "afk.get_all",
+    "duty.get_all_schedules",
+    "points.get_all",
+}
+MANAGERS = (
+    ProgressionManager, AFKManager, PointsManager, RetentionManager, TeamManager, GiveawayManager, DutyManager,
+    StateManager, ArchiveManager
+)
+SEED_SQL = """
+TRUNCATE activity, activity_daily, nominations, nomination_counts, afk_status, points, daily_retention, teams,
+    team_invites, team_members, team_setup_invites, team_join_requests, giveaways, giveaway_entries, duty_schedules,
+    bot_state,
+    team_invites_archive, team_setup_invites_archive, team_join_requests_archive, giveaways_archive;
+
+INSERT INTO activity (guild_id, user_id, messages, active, active_plus)
+SELECT i % 20, i, (random() * 1000)::INT, random() < 0.95, random() < 0.99
+FROM generate_series(1, {rows}) AS i;
+
+INSERT INTO activity_daily (guild_id, day, user_id, messages)
+SELECT i % 20, CURRENT_DATE - (i % 365), i / 365, (random() * 50)::INT
+FROM generate_series(1, {rows}) AS i;
+
+INSERT INTO nominations (target_id, nominator_id, stage, nominator_role)
+SELECT i % ({rows} / 10), i, (ARRAY['fellow', 'veteran'])[1 + i % 2],
+    (ARRAY['apprentice', 'fellow', 'moderator'])[1 + i % 3]
+FROM generate_series(1, {rows}) AS i;
+
+INSERT INTO nomination_counts (target_id, stage, apprentices, fellows, moderators)
+SELECT target_id, stage,
+    COUNT(*) FILTER (WHERE nominator_role='apprentice'),
+    COUNT(*) FILTER (WHERE nominator_role='fellow'),
+    COUNT(*) FILTER (WHERE nominator_role='moderator')
+FROM nominations
+GROUP BY target_id, stage;
+
+INSERT INTO afk_status (guild_id, user_id, reason, until)
+SELECT i % 20, i, 'away', NOW() + INTERVAL '1 hour'
+FROM generate_series(1, {rows} / 10) AS i;
+
+INSERT INTO points (guild_id, user_id, points)
+SELECT i % 20, i, (random() * 1000)::INT
+FROM generate_series(1, {rows}) AS i;
+
+INSERT INTO daily_retention (guild_id, date, joins, leaves)
+SELECT i % 20, CURRENT_DATE - (i / 20), 5, 3
+FROM generate_series(1, {rows} / 10) AS i;
+
+INSERT INTO teams (guild_id, name, role_id, category_id, text_channel_id, voice_channel_id, leader_id)
+SELECT i % 20, 'team ' || i, i, i, i, i, i
+FROM generate_series(1, {rows} / 10) AS i;
+
+INSERT INTO team_invites (invite_id, team_id, inviter_id, invitee_id, guild_id, status, created_at)
+SELECT i, i % ({rows} / 10), i % 1000, i, i % 20, (ARRAY['accepted', 'declined', 'pending'])[1 + i % 3],
+    NOW() - (i % 365) * INTERVAL '1 day'
+FROM generate_series(1, {rows}) AS i;
+
+INSERT INTO team_members (team_id, guild_id, user_id)
+SELECT i % ({rows} / 10), i % 20, i
+FROM generate_series(1, {rows}) AS i;
+
+INSERT INTO team_setup_invites (invite_id, guild_id, user_id, status)
+SELECT i, i % 20, i, (ARRAY['accepted', 'pending'])[1 + i % 2]
+FROM generate_series(1, {rows}) AS i;
+
+INSERT INTO team_join_requests (guild_id, team_id, user_id, status)
+SELECT i % 20, i % ({rows} / 10), i, (ARRAY['accepted', 'declined', 'pending'])[1 + i % 3]
+FROM generate_series(1, {rows}) AS i;
+
+INSERT INTO giveaways (message_id, guild_id, channel_id, host_id, name, prizes, ends_at, ended)
+SELECT i, i % 20, i, i, 'giveaway ' || i, 'prize', NOW() + (i - {rows} / 10) * INTERVAL '1 hour', i % 100 <> 0
+FROM generate_series(1, {rows} / 10) AS i;
+
+INSERT INTO giveaways_archive
+SELECT giveaways.*, 10
+FROM giveaways
+WHERE ended;
+
+INSERT INTO giveaway_entries (message_id, user_id)
+SELECT i % ({rows} / 10), i
+FROM generate_series(1, {rows}) AS i;
+
+INSERT INTO duty_schedules (guild_id, user_id, start_time, end_time, timezone)
+SELECT i % 20, i, '09:00', '17:00', 'UTC'
+FROM generate_series(1, {rows} / 10) AS i;
+
+INSERT INTO bot_state (key, value)
+SELECT 'key ' || i, 'value'
+FROM generate_series(1, {rows} / 10) AS i;
+"""
+
+
+def sample_argument(type_name: str):
+    """Value of the given postgres type, planner only needs something of the right type."""
+    if type_name.startswith("_"):
+        return [sample_argument(type_name[1:])]
+    if type_name in ("int2", "int4", "int8"):
+        return 1
+    if type_name == "bool":
+        return True
+    if type_name == "timestamptz":
+        return datetime.now(timezone.utc)
+    if type_name == "date":
+        return datetime.now(timezone.utc).date()
+    if type_name == "jsonb":
+        return "[]"
+    return "pending"
+
+
+def find_sequential_scans(plan: dict) -> list[str]:
+    """Names of relations read with a sequential scan anywhere in plan tree."""
+    scans = []
+    if plan.get("Node Type") == "Seq Scan":
+        scans.append(plan["Relation Name"])
+    for child in plan.get("Plans", ()):
+        scans.extend(find_sequential_scans(child))
+    return scans
+
+
+async def check(dsn: str, rows: int) -> list[tuple[str, list[str]]]:
+    # Large seeds and flushes are expected to take a while
+    db = Database(dsn, command_timeout=None)
+    for manager in MANAGERS:
+        manager(db)
+
+    await db.connect()
+    try:
+        await Migrator(db).migrate()
+        await db.pool.execute(SEED_SQL.format(rows=rows))
+        await db.pool.execute("VACUUM ANALYZE")
+
+        failures = []
+        async with db.pool.acquire() as connection:
+            for name, sql in sorted(db.queries.items()):
+                if name in FULL_SCAN_ALLOWED:
+                    continue
+
+                statement = await connection.prepare(sql)
+                arguments = [sample_argument(parameter.name) for parameter in statement.get_parameters()]
+                # Plain EXPLAIN, statements are planned but never executed so writes are safe to check
+                plan = await statement.explain(*arguments)
+                scans = find_sequential_scans(plan[0]["Plan"])
+                print(f"{'SEQ SCAN' if scans else 'ok':>8}  {name}")
+                if scans:
+                    failures.append((name, scans))
+
+        return failures
+    finally:
+        await db.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=os.getenv("BENCHMARK_DATABASE_URL"), help="use existing database")
+    parser.add_argument("--pg-bin", help="directory with initdb and pg_ctl")
+    parser.add_argument("--rows", type=int, default=100_000, help="rows seeded in the largest tables")
+    return parser.parse_args()
+
+
+async def main() -> int:
+    args = parse_args()
+
+    if args.dsn:
+        failures = await check(args.dsn, args.rows)
+    else:
+        async with throwaway_postgres(args.pg_bin) as dsn:
+            failures = await check(dsn, args.rows)
+
+    for name, scans in failures:
+        print(f"{name} scans {', '.join(scans)} sequentially", file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
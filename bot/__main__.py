@@ -4,7 +4,6 @@ from sys import stdout
 
 from dotenv import load_dotenv
 
-from bot.bot import Bot
 from bot.non_blocking_file_handler import NonBlockingFileHandler
 
 
@@ -25,6 +24,8 @@ console_logger.addHandler(console)
 def main():
     console_logger.info("Loading and starting the bot..")
     load_dotenv()
+    # Imported after .env is loaded, bot modules read settings like DATABASE_URL and BOT_BUILD_VERSION on import
+    from bot.bot import Bot
     Bot().run(os.getenv("BOT_TOKEN"))
 
 if __name__ == "__main__":
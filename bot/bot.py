@@ -1,30 +1,45 @@
+import json
+import hashlib
 import itertools
 import asyncio
 import logging
+import contextlib
 import os
-import subprocess
+import time
 import sys
 import traceback
 from pathlib import Path
-from typing import Generator
 
+import aiohttp
 import aiohttp.client_exceptions
 import discord
 from discord.abc import Messageable
 from discord.ext import commands, tasks
 
 from bot.api_client import TortoiseAPI
-from bot.constants import error_log_channel_id, system_log_channel_id, github_repo_link
+from bot.constants import error_log_channel_id, system_log_channel_id, github_repo_link, tortoise_guild_id
 from bot.manager import (
-    Database, ProgressionManager, AFKManager, PointsManager, RetentionManager, TeamManager, GiveawayManager, DutyManager
+    Database, ProgressionManager, AFKManager, PointsManager, RetentionManager, TeamManager, GiveawayManager,
+    DutyManager, StateManager, ArchiveManager
 )
+from bot.migrator import Migrator
+from bot.memory_database import MemoryDatabase
+from bot.utils.build_info import build_info
 from bot.utils.embed_handler import simple_embed
 from bot.utils.error_handler import TortoiseCommandTree
+from bot.utils.error_aggregator import ErrorAggregator
+from bot.utils.log_sink import LogSink
+from bot.utils.expiring_set import ExpiringSet
+from bot.utils.shutdown import ShutdownCoordinator
+from bot.utils.message_router import MessageRouter
+from bot.utils.metrics import MetricsRegistry
 
 logger = logging.getLogger(__name__)
 console_logger = logging.getLogger("console")
 
 DB_URL = os.getenv("DATABASE_URL")
+# DATABASE_URL=memory:// runs the bot without Postgres, nothing is persisted
+MEMORY_DB_URL = "memory://"
 
 
 class Bot(commands.Bot):
@@ -40,7 +55,13 @@ class Bot(commands.Bot):
         "utility",
         "health"
     )
-    build_version = "mystery-build"
+    # Extensions that need other extensions to be loaded first, they are loaded in a later batch.
+    extension_dependencies = {
+        "button_utility": ("tortoise_dm",),
+        "tortoise_server": ("tortoise_dm",),
+    }
+    # Guilds that have guild-scoped app commands (eg. SandboxExec.runtime_group), synced separately from global ones.
+    command_sync_guild_ids = (tortoise_guild_id,)
     advanced_protection: bool = True
 
     def __init__(self, prefix="t.", *args, **kwargs):
@@ -48,11 +69,28 @@ class Bot(commands.Bot):
         intents.members = True
         intents.message_content = True
 
+        # Needs to exist before the command tree is created by the parent constructor
+        self.metrics = MetricsRegistry()
+        self.discord_http_requests = self.metrics.counter(
+            "tortoise_discord_http_requests_total",
+            "Outbound Discord HTTP requests by method and response status.",
+            ("method", "status")
+        )
+        self.discord_http_rate_limited = self.metrics.counter(
+            "tortoise_discord_http_rate_limited_total",
+            "Outbound Discord HTTP requests that were answered with 429.",
+            ("method",)
+        )
+        http_trace = aiohttp.TraceConfig()
+        http_trace.on_request_end.append(self._on_http_request_end)
+        http_trace.on_request_exception.append(self._on_http_request_exception)
+
         super(Bot, self).__init__(
             *args,
             command_prefix=prefix,
             intents=intents,
             tree_cls=TortoiseCommandTree,
+            http_trace=http_trace,
             **kwargs
         )
         self.api_client: TortoiseAPI = None
@@ -63,7 +101,26 @@ class Bot(commands.Bot):
             "suggestions": False,
             "staff_application": False,
         }
-        self.suppressed_deletes = set()
+        # Ids of messages deleted by the bot itself whose delete event should not be logged again.
+        # Bans with delete_message_days never send delete events for every message so entries have to expire.
+        self.suppressed_deletes = ExpiringSet(ttl=600, max_size=10_000)
+        self.metrics.counter(
+            "tortoise_suppressed_deletes_lookups_total",
+            "Delete events checked against suppressed deletes, hit means the event was suppressed.",
+            ("result",),
+            lambda: {("hit",): self.suppressed_deletes.hits, ("miss",): self.suppressed_deletes.misses}
+        )
+        self.metrics.counter(
+            "tortoise_suppressed_deletes_evictions_total",
+            "Suppressed deletes removed without a matching delete event.",
+            ("reason",),
+            lambda: {("expired",): self.suppressed_deletes.expired, ("capacity",): self.suppressed_deletes.evicted}
+        )
+        self.message_router = MessageRouter(self)
+        self.error_aggregator = ErrorAggregator(self, error_log_channel_id)
+        # Queue log embeds here instead of sending them to log channels one by one
+        self.log_sink = LogSink(self)
+        self.shutdown = ShutdownCoordinator(self)
         self._status_cycle = itertools.cycle([
                 "DM to Contact Staff ⛉",
                 "DM reports!",
@@ -78,7 +135,17 @@ class Bot(commands.Bot):
         self.team_manager = None
         self.giveaway_manager = None
         self.duty_manager = None
+        self.state_manager = None
+        self.archive_manager = None
         self._sys_log_channel = None
+        self._restart_message_sent = False
+        self.startup_timings: dict[str, float] = {}
+        self.metrics.gauge(
+            "tortoise_startup_phase_seconds",
+            "Duration of each startup phase of the last boot.",
+            ("phase",),
+            lambda: {(phase,): seconds for phase, seconds in self.startup_timings.items()}
+        )
 
     @property
     def sys_log_channel(self) -> discord.TextChannel:
@@ -105,26 +172,80 @@ class Bot(commands.Bot):
         if not self.rotate_status.is_running():
             self.rotate_status.start()
 
-    async def send_restart_message(self: commands.Bot):
+    async def _on_http_request_end(self, _session, _context, params: aiohttp.TraceRequestEndParams):
+        status = params.response.status
+        self.discord_http_requests.inc(method=params.method, status=status)
+        if status == 429:
+            self.discord_http_rate_limited.inc(method=params.method)
+
+    async def _on_http_request_exception(self, _session, _context, params: aiohttp.TraceRequestExceptionParams):
+        self.discord_http_requests.inc(method=params.method, status="error")
+
+    async def _run_event(self, coro, event_name: str, *args, **kwargs):
+        # Same as discord.py implementation, plus latency and error metrics for every listener. Routed message
+        # handlers are measured by the router.
+        owner = getattr(coro, "__self__", None)
+        cog_name = owner.qualified_name if isinstance(owner, commands.Cog) else "Bot"
+        listener_name = getattr(coro, "__name__", event_name)
+        start = time.perf_counter()
         try:
-            commit_hash = subprocess.check_output(
-                ["git", "rev-parse", "--short", "HEAD"],
-                stderr=subprocess.DEVNULL,
-            ).decode().strip()
-            commit_message = subprocess.check_output(
-                ["git", "log", "-1", "--pretty=%s"],
-                stderr=subprocess.DEVNULL,
-            ).decode().strip()
+            await coro(*args, **kwargs)
+        except asyncio.CancelledError:
+            pass
         except Exception:
-            commit_hash = os.getenv("BOT_BUILD_VERSION", "mystery-build")
-            commit_message = ""
+            self.message_router.errors.inc(cog=cog_name, listener=listener_name)
+            try:
+                await self.on_error(event_name, *args, **kwargs)
+            except asyncio.CancelledError:
+                pass
+        finally:
+            self.message_router.latency.observe(time.perf_counter() - start, cog=cog_name, listener=listener_name)
+
+    async def on_app_command_completion(self, interaction: discord.Interaction, _command):
+        self.tree.record_command(interaction)
+
+    async def on_message(self, message: discord.Message):
+        if self.shutdown.stopping:
+            return
+
+        self.message_router.dispatch(message)
+        await self.process_commands(message)
 
-        self.build_version = commit_hash
+    async def close(self):
+        # Flush in-memory state while gateway and database are still usable, cogs are unloaded by super().close()
+        await self.shutdown.drain()
+        await super().close()
 
+        if self.api_client is not None:
+            await self.api_client.close()
+        if self.db is not None:
+            await self.db.close()
+
+    async def add_cog(self, cog: commands.Cog, /, **kwargs):
+        await super().add_cog(cog, **kwargs)
+        self.message_router.add_cog(cog)
+
+    async def remove_cog(self, name: str, /, **kwargs):
+        cog = await super().remove_cog(name, **kwargs)
+        if cog is not None:
+            self.message_router.remove_cog(cog)
+        return cog
+
+    @property
+    def build_version(self) -> str:
+        return build_info.commit_hash
+
+    async def send_restart_message(self: commands.Bot):
+        # on_ready fires again after every reconnect, only announce the actual restart
+        if self._restart_message_sent:
+            return
+        self._restart_message_sent = True
+
+        commit_hash = build_info.commit_hash
         try:
             embed = simple_embed(message=f"Build version: [{commit_hash}]({github_repo_link}/commit/{commit_hash})",
                                  title="")
-            embed.set_footer(text=commit_message)
+            embed.set_footer(text=build_info.commit_message)
             await self.sys_log_channel.send(
                 embed=embed,
             )
@@ -143,12 +264,24 @@ class Bot(commands.Bot):
         except (discord.Forbidden, discord.HTTPException):
             return False
 
+    @contextlib.contextmanager
+    def _startup_phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.startup_timings[name] = time.perf_counter() - start
+
     async def setup_hook(self):
+        boot_start = time.perf_counter()
+        self.shutdown.install_signal_handlers()
         self.api_client: TortoiseAPI = TortoiseAPI()
 
-        self.db = Database(DB_URL)
-        await self.db.connect()
-
+        # Managers register their queries with the database so they have to exist before the pool connects
+        if DB_URL == MEMORY_DB_URL:
+            self.db = MemoryDatabase(self.metrics)
+        else:
+            self.db = Database.from_env(DB_URL, self.metrics)
         self.progression_manager = ProgressionManager(self.db)
         self.afk_manager = AFKManager(self.db)
         self.points_manager = PointsManager(self.db)
@@ -156,19 +289,70 @@ class Bot(commands.Bot):
         self.team_manager = TeamManager(self.db)
         self.giveaway_manager = GiveawayManager(self.db)
         self.duty_manager = DutyManager(self.db)
+        self.state_manager = StateManager(self.db)
+        self.archive_manager = ArchiveManager(self.db)
+
+        with self._startup_phase("database"):
+            await self.db.connect()
+
+        with self._startup_phase("migrations"):
+            # Memory database has no schema to migrate
+            applied = await Migrator(self.db).migrate() if isinstance(self.db, Database) else []
+            for migration in applied:
+                console_logger.info(f"Applied database migration {migration}")
+            if applied:
+                # Statements prepared by pool connections before migrating may be missing or stale
+                await self.db.refresh_prepared_statements()
+
+        # Cache warm-ups only read their own tables so they can run side by side.
+        with self._startup_phase("managers"):
+            await asyncio.gather(
+                self.afk_manager.setup(),
+                self.points_manager.setup(),
+            )
 
-        await self.progression_manager.setup()
-        await self.afk_manager.setup()
-        await self.points_manager.setup()
-        await self.retention_manager.setup()
-        await self.team_manager.setup()
-        await self.giveaway_manager.setup()
-        await self.duty_manager.setup()
+        with self._startup_phase("extensions"):
+            await self.load_extensions()
 
-        await self.load_extensions()
         # await self.reload_tortoise_meta_cache()
-        await self.tree.sync()
-        print("✅ Synced application commands")
+        with self._startup_phase("command_sync"):
+            await self.sync_application_commands()
+
+        self.startup_timings["total"] = time.perf_counter() - boot_start
+        console_logger.info(
+            "Startup timings: "
+            + ", ".join(f"{phase}={seconds:.2f}s" for phase, seconds in self.startup_timings.items())
+        )
+
+    def _get_command_tree_hash(self, guild: discord.abc.Snowflake | None) -> str:
+        commands_payload = sorted(
+            (command.to_dict(self.tree) for command in self.tree.get_commands(guild=guild)),
+            key=lambda payload: (payload.get("type", 1), payload["name"])
+        )
+        serialized = json.dumps(commands_payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    async def sync_application_commands(self, *, force: bool = False):
+        """
+        Syncs global and guild-scoped app commands, skipping every scope whose command payload hash
+        matches the one stored after the last successful sync.
+        Syncing can be forced with FORCE_COMMAND_SYNC environment variable.
+        """
+        force = force or os.getenv("FORCE_COMMAND_SYNC", "").lower() in ("1", "true", "yes")
+        scopes = [None, *(discord.Object(id=guild_id) for guild_id in self.command_sync_guild_ids)]
+
+        for guild in scopes:
+            scope_name = "global" if guild is None else str(guild.id)
+            state_key = f"command_tree_hash:{scope_name}"
+            tree_hash = self._get_command_tree_hash(guild)
+
+            if not force and await self.state_manager.get(state_key) == tree_hash:
+                console_logger.info(f"Application commands ({scope_name}) unchanged, skipping sync")
+                continue
+
+            await self.tree.sync(guild=guild)
+            await self.state_manager.set(state_key, tree_hash)
+            console_logger.info(f"✅ Synced application commands ({scope_name})")
 
     async def reload_tortoise_meta_cache(self):
         try:
@@ -183,7 +367,12 @@ class Bot(commands.Bot):
             logging.error(f"Unexpected error loading server meta: {e}")
             self.tortoise_meta_cache = {}  # Set empty cache as fallback
 
-    async def load_extensions(self):
+    def _get_extension_batches(self) -> list[list[str]]:
+        """
+        Groups extensions to load into batches, every extension comes after the ones it depends on.
+        Extensions within a batch don't depend on each other so they can be loaded concurrently.
+        """
+        pending = set()
         for extension_path in Path("bot/cogs").glob("*.py"):
             extension_name = extension_path.stem
 
@@ -195,16 +384,45 @@ class Bot(commands.Bot):
             ):
                 continue
 
-            dotted_path = f"bot.cogs.{extension_name}"
+            pending.add(extension_name)
 
-            try:
-                await self.load_extension(dotted_path)
-                console_logger.info(f"loaded {dotted_path}")
-            except Exception as e:
-                traceback_msg = traceback.format_exception(type(e), e, e.__traceback__)
-                console_logger.info(
-                    f"Failed to load cog {dotted_path} - traceback:{traceback_msg}"
+        batches = []
+        scheduled = set()
+        while pending:
+            batch = sorted(
+                name for name in pending
+                if all(
+                    dependency in scheduled or dependency not in pending
+                    for dependency in self.extension_dependencies.get(name, ())
                 )
+            )
+            if not batch:
+                # Circular dependencies, nothing sensible to do but load the rest together
+                logger.warning(f"Circular extension dependencies between {sorted(pending)}")
+                batch = sorted(pending)
+
+            batches.append(batch)
+            scheduled.update(batch)
+            pending.difference_update(batch)
+
+        return batches
+
+    async def _load_extension_timed(self, extension_name: str):
+        dotted_path = f"bot.cogs.{extension_name}"
+        start = time.perf_counter()
+
+        try:
+            await self.load_extension(dotted_path)
+            console_logger.info(f"loaded {dotted_path} in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            traceback_msg = traceback.format_exception(type(e), e, e.__traceback__)
+            console_logger.info(
+                f"Failed to load cog {dotted_path} - traceback:{traceback_msg}"
+            )
+
+    async def load_extensions(self):
+        for batch in self._get_extension_batches():
+            await asyncio.gather(*(self._load_extension_timed(extension_name) for extension_name in batch))
 
     @staticmethod
     async def on_connect():
@@ -221,29 +439,11 @@ class Bot(commands.Bot):
 
         msg = f"{event} event error exception!\n{traceback.format_exc()}"
         logger.critical(msg)
-        await self.log_error(msg)
+        self.error_aggregator.report_exception(f"{event} event error exception!", exception_value)
 
     async def log_error(self, message: str):
-        if not self.is_ready() or self.is_closed():
-            return
-
-        error_log_channel = self.get_channel(error_log_channel_id)
-        split_messages = list(Bot.split_string_into_chunks(message, 1900))
-
-        for count, message in enumerate(split_messages):
-            if count < 5:
-                await error_log_channel.send(
-                    f"```Num {count+1}/{len(split_messages)}:\n{message}```"
-                )
-            else:
-                await error_log_channel.send(
-                    "```Stopping spam, too many pages. See log for more info.```"
-                )
-                break
-
-    @staticmethod
-    def split_string_into_chunks(
-        string: str, chunk_size: int
-    ) -> Generator[str, None, None]:
-        for i in range(0, len(string), chunk_size):
-            yield string[i : i + chunk_size]
+        """
+        Reports error to error log channel, repeats are coalesced and rate limited by error aggregator.
+        Prefer self.error_aggregator.report_exception when exception object is available.
+        """
+        self.error_aggregator.report(message)
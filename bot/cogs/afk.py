@@ -8,6 +8,9 @@ from discord.ext import commands, tasks
 from discord import app_commands
 
 from bot.utils.embed_handler import success, info, warning
+from bot.utils.message_router import MessageContext, message_route
+from bot.utils.log_sink import LogPriority
+from bot.constants import system_log_channel_id
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -67,14 +70,18 @@ class AFK(commands.Cog):
             ""
         )
 
-        await self.bot.sys_log_channel.send(embed=log_embed)
+        self.bot.log_sink.send(system_log_channel_id, embed=log_embed, priority=LogPriority.LOW)
 
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if not message.guild or message.author.bot:
-            return
+    def _is_afk_relevant(self, context: MessageContext) -> bool:
+        message = context.message
+        if message.mentions or message.reference:
+            return True
+        return self.manager.get_afk(context.guild_id, context.author.id) is not None
 
+    @message_route(guild_only=True, predicate=_is_afk_relevant)
+    async def on_guild_message(self, context: MessageContext):
+        message = context.message
         guild_id = message.guild.id
         user_id = message.author.id
 
@@ -90,9 +97,7 @@ class AFK(commands.Cog):
                 ""
             )
 
-            await self.bot.sys_log_channel.send(
-                embed=log_embed
-            )
+            self.bot.log_sink.send(system_log_channel_id, embed=log_embed, priority=LogPriority.LOW)
 
         mentioned_users = set(message.mentions)
 
@@ -11,6 +11,7 @@ from bot.constants import (
     everyone_mention, infraction_img_url, bot_trap_role_id
 )
 from bot.utils.embed_handler import simple_embed
+from bot.utils.message_router import MessageContext, message_route
 
 
 class AntiRaidSpam(commands.Cog):
@@ -47,20 +48,18 @@ class AntiRaidSpam(commands.Cog):
         if has_role and not had_role:
             await self.handle_bot_trap_raid(after)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if message.author.bot or message.guild is None or message.guild.id != tortoise_guild_id:
-            return
-
+    @message_route(
+        guild_id=tortoise_guild_id,
+        predicate=lambda cog, context: not context.permissions.manage_messages
+    )
+    async def on_guild_message(self, context: MessageContext):
+        message = context.message
         member = message.author
         guild = message.guild
         now = time.time()
 
-        if member.guild_permissions.manage_messages:
-            return
-
         # MENTIONED EVERYONE/HERE: IMMEDIATE BAN
-        if everyone_mention in message.clean_content or here_mention in message.clean_content:
+        if everyone_mention in context.clean_content or here_mention in context.clean_content:
             await self.handle_raid(
                 member,
                 [(now, message.channel.id, "[Mentioned @everyone]", message.id)],
@@ -78,14 +77,14 @@ class AntiRaidSpam(commands.Cog):
             return
 
 
-        has_new_role = any(r.id == new_member_role_id for r in member.roles)
+        has_new_role = new_member_role_id in context.role_ids
         multi_attachments = len(message.attachments) > 1
 
         if not has_new_role and not multi_attachments:
             return
 
         logs = self.message_log[guild.id][member.id]
-        content = self._extract_message_content(message)
+        content = context.extracted_content
 
         if multi_attachments:
             content = "[Multi-Attachment Message]"
@@ -109,31 +108,6 @@ class AntiRaidSpam(commands.Cog):
             self.message_log[guild.id].pop(member.id, None)
 
 
-    def _extract_message_content(self, message: discord.Message) -> str:
-        parts: list[str] = []
-
-        if message.clean_content:
-            parts.append(message.clean_content.strip())
-
-        for attachment in message.attachments:
-            parts.append(f"[Attachment] {attachment.url}")
-
-        for embed in message.embeds:
-            if embed.url:
-                parts.append(f"[Embed URL] {embed.url}")
-            elif embed.title or embed.description:
-                preview = (embed.title or embed.description or "").strip()
-                if preview:
-                    parts.append(f"[Embed] {preview[:200]}")
-
-        if message.stickers:
-            parts.append("[Sticker]")
-
-        if not parts:
-            return "[Empty message payload]"
-
-        return " | ".join(parts)[:500]
-
     async def handle_bot_trap_raid(self, member: discord.Member):
         guild = member.guild
 
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import logging
+from datetime import time as dtime, timezone
+from typing import TYPE_CHECKING
+
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+
+from bot.constants import system_log_channel_id
+from bot.utils.checks import tortoise_bot_developer_only
+from bot.utils.embed_handler import info
+
+if TYPE_CHECKING:
+    from bot.bot import Bot
+
+
+logger = logging.getLogger(__name__)
+
+
+class Archive(commands.Cog):
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        self.manager = bot.archive_manager
+        self.archive_history.start()
+
+    def cog_unload(self):
+        self.archive_history.cancel()
+
+    # Quietest time of day for the guild
+    @tasks.loop(time=dtime(hour=4, minute=0, tzinfo=timezone.utc))
+    async def archive_history(self):
+        await self._archive()
+
+    @archive_history.before_loop
+    async def before_archive_history(self):
+        await self.bot.wait_until_ready()
+
+    async def _archive(self) -> dict[str, int]:
+        moved = await self.manager.run()
+        summary = "\n".join(f"**{table}:** `{count}`" for table, count in moved.items() if count)
+        logger.info(f"Archived history rows {moved}")
+
+        if summary:
+            self.bot.log_sink.send(
+                system_log_channel_id,
+                embed=info(summary, self.bot.user, "Archived history rows")
+            )
+        return moved
+
+    @app_commands.command(description="Archive resolved history rows past retention now.")
+    @app_commands.check(tortoise_bot_developer_only)
+    async def archive_history_now(self, interaction: discord.Interaction):
+        await interaction.response.defer(thinking=True, ephemeral=True)
+        moved = await self._archive()
+        summary = "\n".join(f"**{table}:** `{count}`" for table, count in moved.items())
+        await interaction.followup.send(embed=info(summary, self.bot.user, "Archived history rows"), ephemeral=True)
+
+
+async def setup(bot: Bot):
+    await bot.add_cog(Archive(bot))
@@ -6,7 +6,7 @@ from discord import app_commands
 from discord.ext import commands
 from discord.ext.commands import ExtensionAlreadyLoaded, ExtensionNotLoaded
 
-from bot.utils.embed_handler import success, failure
+from bot.utils.embed_handler import success, failure, info
 from bot.utils.checks import tortoise_bot_developer_only
 
 
@@ -128,6 +128,56 @@ class BotOwnerCommands(commands.Cog):
                 ephemeral=True
             )
 
+    @app_commands.command(name="errors")
+    @app_commands.check(tortoise_bot_developer_only)
+    async def errors(self, interaction: discord.Interaction):
+        """Shows most recently seen errors with their frequency."""
+        records = self.bot.error_aggregator.get_stats()
+        if not records:
+            await interaction.response.send_message(embed=success("No errors seen since startup."), ephemeral=True)
+            return
+
+        lines = [
+            f"`{record.fingerprint}` **{record.count}x** ({record.frequency():.1f}/h), "
+            f"last <t:{int(record.last_seen)}:R>\n{discord.utils.escape_markdown(record.title[:100])}"
+            for record in records
+        ]
+        await interaction.response.send_message(
+            embed=info("\n".join(lines), interaction.client.user, "Recent errors"),
+            ephemeral=True
+        )
+
+    @app_commands.command(name="queries")
+    @app_commands.check(tortoise_bot_developer_only)
+    async def queries(self, interaction: discord.Interaction):
+        """Shows database queries that took the most time since startup and recent slow ones."""
+        tracer = self.bot.db.tracer
+        top = tracer.get_top()
+        if not top:
+            await interaction.response.send_message(embed=success("No queries run since startup."), ephemeral=True)
+            return
+
+        lines = [
+            f"`{stats.query}` from `{stats.caller}`\n"
+            f"**{stats.total_seconds:.2f}s** total, {stats.calls}x, mean {stats.mean_seconds() * 1000:.1f}ms, "
+            f"max {stats.max_seconds * 1000:.0f}ms, {stats.rows} rows"
+            for stats in top
+        ]
+        embed = info("\n".join(lines), interaction.client.user, "Most expensive queries")
+
+        slow = tracer.get_slow()
+        if slow:
+            embed.add_field(
+                name=f"Recent slow queries (over {tracer.slow_threshold * 1000:.0f}ms)",
+                value="\n".join(
+                    f"<t:{int(query.at)}:R> `{query.query}` {query.seconds * 1000:.0f}ms, {query.rows} rows"
+                    for query in slow
+                )[:1024],
+                inline=False
+            )
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
 
 async def setup(bot):
     await bot.add_cog(BotOwnerCommands(bot))
\ No newline at end of file
@@ -73,7 +73,7 @@ class CommandErrorHandler(commands.Cog):
             traceback_message = traceback.format_exception(error_type, error, error.__traceback__)
             log_message = f"{feedback_message} {traceback_message}"
             logger.critical(log_message)
-            await self.bot.log_error(log_message)
+            self.bot.error_aggregator.report_exception(feedback_message, error)
 
     @classmethod
     def _get_missing_permission(cls, error) -> str:
@@ -10,6 +10,8 @@ from discord.ext import commands
 from discord import app_commands
 
 from bot.utils.embed_handler import info, warning, success
+from bot.utils.log_sink import LogPriority
+from bot.constants import system_log_channel_id
 from bot.utils.checks import check_if_tortoise_staff
 
 
@@ -126,12 +128,11 @@ class Questionnaire(discord.ui.View):
         if self.current_index >= len(self.questions):
             success_joined = await self.cog.manager.enter(self.row['message_id'], self.user_id)
             if success_joined:
-                try:
-                    await self.cog.bot.sys_log_channel.send(embed=info(
-                       f"{interaction.user.mention} joined the giveaway.", self.cog.bot.user, ""
-                    ))
-                except Exception as e:
-                    pass
+                self.cog.bot.log_sink.send(
+                    system_log_channel_id,
+                    embed=info(f"{interaction.user.mention} joined the giveaway.", self.cog.bot.user, ""),
+                    priority=LogPriority.LOW
+                )
             msg = 'Entry successful! Good luck.' if success_joined else 'You have already entered this giveaway.'
             return await interaction.response.edit_message(embed=success(msg), view=None)
         else:
@@ -163,12 +164,11 @@ class JoinView(discord.ui.View):
         if not questions:
             joined = await self.cog.manager.enter(row["message_id"], interaction.user.id)
             if joined:
-                try:
-                    await self.cog.bot.sys_log_channel.send(embed=info(
-                       f"{interaction.user.mention} joined the giveaway.", self.cog.bot.user, ""
-                    ))
-                except Exception as e:
-                    pass
+                self.cog.bot.log_sink.send(
+                    system_log_channel_id,
+                    embed=info(f"{interaction.user.mention} joined the giveaway.", self.cog.bot.user, ""),
+                    priority=LogPriority.LOW
+                )
             embed = success("You joined the giveaway!") if joined else warning("You already joined this giveaway.")
             return await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -204,6 +204,12 @@ class Giveaway(commands.Cog):
         self.tasks: Dict[int, asyncio.Task] = {}
         self.bot.add_view(JoinView(self))
 
+    async def cog_shutdown(self):
+        """Giveaways are stored with their end time and rescheduled by cog_load, so tasks can just be cancelled."""
+        for task in self.tasks.values():
+            task.cancel()
+        self.tasks.clear()
+
     async def cog_load(self):
         """Restart background tasks for pending giveaways on reboot."""
         pending = await self.manager.get_pending()
@@ -12,6 +12,7 @@ from discord.ext import commands
 from aiohttp import web
 from discord import app_commands
 from bot.constants import rate_limit_minutes
+from bot.utils.build_info import build_info
 
 
 class HealthCheck(commands.Cog):
@@ -34,12 +35,15 @@ class HealthCheck(commands.Cog):
         self.rate_limit_window = timedelta(minutes=rate_limit_minutes)
         self.max_requests = 2
         self.client_requests: Dict[str, List[datetime]] = {}
+        self.metrics_token = os.getenv("METRICS_TOKEN")
+        self._register_collectors()
 
         self.app = web.Application()
         self.app.add_routes(
             [
                 web.get("/health", self.health),
                 web.head("/ready", self.ready),
+                web.get("/metrics", self.metrics),
             ]
         )
 
@@ -69,6 +73,49 @@ class HealthCheck(commands.Cog):
         self.client_requests[client_ip] = timestamps
         return False
 
+    def _register_collectors(self):
+        metrics = self.bot.metrics
+
+        def pool_stats():
+            stats = self.bot.db.get_pool_stats() if self.bot.db else {}
+            return {(state,): value for state, value in stats.items()}
+
+        def structure_sizes():
+            sizes = {("bot.suppressed_deletes",): len(self.bot.suppressed_deletes)}
+
+            anti_raid = self.bot.get_cog("AntiRaidSpam")
+            if anti_raid is not None:
+                sizes[("AntiRaidSpam.message_log",)] = sum(len(members) for members in anti_raid.message_log.values())
+
+            sandbox = self.bot.get_cog("SandboxExec")
+            if sandbox is not None:
+                sizes[("SandboxExec.tracked",)] = len(sandbox.tracked)
+
+            progression = self.bot.get_cog("RoleProgression")
+            if progression is not None:
+                sizes[("RoleProgression.message_cache",)] = len(progression.message_cache)
+
+            return sizes
+
+        metrics.gauge("tortoise_db_pool_connections", "asyncpg pool connection counts.", ("state",), pool_stats)
+        metrics.gauge(
+            "tortoise_structure_size", "Entries held in in-memory structures.", ("structure",), structure_sizes
+        )
+        metrics.gauge(
+            "tortoise_gateway_latency_seconds", "Discord gateway heartbeat latency.",
+            callback=lambda: {(): self.bot.latency}
+        )
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        if self.metrics_token and request.headers.get("Authorization") != f"Bearer {self.metrics_token}":
+            return web.Response(text="UNAUTHORIZED", status=401)
+
+        return web.Response(
+            text=self.bot.metrics.render(),
+            content_type="text/plain",
+            charset="utf-8"
+        )
+
     async def health(self, request: web.Request) -> web.Response:
         if self._is_rate_limited(request):
             return web.json_response(
@@ -84,7 +131,9 @@ class HealthCheck(commands.Cog):
 
         data = {
             "status": "ok",
-            "build_version": self.bot.build_version,
+            "build_version": build_info.commit_hash,
+            "build_message": build_info.commit_message,
+            "build_time": build_info.build_time.isoformat(),
             "uptime_seconds": int(time.time() - self.start_time),
             "latency_ms": round(self.bot.latency * 1000, 2),
             "guilds": len(self.bot.guilds),
@@ -93,6 +142,7 @@ class HealthCheck(commands.Cog):
             "discord_py_version": discord.__version__,
             "memory_mb": round(mem_mb, 2),
             "pid": os.getpid(),
+            "database_pool": self.bot.db.get_pool_stats() if self.bot.db else {},
         }
 
         return web.json_response(data)
@@ -139,7 +189,7 @@ class HealthCheck(commands.Cog):
         )
 
         embed.add_field(name="Status", value="🟢 Healthy", inline=True)
-        embed.add_field(name="Build", value=f"`{self.bot.build_version}`", inline=True)
+        embed.add_field(name="Build", value=f"`{build_info.commit_hash}`", inline=True)
         embed.add_field(
             name="Latency", value=f"{round(self.bot.latency * 1000, 2)} ms", inline=True
         )
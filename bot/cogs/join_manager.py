@@ -2,13 +2,15 @@ from datetime import time as dtime, timezone
 import random
 import discord
 import asyncio
-from discord import Invite, Member, Message, app_commands
+from discord import Invite, Member, app_commands
 from discord.ext import commands, tasks
 
 from bot.utils import invite_help, embed_handler
 from bot import constants
 from bot.utils.checks import tortoise_bot_developer_only
 from bot.utils.embed_handler import success
+from bot.utils.log_sink import LogPriority
+from bot.utils.message_router import MessageContext, message_route
 
 
 class JoinManager(commands.Cog):
@@ -16,7 +18,6 @@ class JoinManager(commands.Cog):
         self.bot = bot
         self.guild = None
         self.tracker = None
-        self.log_channel = None
         self.welcome_role = None
         self.ban_appeal_guild = None
         self.introduction_channel = None
@@ -40,7 +41,6 @@ class JoinManager(commands.Cog):
         self.guild = self.bot.get_guild(constants.tortoise_guild_id)
         self.ban_appeal_guild = self.bot.get_guild(constants.ban_appeal_server_id)
         self.tracker = invite_help.GuildInviteTracker(self.guild)
-        self.log_channel = self.bot.get_channel(constants.system_log_channel_id)
         self.welcome_role = self.guild.get_role(constants.new_member_role_id)
         self.introduction_channel = self.guild.get_channel(constants.introduction_channel_id)
 
@@ -126,22 +126,13 @@ class JoinManager(commands.Cog):
 
         return random.choice(messages)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: Message):
-
-        if not message.guild or message.author.bot:
-            return
-
-        if message.guild.id != constants.tortoise_guild_id:
-            return
-
-        if message.channel.id != constants.introduction_channel_id:
-            return
-
-        if (message.author.get_role(constants.admin_role_id) or
-                message.author.get_role(constants.moderator_role_id)):
-            return
-
+    @message_route(
+        guild_id=constants.tortoise_guild_id,
+        channel_id=constants.introduction_channel_id,
+        skip_staff=True
+    )
+    async def on_introduction_message(self, context: MessageContext):
+        message = context.message
         try:
             await asyncio.sleep(0.3)
             await message.add_reaction(
@@ -178,7 +169,11 @@ class JoinManager(commands.Cog):
 
         # Instantly ban any bots joining when bot protection is enabled.
         if member.bot and self.bot.advanced_protection:
-            await self.log_channel.send(embed=embed_handler.warning(f"{member.mention} bot was banned due to Advanced Protection™"))
+            self.bot.log_sink.send(
+                constants.system_log_channel_id,
+                embed=embed_handler.warning(f"{member.mention} bot was banned due to Advanced Protection™"),
+                priority=LogPriority.CRITICAL
+            )
             await member.ban(reason="Advanced Protection™ enabled. Bot joins are prohibited.")
             return
 
@@ -210,7 +205,7 @@ class JoinManager(commands.Cog):
 
         await self._send_dm_message(member)
         await member.add_roles(self.welcome_role, reason="Welcome role added")
-        await self.log_channel.send(embed=embed_handler.welcome(member, msg))
+        self.bot.log_sink.send(constants.system_log_channel_id, embed=embed_handler.welcome(member, msg))
         await asyncio.sleep(60)
         await self.introduction_channel.send(
             content=f"Hi {member.mention}! Welcome to our server.\n"
@@ -239,7 +234,7 @@ class JoinManager(commands.Cog):
             f"**Joined at:** {joined_at}"
         )
 
-        await self.log_channel.send(embed=embed_handler.goodbye(member, msg))
+        self.bot.log_sink.send(constants.system_log_channel_id, embed=embed_handler.goodbye(member, msg))
 
 
     @tasks.loop(time=dtime(hour=0, minute=0, tzinfo=timezone.utc))
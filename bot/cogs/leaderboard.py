@@ -192,6 +192,17 @@ class Leaderboard(commands.Cog):
                 inline=False,
             )
 
+        user_rank, ranked = self.manager.get_rank(interaction.guild.id, interaction.user.id)
+        if user_rank is not None and user_rank > len(entries):
+            neighbours = self.manager.get_neighbours(interaction.guild.id, interaction.user.id, radius=1)
+            embed.add_field(
+                name="Around you",
+                value="\n".join(f"#{rank} <@{user_id}> **{points}** points" for rank, user_id, points in neighbours),
+                inline=False,
+            )
+        if user_rank is not None:
+            embed.set_footer(text=f"Your rank: {user_rank} of {ranked}")
+
         await interaction.followup.send(embed=embed)
 
 
@@ -204,9 +215,14 @@ class Leaderboard(commands.Cog):
 
         target = member or interaction.user
         pts = await self.manager.get_points(interaction.guild.id, target.id)
+        rank, ranked = self.manager.get_rank(interaction.guild.id, target.id)
+
+        message = f"{target.mention} has **{pts}** points."
+        if rank is not None:
+            message += f"\nRank **{rank}** of {ranked}."
 
         await interaction.response.send_message(
-            embed=info(f"{target.mention} has **{pts}** points.", self.bot.user,"Points"),
+            embed=info(message, self.bot.user,"Points"),
             ephemeral=True
         )
 
@@ -8,7 +8,8 @@ from discord import app_commands
 
 from bot.utils.message_handler import RemovableMessage
 from bot.utils.embed_handler import info
-from bot.constants import embed_space
+from bot.constants import embed_space, github_repo_link
+from bot.utils.build_info import build_info
 
 
 class Miscellaneous(commands.Cog):
@@ -70,6 +71,8 @@ class Miscellaneous(commands.Cog):
             f"**Bot CPU usage:**{embed_space*9}{bot_cpu_usage_field}\n"
             f"**Server CPU usage:**{embed_space*3}{server_cpu_usage_field}\n"
             f"**IO (r/w):** {io_read_bytes} / {io_write_bytes}\n"
+            f"**Build:** [{build_info.commit_hash}]({github_repo_link}/commit/{build_info.commit_hash}) "
+            f"<t:{int(build_info.build_time.timestamp())}:R>\n"
         )
 
         embed = info("", interaction.guild.me, title="")
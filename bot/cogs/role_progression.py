@@ -1,5 +1,7 @@
 import asyncio
+import logging
 from collections import defaultdict
+from typing import Iterable
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
@@ -7,6 +9,10 @@ from discord import app_commands
 from bot import constants
 from bot.utils.embed_handler import info, success, failure
 from bot.utils.checks import check_if_tortoise_staff
+from bot.utils.message_router import MessageContext, message_route
+
+
+logger = logging.getLogger(__name__)
 
 
 class RoleProgression(commands.Cog):
@@ -17,18 +23,29 @@ class RoleProgression(commands.Cog):
         self.db = bot.progression_manager
 
         self._guild = None
-        self._log_channel = None
 
+        # (UTC day, user_id) -> messages counted since last flush
         self.message_cache = defaultdict(int)
+        # Held for the whole flush so shutdown waits for a running one instead of cutting it off
+        self._flush_lock = asyncio.Lock()
+        # User id -> whether Active+ (True) or Active (False) was reached, in the order they were queued
+        self.promotion_queue: dict[int, bool] = {}
+        self._promotion_worker: asyncio.Task | None = None
 
         self.flush_cache.start()
-        self.active_role_check.start()
-        self.active_plus_role_check.start()
+        self.reconcile_active_roles.start()
 
     def cog_unload(self):
         self.flush_cache.cancel()
-        self.active_role_check.cancel()
-        self.active_plus_role_check.cancel()
+        self.reconcile_active_roles.cancel()
+        if self._promotion_worker is not None:
+            self._promotion_worker.cancel()
+
+    async def cog_shutdown(self):
+        """Called by ShutdownCoordinator, counted messages would otherwise be lost on every deploy."""
+        # Stop instead of cancel so a flush that is already writing finishes, the one below waits for it
+        self.flush_cache.stop()
+        await self._flush_message_cache()
 
 
     def role(self, role_id):
@@ -40,11 +57,6 @@ class RoleProgression(commands.Cog):
             self._guild = self.bot.get_guild(constants.tortoise_guild_id)
         return self._guild
 
-    @property
-    def log_channel(self):
-        if self._log_channel is None:
-            self._log_channel = self.bot.get_channel(constants.system_log_channel_id)
-        return self._log_channel
 
     @property
     def boot_role(self):
@@ -85,116 +97,144 @@ class RoleProgression(commands.Cog):
 
     @tasks.loop(minutes=5)
     async def flush_cache(self):
+        try:
+            await self._flush_message_cache()
+        except Exception as e:
+            logger.error(f"Failed to flush message counts: {e}")
+
+    async def _flush_message_cache(self):
+        """Writes counted messages, counts that fail to write are kept for the next flush."""
+        async with self._flush_lock:
+            if not self.message_cache:
+                return
 
-        if not self.guild:
-            return
-
-        if not self.message_cache:
-            return
+            cache = dict(self.message_cache)
+            self.message_cache.clear()
 
-        cache = dict(self.message_cache)
-        self.message_cache.clear()
+            try:
+                # Only tortoise guild messages are counted
+                crossed = await self.db.add_messages_bulk_daily(constants.tortoise_guild_id, cache)
+            except (Exception, asyncio.CancelledError):
+                for key, messages in cache.items():
+                    self.message_cache[key] += messages
+                raise
 
-        await self.db.add_messages_bulk_unnest(self.guild.id, cache)
+        # Same milestones as get_non_active_users and get_non_active_plus_users
+        self.queue_promotions((user_id for user_id, messages in crossed if messages < 500), active_plus=False)
+        self.queue_promotions((user_id for user_id, messages in crossed if messages >= 500), active_plus=True)
 
     @flush_cache.before_loop
     async def before_flush(self):
         await self.bot.wait_until_ready()
 
-    @tasks.loop(hours=1)
-    async def active_role_check(self):
-        if not self.guild:
-            return
-
-        for user_id in await self.db.get_non_active_users(self.guild.id):
-
-            member = self.guild.get_member(user_id)
-
-            if member and self.active_role not in member.roles:
-                await member.add_roles(self.active_role)
-                await asyncio.sleep(0.5)
-                await self.db.mark_active(self.guild.id, user_id)
-
-                try:
-                    await member.send(
-                        embed=info(
-                            "You have earned the **Active** badge.\n" + constants.automatically_assigned_roles[self.active_role.id],
-                             self.bot.user,
-                            "Achievement Unlocked ✨",
-                            "Issued only to the active members in the server!")
-                    )
-                except discord.Forbidden:
-                    pass
-
-                await self.log_channel.send(
-                    embed=info(f"{member.mention} reached **Active** milestone.", self.bot.user, "")
-                )
-
-
     @tasks.loop(hours=12)
-    async def active_plus_role_check(self):
-
+    async def reconcile_active_roles(self):
+        """
+        Safety net for milestones flushes didn't report, eg. members that weren't cached or failed promotions.
+        Flushes queue promotions as soon as a count reaches a milestone, see _flush_message_cache.
+        """
         if not self.guild:
             return
 
-        for user_id in await self.db.get_non_active_plus_users(self.guild.id):
+        self.queue_promotions(await self.db.get_non_active_users(self.guild.id), active_plus=False)
+        self.queue_promotions(await self.db.get_non_active_plus_users(self.guild.id), active_plus=True)
+
+    @reconcile_active_roles.before_loop
+    async def before_reconcile_active_roles(self):
+        await self.bot.wait_until_ready()
 
-            member = self.guild.get_member(user_id)
+    def queue_promotions(self, user_ids: Iterable[int], active_plus: bool):
+        """Queues users for Active or Active+ role, returns right away."""
+        for user_id in user_ids:
+            # Active+ wins if user ends up queued for both
+            self.promotion_queue[user_id] = self.promotion_queue.get(user_id, False) or active_plus
 
-            if member and self.active_plus_role not in member.roles:
-                await member.add_roles(self.active_plus_role)
-                await asyncio.sleep(0.5)
+        if self.promotion_queue and self._promotion_worker is None:
+            self._promotion_worker = asyncio.create_task(self._process_promotions())
 
-                # Remove previous role
-                if self.active_role in member.roles:
-                    await member.remove_roles(self.active_role)
-                    await asyncio.sleep(0.5)
+    async def _process_promotions(self):
+        try:
+            while self.promotion_queue:
+                user_id = next(iter(self.promotion_queue))
+                active_plus = self.promotion_queue.pop(user_id)
 
-                await self.db.mark_active_plus(self.guild.id, user_id)
+                member = self.guild.get_member(user_id) if self.guild else None
+                if member is None:
+                    continue
 
                 try:
-                    await member.send(
-                        embed=info(
-                            "You have earned the **Active+** badge.\n" + constants.automatically_assigned_roles[
-                                self.active_plus_role.id],
-                            self.bot.user,
-                            "You Rock 🌟",
-                            "This badge is issued only to the most active members!")
-                    )
-                except discord.Forbidden:
-                    pass
+                    if active_plus:
+                        await self._grant_active_plus(member)
+                    else:
+                        await self._grant_active(member)
+                except Exception as e:
+                    # Left unmarked so reconciliation retries it, rest of the queue carries on
+                    logger.exception(f"Failed to grant activity role to {user_id}: {e}")
+        finally:
+            self._promotion_worker = None
+
+    async def _grant_active(self, member: discord.Member):
+        # Active+ members had Active removed on purpose
+        if self.active_role not in member.roles and self.active_plus_role not in member.roles:
+            await member.add_roles(self.active_role)
+            await asyncio.sleep(0.5)
 
-                await self.log_channel.send(
-                    embed=info(f"{member.mention} reached **Active+** milestone.", self.bot.user, "")
+            try:
+                await member.send(
+                    embed=info(
+                        "You have earned the **Active** badge.\n" + constants.automatically_assigned_roles[
+                            self.active_role.id],
+                        self.bot.user,
+                        "Achievement Unlocked ✨",
+                        "Issued only to the active members in the server!")
                 )
+            except discord.Forbidden:
+                pass
 
-    @active_role_check.before_loop
-    async def before_active_check(self):
-        await self.bot.wait_until_ready()
-
-    @active_plus_role_check.before_loop
-    async def before_active_plus_check(self):
-        await self.bot.wait_until_ready()
+            self.bot.log_sink.send(
+                constants.system_log_channel_id,
+                embed=info(f"{member.mention} reached **Active** milestone.", self.bot.user, "")
+            )
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
+        # Marked even if member already had the role so reconciliation doesn't keep reading them
+        await self.db.mark_active(self.guild.id, member.id)
 
-        if not message.guild:
-            return
+    async def _grant_active_plus(self, member: discord.Member):
+        if self.active_plus_role not in member.roles:
+            await member.add_roles(self.active_plus_role)
+            await asyncio.sleep(0.5)
 
-        if message.guild.id != self.guild.id:
-            return
+            # Remove previous role
+            if self.active_role in member.roles:
+                await member.remove_roles(self.active_role)
+                await asyncio.sleep(0.5)
 
-        if message.author.bot:
-            return
+            try:
+                await member.send(
+                    embed=info(
+                        "You have earned the **Active+** badge.\n" + constants.automatically_assigned_roles[
+                            self.active_plus_role.id],
+                        self.bot.user,
+                        "You Rock 🌟",
+                        "This badge is issued only to the most active members!")
+                )
+            except discord.Forbidden:
+                pass
 
-        if len(message.content) < 5:
-            return
+            self.bot.log_sink.send(
+                constants.system_log_channel_id,
+                embed=info(f"{member.mention} reached **Active+** milestone.", self.bot.user, "")
+            )
 
-        member = message.author
-        uid = member.id
+        await self.db.mark_active_plus(self.guild.id, member.id)
 
-        self.message_cache[uid] += 1
+    @message_route(
+        guild_id=constants.tortoise_guild_id,
+        predicate=lambda cog, context: len(context.message.content) >= 5
+    )
+    async def on_guild_message(self, context: MessageContext):
+        # Day the message was sent on, a flush right after midnight still belongs to the previous day
+        self.message_cache[(context.message.created_at.date(), context.author.id)] += 1
 
 
     def determine_stage(self, member: discord.Member):
@@ -233,9 +273,8 @@ class RoleProgression(commands.Cog):
             return role_used == "moderator"
         return False
 
-    async def stage_passed(self, member, stage):
-
-        apprentices, fellows, mods = await self.db.get_stage_counts_from_query(member.id, stage)
+    @staticmethod
+    def stage_passed(stage: str, apprentices: int, fellows: int, mods: int):
 
         if stage == "boot":
             if mods >= 1:
@@ -258,6 +297,16 @@ class RoleProgression(commands.Cog):
 
         return False
 
+    @classmethod
+    def stage_crossed(cls, stage: str, role_used: str, apprentices: int, fellows: int, mods: int):
+        """Whether the nomination made with role_used is the one that took stage counts, which include it, over."""
+        before = (
+            apprentices - (role_used == "apprentice"),
+            fellows - (role_used == "fellow"),
+            mods - (role_used == "moderator")
+        )
+        return cls.stage_passed(stage, apprentices, fellows, mods) and not cls.stage_passed(stage, *before)
+
 
     async def promote_user(self, member, stage):
 
@@ -279,7 +328,8 @@ class RoleProgression(commands.Cog):
         except discord.Forbidden:
             pass
 
-        await self.log_channel.send(
+        self.bot.log_sink.send(
+            constants.system_log_channel_id,
             embed=info(f"{member.mention} was promoted to **{role.mention}**", self.bot.user, "")
         )
 
@@ -347,8 +397,15 @@ class RoleProgression(commands.Cog):
         except discord.Forbidden:
             pass
 
-        await self.log_channel.send(embed=info(f"{member.mention} was promoted to **{role.mention}**",
-                                               self.bot.user, "",f"Given by: {interaction.user}"))
+        self.bot.log_sink.send(
+            constants.system_log_channel_id,
+            embed=info(
+                f"{member.mention} was promoted to **{role.mention}**",
+                self.bot.user,
+                "",
+                f"Given by: {interaction.user}"
+            )
+        )
 
         await interaction.followup.send(
             embed=success(f"{member.mention} is promoted to {role.mention}", interaction.client.user), ephemeral=True)
@@ -400,7 +457,7 @@ class RoleProgression(commands.Cog):
 
         await interaction.response.defer(ephemeral=True)
 
-        inserted = await self.db.add_nomination(
+        inserted, (apprentices, fellows, mods) = await self.db.nominate(
             member.id,
             interaction.user.id,
             stage,
@@ -414,22 +471,20 @@ class RoleProgression(commands.Cog):
             )
             return
 
-        await self.log_channel.send(
+        self.bot.log_sink.send(
+            constants.system_log_channel_id,
             embed=info(
                 f"{interaction.user} nominated {member.mention} for **{stage}**."
             , self.bot.user, "")
         )
 
-        if await self.stage_passed(member, stage):
+        # Counts are serialized by the nominate statement, only the nomination that crossed the threshold promotes
+        # so concurrent nominators don't promote twice
+        if self.stage_crossed(stage, role_used, apprentices, fellows, mods):
 
             await self.promote_user(member, stage)
 
-        else:
-
-            apprentices, fellows, mods = await self.db.get_stage_counts(
-                member.id,
-                stage
-            )
+        elif not self.stage_passed(stage, apprentices, fellows, mods):
 
             progress = ""
 
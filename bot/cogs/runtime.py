@@ -9,6 +9,7 @@ from typing import Dict
 from bot.utils.checks import check_if_tortoise_staff
 from bot.utils.embed_handler import code_eval_embed, failure, success
 from bot.constants import tortoise_guild_id
+from bot.utils.message_router import MessageContext, message_route
 
 EXECUTE_URL = os.getenv("EXECUTION_API_URL")
 API_TOKEN = os.getenv("EXECUTION_API_KEY")
@@ -43,8 +44,8 @@ class SandboxExec(commands.Cog):
         self.tracked: Dict[int, dict] = {}
         self.runtime_enabled = True
 
-    def cog_unload(self):
-        self.bot.loop.create_task(self.session.close())
+    async def cog_unload(self):
+        await self.session.close()
 
 
     def _parse_block(self, content: str):
@@ -145,14 +146,12 @@ class SandboxExec(commands.Cog):
             return await channel.send(embed=embed, view=view)
 
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if not self.runtime_enabled or message.author.bot or not message.guild:
-            return
-
-        if message.guild.id != tortoise_guild_id:
-            return
-
+    @message_route(
+        guild_id=tortoise_guild_id,
+        predicate=lambda cog, context: cog.runtime_enabled and context.message.content.startswith("/run")
+    )
+    async def on_run_message(self, context: MessageContext):
+        message = context.message
         parsed = self._parse_block(message.content)
         if not parsed:
             return
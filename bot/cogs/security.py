@@ -15,6 +15,8 @@ from bot.constants import allowed_file_extensions
 from bot.utils.checks import tortoise_bot_developer_only
 from bot.utils.misc import get_user_avatar
 from bot.utils.custom_types import FakeInteraction
+from bot.utils.message_router import MessageContext, message_route
+from bot.utils.log_sink import LogPriority
 
 
 logger = logging.getLogger(__name__)
@@ -239,12 +241,23 @@ class Security(commands.Cog):
             reason=reason
         )
         log_embed.set_footer(text="⚠️ This was an automated action.")
-        await self.log_channel.send(embed=log_embed)
+        self.bot.log_sink.send(constants.bot_log_channel_id, embed=log_embed, priority=LogPriority.CRITICAL)
         await member.ban(reason=f"AutoMod racial and homophobic slur rule triggered")
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        await self.security_check(message)
+    @message_route(
+        guild_id=constants.tortoise_guild_id,
+        predicate=lambda cog, context: (
+            bool(context.message.attachments)
+            and context.is_member
+            and not context.permissions.administrator
+            and not context.is_trusted
+        )
+    )
+    async def on_guild_message(self, context: MessageContext):
+        # Router predicate already covers is_security_whitelisted for new messages
+        deleted = await self.deal_with_attachments(context.message)
+        if deleted:
+            self.bot.suppressed_deletes.add(context.message.id)
 
     @commands.Cog.listener()
     async def on_message_delete(self, message: discord.Message):
@@ -252,8 +265,7 @@ class Security(commands.Cog):
         if self.is_security_whitelisted(message):
             return
 
-        if message.id in self.bot.suppressed_deletes:
-            self.bot.suppressed_deletes.discard(message.id)
+        if self.bot.suppressed_deletes.consume(message.id):
             return
 
         await self.archive_and_delete_message(
@@ -271,8 +283,7 @@ class Security(commands.Cog):
 
         filtered = []
         for msg in messages:
-            if msg.id in self.bot.suppressed_deletes:
-                self.bot.suppressed_deletes.discard(msg.id)
+            if self.bot.suppressed_deletes.consume(msg.id):
                 continue
             filtered.append(msg)
 
@@ -378,7 +389,7 @@ class Security(commands.Cog):
         )
         embed = info(msg, msg_before.guild.me, title="Message edited")
         embed.set_footer(text=f"Author: {msg_before.author}", icon_url=get_user_avatar(msg_before.author))
-        await self.log_channel.send(embed=embed)
+        self.bot.log_sink.send(constants.bot_log_channel_id, embed=embed)
 
         # Check if the new message violates our security
         await self.security_check(msg_after)
@@ -10,6 +10,9 @@ from bot.constants import (
 from bot.utils.embed_handler import success, failure, warning, info, authored_sm
 from bot.utils.checks import tortoise_bot_developer_only
 
+# Discord limits for embed description and for all embeds of a single message combined
+DASHBOARD_MAX_DESCRIPTION_LENGTH = 4096
+DASHBOARD_MAX_TOTAL_LENGTH = 6000
 
 
 class CreateTeamModal(discord.ui.Modal, title="Create Team"):
@@ -150,7 +153,8 @@ class CreateTeamModal(discord.ui.Modal, title="Create Team"):
         except discord.NotFound:
             pass
 
-        await self.cog.log_channel.send(
+        self.cog.bot.log_sink.send(
+            system_log_channel_id,
             embed=info(
                 f"**Leader:** {leader.mention}\n"
                 f"**Timezone:** {timezone}\n"
@@ -302,7 +306,8 @@ class JoinReasonModal(discord.ui.Modal, title="Join Team Reason"):
             embed=success(f"Your application has been sent to **{self.team['name']}**!"), ephemeral=True
         )
 
-        return await self.cog.log_channel.send(
+        self.cog.bot.log_sink.send(
+            system_log_channel_id,
             embed=info(
                 f"{interaction.user.mention} requested to join **{self.team['name']}**.\n\n"
                 f"**Reason:** {self.reason.value}",
@@ -317,7 +322,8 @@ class TeamCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.team = bot.team_manager
-        self.log_channel = None
+        # Last dashboard sent, editing is skipped when nothing changed
+        self._dashboard_rendered: list[dict] | None = None
 
     async def _handle_team_invite(self, interaction: discord.Interaction, custom_id: str):
 
@@ -384,7 +390,8 @@ class TeamCog(commands.Cog):
                     content=member.mention,
                     embed=authored_sm(f"{member} has joined the team.", author=member)
                 )
-            await self.log_channel.send(
+            self.bot.log_sink.send(
+                system_log_channel_id,
                 embed=authored_sm(f"{member} has joined team {team['name']}", author=member)
             )
 
@@ -396,7 +403,8 @@ class TeamCog(commands.Cog):
                 await team_channel.send(
                     embed=authored_sm(f"{member} has rejected the invitation to join the team", author=member)
                 )
-            await self.log_channel.send(
+            self.bot.log_sink.send(
+                system_log_channel_id,
                 embed=authored_sm(
                     f"{member} rejected the invitation from team {team['name']}", author=member
                 )
@@ -453,7 +461,6 @@ class TeamCog(commands.Cog):
 
     @commands.Cog.listener()
     async def on_ready(self):
-        self.log_channel = self.bot.get_channel(system_log_channel_id)
         self.bot.add_view(PersistentJoinRequestView(self))
 
     @commands.Cog.listener()
@@ -552,7 +559,8 @@ class TeamCog(commands.Cog):
 
         await role.delete()
 
-        await self.log_channel.send(
+        self.bot.log_sink.send(
+            system_log_channel_id,
             embed=info(f"Team **{team['name']}** was deleted by {interaction.user.mention}", self.bot.user, "")
         )
         await self.update_dashboard(guild)
@@ -628,7 +636,7 @@ class TeamCog(commands.Cog):
                 )
             )
 
-            await self.team.create_invite(
+            created = await self.team.create_invite(
                 msg.id,
                 team["team_id"],
                 interaction.user.id,
@@ -636,6 +644,14 @@ class TeamCog(commands.Cog):
                 interaction.guild.id,
             )
 
+            # Another invite for the same person was stored between the check above and now
+            if not created:
+                await msg.delete()
+                return await interaction.followup.send(
+                    embed=warning("You have already invited this person."),
+                    ephemeral=True
+                )
+
             view = discord.ui.View(timeout=None)
 
             view.add_item(discord.ui.Button(
@@ -652,7 +668,8 @@ class TeamCog(commands.Cog):
 
             await msg.edit(view=view)
 
-            await self.log_channel.send(
+            self.bot.log_sink.send(
+                system_log_channel_id,
                 embed=info(
                     f"{interaction.user.mention} invited {member.mention} to join **{team['name']}**",
                     self.bot.user, ""
@@ -704,15 +721,15 @@ class TeamCog(commands.Cog):
         except discord.Forbidden:
             pass
 
-        if self.log_channel:
-            if actor:
-                msg = f"{actor.mention} {reason} {member.mention} from **{team['name']}**"
-            else:
-                msg = f"{member.mention} {reason} **{team['name']}**"
+        if actor:
+            msg = f"{actor.mention} {reason} {member.mention} from **{team['name']}**"
+        else:
+            msg = f"{member.mention} {reason} **{team['name']}**"
 
-            await self.log_channel.send(
-                embed=info(msg, self.bot.user, "")
-            )
+        self.bot.log_sink.send(
+            system_log_channel_id,
+            embed=info(msg, self.bot.user, "")
+        )
 
         return True, None
 
@@ -796,31 +813,41 @@ class TeamCog(commands.Cog):
             embed=success("You left the team.")
         )
 
-    async def _build_team_embed(self, guild: discord.Guild):
+    async def _build_team_embeds(self, guild: discord.Guild) -> list[discord.Embed]:
 
-        teams = await self.team.get_all_teams(guild.id)
+        teams = await self.team.get_all_teams_with_member_counts(guild.id)
 
         if not teams:
-            return info("No teams created yet.", self.bot.user, "Teams Dashboard")
+            return [info("No teams created yet.", self.bot.user, "Teams Dashboard")]
 
-        desc = "# Teams Dashboard\n\n"
+        # Team sections are packed into as few embeds as possible, never splitting one section between two
+        descriptions = ["# Teams Dashboard\n\n"]
+        total_length = len(descriptions[0])
 
-        for team in teams:
+        for shown, team in enumerate(teams):
             leader = guild.get_member(team["leader_id"])
-            members = await self.team.get_team_members(team["team_id"])
 
-            desc += (
+            section = (
                 f"## {team['name']}\n"
                 f"Lead: `{leader.display_name if leader else 'Unknown'}`\n"
                 f"Timezone: `{team['timezone']}`\n"
                 f"Channel: <#{team['text_channel_id']}>\n"
-                f"Members: `{len(members)}`\n\n"
+                f"Members: `{team['member_count']}`\n\n"
             )
 
-        return info(
-            desc, self.bot.user, "",
-            "Enable “Show All Channels” in server settings to view all team channels"
-        )
+            # Leave room for the footer and the note about hidden teams
+            if total_length + len(section) > DASHBOARD_MAX_TOTAL_LENGTH - 200:
+                descriptions[-1] += f"*...and {len(teams) - shown} more teams.*"
+                break
+
+            if len(descriptions[-1]) + len(section) > DASHBOARD_MAX_DESCRIPTION_LENGTH:
+                descriptions.append("")
+            descriptions[-1] += section
+            total_length += len(section)
+
+        embeds = [info(description, self.bot.user, "") for description in descriptions]
+        embeds[-1].set_footer(text="Enable “Show All Channels” in server settings to view all team channels")
+        return embeds
 
     async def update_dashboard(self, guild: discord.Guild):
 
@@ -828,13 +855,18 @@ class TeamCog(commands.Cog):
         if not channel:
             return
 
+        embeds = await self._build_team_embeds(guild)
+        rendered = [embed.to_dict() for embed in embeds]
+        if rendered == self._dashboard_rendered:
+            return
+
         try:
             msg = await channel.fetch_message(teams_dashboard_message_id)
         except:
             return
 
-        embed = await self._build_team_embed(guild)
-        await msg.edit(embed=embed)
+        await msg.edit(embeds=embeds)
+        self._dashboard_rendered = rendered
 
     @team_group.command(name="update_dashboard")
     @app_commands.check(tortoise_bot_developer_only)
@@ -888,7 +920,8 @@ class TeamCog(commands.Cog):
                 await member.send(embed=success(f"You joined team **{team['name']}**!"))
             except:
                 pass
-            await self.log_channel.send(
+            self.bot.log_sink.send(
+                system_log_channel_id,
                 embed=info(
                     f"{member.mention} joined **{team['name']}**",
                     self.bot.user, ""
@@ -906,7 +939,8 @@ class TeamCog(commands.Cog):
                     await member.send(embed=failure(f"Your request for **{team['name']}** was rejected."))
                 except:
                     pass
-                await self.log_channel.send(
+                self.bot.log_sink.send(
+                    system_log_channel_id,
                     embed=info(
                         f"{member.mention}'s request to join **{team['name']}** was rejected.",
                         self.bot.user, ""
@@ -1,3 +1,4 @@
+import asyncio
 import datetime
 import logging
 from io import StringIO
@@ -13,6 +14,7 @@ from bot import constants
 from bot.utils.checks import check_if_tortoise_staff
 from bot.utils.cooldown import CoolDown
 from bot.utils.message_logger import MessageLogger
+from bot.utils.message_router import MessageContext, message_route
 from bot.utils.embed_handler import authored, failure, success, info, create_suggestion_msg, authored_sm
 
 
@@ -328,6 +330,26 @@ class TortoiseDM(commands.Cog):
         self.staff_applications_channel= None
         self.staff_channel = None
 
+    async def cog_shutdown(self):
+        """
+        Called by ShutdownCoordinator. Mod mail sessions live in wait_for loops that can't survive a restart,
+        so both sides are told the session ended instead of it silently going quiet.
+        """
+        closed_embed = failure("Mod mail closed because the bot is restarting. Please open a new one if needed.")
+        sends = []
+        for user_id, mod_id in self.active_mod_mails.items():
+            for target_id in (user_id, mod_id):
+                target = self.bot.get_user(target_id)
+                if target is not None:
+                    sends.append(self.bot.safe_send(target, embed=closed_embed))
+            sends.append(self.update_staff_embed(
+                user_id,
+                footer_append="🔄 Closed due to restart",
+                color=discord.Color.dark_red()
+            ))
+
+        await asyncio.gather(*sends)
+
     @commands.Cog.listener()
     async def on_ready(self):
         # Server Utility Channels
@@ -403,16 +425,12 @@ class TortoiseDM(commands.Cog):
         except Exception as e:
             logger.error(f"Error in duty loop: {e}")
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        if message.author == self.bot.user:
-            return
-        elif message.guild is not None:
-            return  # Functionality only active in DMs
-        if self.is_any_session_active(message.author.id):
-            return
-        else:
-            await self.send_dm_options(output=message.author)
+    @message_route(
+        dm_only=True,
+        predicate=lambda cog, context: not cog.is_any_session_active(context.author.id)
+    )
+    async def on_dm_message(self, context: MessageContext):
+        await self.send_dm_options(output=context.author)
 
     @commands.Cog.listener()
     async def on_typing(self, channel, user, _when):
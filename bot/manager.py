@@ -1,279 +1,586 @@
 from __future__ import annotations
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+from abc import ABC, abstractmethod
+import os
+import sys
+import time
+import asyncio
+import logging
 import asyncpg
 
-class Database:
-
-    def __init__(self, dsn: str):
-        self.dsn = dsn
-        self.pool: asyncpg.Pool | None = None
+from bot.utils.metrics import MetricsRegistry
+from bot.utils.query_tracer import QueryTracer
+from bot.utils.rank_index import RankIndex
+
+
+logger = logging.getLogger(__name__)
+
+
+class TortoiseConnection(asyncpg.Connection):
+    async def cache_statement(self, query: str):
+        """Prepares query into the connection statement cache, fetch/execute of the same query reuse it."""
+        # Connection.prepare returns a statement that is invalidated once the connection goes back to the pool
+        # and bypasses the cache, this is the lookup fetch/execute do themselves
+        await self._get_statement(query, None)
+
+
+class Storage(ABC):
+    def __init__(self, metrics: MetricsRegistry | None = None, slow_query_threshold: float | None = 0.5):
+        """
+        Named query interface managers run their queries through.
+        Managers declare their statements with register_queries and execute them by name, backends decide how
+        a name is executed: Database prepares the SQL on Postgres, MemoryDatabase runs an equivalent Python
+        implementation. The name is also used to label query metrics, and every execution is traced with the
+        manager method that ran it, see QueryTracer.
+        :param metrics: registry to export query metrics to, a private one is used if not passed
+        :param slow_query_threshold: seconds above which a query is logged as slow, None disables the slow log
+        """
+        self.queries: dict[str, str] = {}
+        self.metrics = metrics or MetricsRegistry()
+        self.tracer = QueryTracer(slow_query_threshold)
+        self.query_latency = self.metrics.histogram(
+            "tortoise_db_query_seconds",
+            "Duration of named database queries, including waiting for a pool connection.",
+            ("query",)
+        )
+        self.query_errors = self.metrics.counter(
+            "tortoise_db_query_errors_total",
+            "Named database queries that raised an exception.",
+            ("query",)
+        )
 
+    def register_queries(self, namespace: str, queries: dict[str, str]):
+        """
+        :param namespace: prefix of query names, eg. points for points.add_points
+        :param queries: dict of query name to SQL
+        """
+        for name, sql in queries.items():
+            full_name = f"{namespace}.{name}"
+            if self.queries.get(full_name, sql) != sql:
+                raise ValueError(f"Query {full_name} is already registered with different SQL.")
+            self.queries[full_name] = sql
+
+    @abstractmethod
     async def connect(self):
-        if not self.pool:
-            self.pool = await asyncpg.create_pool(self.dsn)
+        ...
 
-    async def close(self):
-        if self.pool:
-            await self.pool.close()
+    @abstractmethod
+    async def close(self, timeout: float = 10):
+        ...
 
-class ProgressionManager:
+    @abstractmethod
+    def acquire(self) -> AsyncIterator[Any]:
+        """Async context manager holding one connection, for running several queries on it."""
 
-    def __init__(self, db: Database):
-        self.db = db
+    @abstractmethod
+    def get_pool_stats(self) -> dict[str, int]:
+        ...
 
-    async def setup(self):
+    async def refresh_prepared_statements(self):
+        pass
 
-        await self.db.pool.execute(
-            """
-            CREATE TABLE IF NOT EXISTS activity (
-                guild_id BIGINT NOT NULL,
-                user_id BIGINT NOT NULL,
-                messages INTEGER NOT NULL DEFAULT 0,
-                active BOOLEAN NOT NULL DEFAULT FALSE,
-                active_plus BOOLEAN NOT NULL DEFAULT FALSE,
-                PRIMARY KEY (guild_id, user_id)
-            )
-            """
-        )
+    @abstractmethod
+    async def _execute(self, name: str, method: str, args: tuple, connection):
+        """Runs named query, method is one of execute, executemany, fetch, fetchrow and fetchval."""
 
-        await self.db.pool.execute(
-            """
-            CREATE TABLE IF NOT EXISTS nominations (
-                target_id BIGINT NOT NULL,
-                nominator_id BIGINT NOT NULL,
-                stage TEXT NOT NULL,
-                nominator_role TEXT NOT NULL,
-                created_at TIMESTAMPTZ DEFAULT NOW(),
+    async def execute(self, name: str, *args, connection=None) -> str:
+        """Same as asyncpg execute, returns status of the command eg. INSERT 0 1."""
+        return await self._run(name, "execute", args, connection)
 
-                PRIMARY KEY (target_id, nominator_id, stage, nominator_role)
-            )
-            """
+    async def executemany(self, name: str, args: list[tuple], connection=None):
+        await self._run(name, "executemany", (args,), connection)
+
+    async def fetch(self, name: str, *args, connection=None) -> list[asyncpg.Record]:
+        return await self._run(name, "fetch", args, connection)
+
+    async def fetchrow(self, name: str, *args, connection=None) -> asyncpg.Record | None:
+        return await self._run(name, "fetchrow", args, connection)
+
+    async def fetchval(self, name: str, *args, connection=None):
+        return await self._run(name, "fetchval", args, connection)
+
+    async def _run(self, name: str, method: str, args: tuple, connection):
+        # Frame 1 is the public method (fetch, execute..), 2 is the manager method that called it
+        caller = sys._getframe(2).f_code.co_qualname
+        result = None
+        start = time.perf_counter()
+        try:
+            result = await self._execute(name, method, args, connection)
+            return result
+        except Exception:
+            self.query_errors.inc(query=name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.query_latency.observe(elapsed, query=name)
+            self.tracer.record(name, caller, elapsed, self._row_count(method, args, result))
+
+    @staticmethod
+    def _row_count(method: str, args: tuple, result) -> int:
+        """Rows returned or affected by a finished query, 0 if it failed."""
+        if method == "fetch":
+            return len(result or ())
+        if method in ("fetchrow", "fetchval"):
+            return int(result is not None)
+        if method == "executemany":
+            return len(args[0])
+        # Command status ends with affected row count, eg. INSERT 0 5 or UPDATE 3
+        count = result.rsplit(" ", 1)[-1] if result else ""
+        return int(count) if count.isdigit() else 0
+
+
+class Database(Storage):
+
+    def __init__(
+            self,
+            dsn: str,
+            metrics: MetricsRegistry | None = None,
+            min_size: int = 4,
+            max_size: int = 10,
+            command_timeout: float | None = 10,
+            max_inactive_connection_lifetime: float = 300,
+            slow_query_threshold: float | None = 0.5
+    ):
+        """
+        Postgres storage, asyncpg pool with a registry of named queries.
+        Managers register their statements before connect and every new pool connection prepares all of them
+        upfront into its statement cache, so hot paths never pay for parsing and planning.
+        :param dsn: postgres connection string
+        :param metrics: registry to export query metrics to, a private one is used if not passed
+        :param min_size: connections opened (and their statements prepared) on connect and kept open
+        :param max_size: max connections, further acquires wait for a connection to be released
+        :param command_timeout: seconds a single statement may run before it's cancelled, None for no limit
+        :param max_inactive_connection_lifetime: seconds after which idle connections above min_size are closed
+        :param slow_query_threshold: seconds above which a query is logged as slow, None disables the slow log
+        """
+        super().__init__(metrics, slow_query_threshold)
+        self.dsn = dsn
+        self.pool: asyncpg.Pool | None = None
+        self.min_size = min_size
+        self.max_size = max_size
+        self.command_timeout = command_timeout
+        self.max_inactive_connection_lifetime = max_inactive_connection_lifetime
+        # Tasks currently waiting for a free pool connection
+        self.waiting = 0
+        self.acquire_latency = self.metrics.histogram(
+            "tortoise_db_pool_acquire_seconds",
+            "Time spent waiting for a pool connection."
         )
 
+    @classmethod
+    def from_env(cls, dsn: str, metrics: MetricsRegistry | None = None) -> Database:
+        """
+        Pool settings from DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_COMMAND_TIMEOUT (0 disables it),
+        DB_POOL_MAX_INACTIVE_LIFETIME and DB_SLOW_QUERY_THRESHOLD (0 disables it), defaults are used for unset ones.
+        """
+        command_timeout = float(os.getenv("DB_COMMAND_TIMEOUT", 10)) or None
+        slow_query_threshold = float(os.getenv("DB_SLOW_QUERY_THRESHOLD", 0.5)) or None
+        return cls(
+            dsn,
+            metrics,
+            min_size=int(os.getenv("DB_POOL_MIN_SIZE", 4)),
+            max_size=int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            command_timeout=command_timeout,
+            max_inactive_connection_lifetime=float(os.getenv("DB_POOL_MAX_INACTIVE_LIFETIME", 300)),
+            slow_query_threshold=slow_query_threshold
+        )
 
-    async def add_messages_bulk(self, guild_id: int, cache: dict[int, int]):
+    async def connect(self):
+        if self.pool:
+            return
 
-        async with self.db.pool.acquire() as conn:
+        server_settings = {}
+        if self.command_timeout:
+            # Server cancels the statement too, so it doesn't keep running after the client gave up on it
+            server_settings["statement_timeout"] = str(int(self.command_timeout * 1000))
+
+        start = time.perf_counter()
+        # Pool opens min_size connections right away, each one prepares registered queries in init
+        self.pool = await asyncpg.create_pool(
+            self.dsn,
+            connection_class=TortoiseConnection,
+            init=self._init_connection,
+            # Room for every registered query plus ad hoc SQL (migrations, copy) without evicting them
+            statement_cache_size=len(self.queries) + 100,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            command_timeout=self.command_timeout,
+            max_inactive_connection_lifetime=self.max_inactive_connection_lifetime,
+            server_settings=server_settings
+        )
+        logger.info(
+            f"Database pool warmed up with {self.pool.get_size()} connections in {time.perf_counter() - start:.2f}s"
+        )
 
-            for user_id, amount in cache.items():
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[TortoiseConnection]:
+        """Same as pool acquire but the wait for a free connection is measured."""
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            connection = await self.pool.acquire()
+        finally:
+            self.waiting -= 1
+            self.acquire_latency.observe(time.perf_counter() - start)
 
-                await conn.execute(
-                    """
-                    INSERT INTO activity (guild_id,user_id,messages)
-                    VALUES ($1,$2,$3)
-                    ON CONFLICT (guild_id,user_id)
-                    DO UPDATE
-                    SET messages = activity.messages + $3
-                    """,
-                    guild_id,
-                    user_id,
-                    amount
-                )
+        try:
+            yield connection
+        finally:
+            await self.pool.release(connection)
+
+    def get_pool_stats(self) -> dict[str, int]:
+        if self.pool is None:
+            return {}
+
+        return {
+            "size": self.pool.get_size(),
+            "idle": self.pool.get_idle_size(),
+            "in_use": self.pool.get_size() - self.pool.get_idle_size(),
+            "waiting": self.waiting,
+            "min": self.pool.get_min_size(),
+            "max": self.pool.get_max_size(),
+        }
 
-    async def add_messages_bulkops(self, guild_id: int, cache: dict[int, int]):
+    async def refresh_prepared_statements(self):
+        """Replaces pool connections once released so statements are prepared against the current schema."""
+        await self.pool.expire_connections()
 
-        if not cache:
+    async def close(self, timeout: float = 10):
+        if not self.pool:
             return
 
-        rows = [(guild_id, user_id, amount) for user_id, amount in cache.items()]
+        try:
+            # Waits for acquired connections to be released
+            await asyncio.wait_for(self.pool.close(), timeout)
+        except asyncio.TimeoutError:
+            self.pool.terminate()
 
-        async with self.db.pool.acquire() as conn:
-            await conn.executemany(
-                """
-                INSERT INTO activity (guild_id, user_id, messages)
-                VALUES ($1, $2, $3)
-                ON CONFLICT (guild_id, user_id)
-                DO UPDATE
-                SET messages = activity.messages + EXCLUDED.messages
-                """,
-                rows
-            )
+    async def _init_connection(self, connection: TortoiseConnection):
+        for name, query in self.queries.items():
+            try:
+                await connection.cache_statement(query)
+            except asyncpg.PostgresError as e:
+                # Eg. table doesn't exist before first migration, it gets prepared on first use instead
+                logger.info(f"Could not prepare query {name} upfront: {e}")
 
-    async def add_messages_bulk_unnest(self, guild_id: int, cache: dict[int, int]):
+        # Prepares only flush without a sync, the implicit transaction they opened keeps a lock on every table
+        # read until the next statement. Idle in the pool that would block migrations and other DDL, end it now.
+        await connection.execute("SELECT 1")
 
-        if not cache:
-            return
+    async def _execute(self, name: str, method: str, args: tuple, connection: TortoiseConnection | None):
+        if connection is not None:
+            return await self._run_prepared(connection, name, method, args)
+
+        async with self.acquire() as connection:
+            return await self._run_prepared(connection, name, method, args)
+
+    async def _run_prepared(self, connection: TortoiseConnection, name: str, method: str, args: tuple):
+        # Statements invalidated by schema changes are re-prepared by asyncpg outside transactions, an outdated
+        # type cache is dropped after raising. The statement already ran then so it's not retried here.
+        return await getattr(connection, method)(self.queries[name], *args)
 
-        user_ids = list(cache.keys())
-        amounts = list(cache.values())
 
-        await self.db.pool.execute(
-            """
+class ProgressionManager:
+    queries = {
+        "add_messages": """
+            INSERT INTO activity (guild_id,user_id,messages)
+            VALUES ($1,$2,$3)
+            ON CONFLICT (guild_id,user_id)
+            DO UPDATE
+            SET messages = activity.messages + $3
+        """,
+        "add_messages_many": """
+            INSERT INTO activity (guild_id, user_id, messages)
+            VALUES ($1, $2, $3)
+            ON CONFLICT (guild_id, user_id)
+            DO UPDATE
+            SET messages = activity.messages + EXCLUDED.messages
+        """,
+        "add_messages_unnest": """
             INSERT INTO activity (guild_id, user_id, messages)
             SELECT $1, u, m
             FROM UNNEST($2::BIGINT[], $3::INT[]) AS t(u, m)
             ON CONFLICT (guild_id, user_id)
             DO UPDATE
             SET messages = activity.messages + EXCLUDED.messages
-            """,
-            guild_id,
-            user_ids,
-            amounts
-        )
-
-
-    async def mark_active(self, guild_id: int, user_id: int):
-        await self.db.pool.execute(
-            """
+        """,
+        "add_messages_daily_unnest": """
+            WITH increments AS (
+                SELECT d AS day, u AS user_id, m AS messages
+                FROM UNNEST($2::DATE[], $3::BIGINT[], $4::INT[]) AS t(d, u, m)
+            ), daily AS (
+                INSERT INTO activity_daily (guild_id, day, user_id, messages)
+                SELECT $1, day, user_id, messages
+                FROM increments
+                ON CONFLICT (guild_id, day, user_id)
+                DO UPDATE
+                SET messages = activity_daily.messages + EXCLUDED.messages
+            ), totals AS (
+                SELECT user_id, SUM(messages)::INT AS messages
+                FROM increments
+                GROUP BY user_id
+            ), upserted AS (
+                INSERT INTO activity (guild_id, user_id, messages)
+                SELECT $1, user_id, messages
+                FROM totals
+                ON CONFLICT (guild_id, user_id)
+                DO UPDATE
+                SET messages = activity.messages + EXCLUDED.messages
+                RETURNING user_id, messages
+            )
+            -- Users whose count was below a milestone before this batch and reached it with it
+            SELECT upserted.user_id, upserted.messages
+            FROM upserted
+            JOIN totals USING (user_id)
+            WHERE (upserted.messages >= 50 AND upserted.messages - totals.messages < 50)
+            OR (upserted.messages >= 500 AND upserted.messages - totals.messages < 500)
+        """,
+        "get_recent_activity": """
+            SELECT
+            user_id,
+            COALESCE(SUM(messages) FILTER (WHERE day > $2::DATE - 7), 0) AS last_7_days,
+            COALESCE(SUM(messages) FILTER (WHERE day > $2::DATE - 30), 0) AS last_30_days,
+            SUM(messages) AS last_90_days
+            FROM activity_daily
+            WHERE guild_id=$1 AND day > $2::DATE - 90
+            GROUP BY user_id
+        """,
+        "mark_active": """
             UPDATE activity
             SET active = TRUE
             WHERE guild_id=$1 AND user_id=$2
-            """,
-            guild_id,
-            user_id
-        )
-
-    async def mark_active_plus(self, guild_id: int, user_id: int):
-        await self.db.pool.execute(
-            """
+        """,
+        "mark_active_plus": """
             UPDATE activity
             SET active_plus = TRUE
             WHERE guild_id=$1 AND user_id=$2
-            """,
-            guild_id,
-            user_id
-        )
-
-
-    async def get_messages(self, guild_id: int, user_id: int) -> int:
-
-        return await self.db.pool.fetchval(
-            """
+        """,
+        "get_messages": """
             SELECT messages
             FROM activity
             WHERE guild_id=$1 AND user_id=$2
-            """,
-            guild_id,
-            user_id
-        ) or 0
-
-    async def get_non_active_users(self, guild_id: int) -> list[int]:
-        rows = await self.db.pool.fetch(
-            """
+        """,
+        "get_non_active_users": """
             SELECT user_id
             FROM activity
             WHERE guild_id=$1
             AND active=FALSE
             AND messages >= 50
-            """,
-            guild_id
-        )
-        return [r["user_id"] for r in rows]
-
-    async def get_non_active_plus_users(self, guild_id: int) -> list[int]:
-         rows = await self.db.pool.fetch(
-            """
+        """,
+        "get_non_active_plus_users": """
             SELECT user_id
             FROM activity
             WHERE guild_id=$1
             AND active_plus=FALSE
             AND messages >= 500
-            """,
-            guild_id
-         )
-         return [r["user_id"] for r in rows]
+        """,
+        "nominate": """
+            WITH inserted AS (
+                INSERT INTO nominations
+                (target_id,nominator_id,stage,nominator_role)
+                VALUES ($1,$2,$3,$4)
+                ON CONFLICT DO NOTHING
+                RETURNING nominator_role
+            ), counted AS (
+                -- Upsert locks the counts row and updates its latest version, concurrent nominations queue here
+                INSERT INTO nomination_counts (target_id, stage, apprentices, fellows, moderators)
+                SELECT
+                $1,
+                $3,
+                (nominator_role='apprentice')::INT,
+                (nominator_role='fellow')::INT,
+                (nominator_role='moderator')::INT
+                FROM inserted
+                ON CONFLICT (target_id, stage)
+                DO UPDATE
+                SET apprentices = nomination_counts.apprentices + EXCLUDED.apprentices,
+                    fellows = nomination_counts.fellows + EXCLUDED.fellows,
+                    moderators = nomination_counts.moderators + EXCLUDED.moderators
+                RETURNING apprentices, fellows, moderators
+            )
+            SELECT
+            EXISTS (SELECT 1 FROM inserted) AS inserted,
+            COALESCE(counted.apprentices, 0) AS apprentices,
+            COALESCE(counted.fellows, 0) AS fellows,
+            COALESCE(counted.moderators, 0) AS moderators
+            FROM (VALUES (1)) AS statement
+            LEFT JOIN counted ON TRUE
+        """,
+        "clear_stage": """
+            WITH cleared AS (
+                DELETE FROM nomination_counts
+                WHERE target_id=$1 AND stage=$2
+            )
+            DELETE FROM nominations
+            WHERE target_id=$1 AND stage=$2
+        """,
+    }
 
+    def __init__(self, db: Storage):
+        self.db = db
+        db.register_queries("progression", self.queries)
 
-    async def add_nomination(
-        self,
-        target_id: int,
-        nominator_id: int,
-        stage: str,
-        nominator_role: str,
-    ) -> bool:
+    async def add_messages_bulk(self, guild_id: int, cache: dict[int, int]):
 
-        result = await self.db.pool.execute(
-            """
-            INSERT INTO nominations
-            (target_id,nominator_id,stage,nominator_role)
-            VALUES ($1,$2,$3,$4)
-            ON CONFLICT DO NOTHING
-            """,
-            target_id,
-            nominator_id,
-            stage,
-            nominator_role,
-        )
+        async with self.db.acquire() as conn:
 
-        return result != "INSERT 0 0"
+            for user_id, amount in cache.items():
 
-    async def get_stage_counts(self, target_id: int, stage: str):
+                await self.db.execute("progression.add_messages", guild_id, user_id, amount, connection=conn)
 
-        rows = await self.db.pool.fetch(
-            """
-            SELECT nominator_role
-            FROM nominations
-            WHERE target_id=$1 AND stage=$2
-            """,
-            target_id,
-            stage
-        )
+    async def add_messages_bulkops(self, guild_id: int, cache: dict[int, int]):
 
-        apprentices = 0
-        fellows = 0
-        moderators = 0
+        if not cache:
+            return
 
-        for r in rows:
+        rows = [(guild_id, user_id, amount) for user_id, amount in cache.items()]
+
+        await self.db.executemany("progression.add_messages_many", rows)
+
+    async def add_messages_bulk_unnest(self, guild_id: int, cache: dict[int, int]):
 
-            role = r["nominator_role"]
+        if not cache:
+            return
 
-            if role == "moderator":
-                moderators += 1
-            elif role == "fellow":
-                fellows += 1
-            elif role == "apprentice":
-                apprentices += 1
+        user_ids = list(cache.keys())
+        amounts = list(cache.values())
 
-        return apprentices, fellows, moderators
+        await self.db.execute("progression.add_messages_unnest", guild_id, user_ids, amounts)
 
-    async def get_stage_counts_from_query(self, target_id: int, stage: str):
+    async def add_messages_bulk_daily(self, guild_id: int, cache: dict[tuple[date, int], int]) -> list[tuple[int, int]]:
+        """
+        Adds counts to both lifetime totals in activity and per day buckets in activity_daily, in one statement
+        so the two never drift apart.
+        :param cache: (UTC day message was sent on, user_id) -> messages
+        :return: (user_id, messages) of users whose lifetime count reached 50 or 500 messages with this batch
+        """
+        if not cache:
+            return []
+
+        days = [day for day, _ in cache]
+        user_ids = [user_id for _, user_id in cache]
+        amounts = list(cache.values())
+
+        rows = await self.db.fetch("progression.add_messages_daily_unnest", guild_id, days, user_ids, amounts)
+        return [(r["user_id"], r["messages"]) for r in rows]
+
+    async def add_messages_bulk_copy(self, guild_id: int, cache: dict[int, int]):
+
+        if not cache:
+            return
+
+        # Statements here depend on a temp table that only exists inside the transaction, so they can't be
+        # prepared upfront with the registry
+        async with self.db.acquire() as conn:
+            async with conn.transaction():
+                # Temp table is private to this connection and dropped on commit
+                await conn.execute(
+                    """
+                    CREATE TEMP TABLE activity_increments (
+                        user_id BIGINT NOT NULL,
+                        messages INT NOT NULL
+                    ) ON COMMIT DROP
+                    """
+                )
+                await conn.copy_records_to_table(
+                    "activity_increments",
+                    records=cache.items(),
+                    columns=("user_id", "messages")
+                )
+                await conn.execute(
+                    """
+                    INSERT INTO activity (guild_id, user_id, messages)
+                    SELECT $1, user_id, messages
+                    FROM activity_increments
+                    ON CONFLICT (guild_id, user_id)
+                    DO UPDATE
+                    SET messages = activity.messages + EXCLUDED.messages
+                    """,
+                    guild_id
+                )
+
+
+    async def mark_active(self, guild_id: int, user_id: int):
+        await self.db.execute("progression.mark_active", guild_id, user_id)
+
+    async def mark_active_plus(self, guild_id: int, user_id: int):
+        await self.db.execute("progression.mark_active_plus", guild_id, user_id)
 
-        row = await self.db.pool.fetchrow(
-            """
-            SELECT
-            COUNT(*) FILTER (WHERE nominator_role='apprentice') AS apprentices,
-            COUNT(*) FILTER (WHERE nominator_role='fellow') AS fellows,
-            COUNT(*) FILTER (WHERE nominator_role='moderator') AS moderators
-            FROM nominations
-            WHERE target_id=$1 AND stage=$2
-            """,
-            target_id,
-            stage
-        )
 
-        return row["apprentices"], row["fellows"], row["moderators"]
+    async def get_messages(self, guild_id: int, user_id: int) -> int:
+
+        return await self.db.fetchval("progression.get_messages", guild_id, user_id) or 0
+
+    async def get_recent_activity(self, guild_id: int) -> dict[int, tuple[int, int, int]]:
+        """
+        Messages sent by each user in the last 7, 30 and 90 days (UTC, today included).
+        Users without messages in the last 90 days are left out.
+        :return: user_id -> (last 7 days, last 30 days, last 90 days)
+        """
+        today = datetime.now(timezone.utc).date()
+        rows = await self.db.fetch("progression.get_recent_activity", guild_id, today)
+        return {r["user_id"]: (r["last_7_days"], r["last_30_days"], r["last_90_days"]) for r in rows}
+
+    async def get_non_active_users(self, guild_id: int) -> list[int]:
+        rows = await self.db.fetch("progression.get_non_active_users", guild_id)
+        return [r["user_id"] for r in rows]
+
+    async def get_non_active_plus_users(self, guild_id: int) -> list[int]:
+        rows = await self.db.fetch("progression.get_non_active_plus_users", guild_id)
+        return [r["user_id"] for r in rows]
+
+
+    async def nominate(
+        self,
+        target_id: int,
+        nominator_id: int,
+        stage: str,
+        nominator_role: str,
+    ) -> tuple[bool, tuple[int, int, int]]:
+        """
+        Adds nomination and increments the stage counts in the same statement.
+        Counts are taken from the locked counts row, so they include every nomination added before this one, even
+        by concurrent statements, and none added after it.
+        :return: whether nomination was added (False if it already existed) and stage counts of
+                 (apprentices, fellows, moderators) including it, all 0 if it wasn't added
+        """
+        row = await self.db.fetchrow("progression.nominate", target_id, nominator_id, stage, nominator_role)
+
+        return row["inserted"], (row["apprentices"], row["fellows"], row["moderators"])
 
     async def clear_stage(self, target_id: int, stage: str):
 
-        await self.db.pool.execute(
-            """
-            DELETE FROM nominations
-            WHERE target_id=$1 AND stage=$2
-            """,
-            target_id,
-            stage
-        )
+        await self.db.execute("progression.clear_stage", target_id, stage)
 
 
 class AFKManager:
-    def __init__(self, db: Database):
+    queries = {
+        "get_all": "SELECT * FROM afk_status",
+        "set_afk": """
+            INSERT INTO afk_status (guild_id, user_id, reason, until)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (guild_id, user_id)
+            DO UPDATE SET reason = EXCLUDED.reason,
+                          until = EXCLUDED.until
+        """,
+        "remove_afk": """
+            DELETE FROM afk_status
+            WHERE guild_id = $1 AND user_id = $2
+        """,
+    }
+
+    def __init__(self, db: Storage):
         self.db = db
         self.cache: dict[int, dict[int, dict]] = {}
+        db.register_queries("afk", self.queries)
 
     async def setup(self):
-        await self.db.pool.execute("""
-            CREATE TABLE IF NOT EXISTS afk_status (
-                guild_id BIGINT NOT NULL,
-                user_id  BIGINT NOT NULL,
-                reason   TEXT,
-                until    TIMESTAMPTZ NOT NULL,
-                PRIMARY KEY (guild_id, user_id)
-            )
-        """)
         await self._load_cache()
 
     async def _load_cache(self):
-        rows = await self.db.pool.fetch("SELECT * FROM afk_status")
+        rows = await self.db.fetch("afk.get_all")
         self.cache.clear()
 
         for r in rows:
@@ -302,226 +609,190 @@ class AFKManager:
             "until": until,
         }
 
-        await self.db.pool.execute("""
-            INSERT INTO afk_status (guild_id, user_id, reason, until)
-            VALUES ($1, $2, $3, $4)
-            ON CONFLICT (guild_id, user_id)
-            DO UPDATE SET reason = EXCLUDED.reason,
-                          until = EXCLUDED.until
-        """, guild_id, user_id, reason, until)
+        await self.db.execute("afk.set_afk", guild_id, user_id, reason, until)
 
     async def remove_afk(self, guild_id: int, user_id: int):
         self.cache.get(guild_id, {}).pop(user_id, None)
 
-        await self.db.pool.execute("""
-            DELETE FROM afk_status
-            WHERE guild_id = $1 AND user_id = $2
-        """, guild_id, user_id)
+        await self.db.execute("afk.remove_afk", guild_id, user_id)
 
 
 class PointsManager:
-    def __init__(self, db: Database):
-        self.db = db
-
-    async def setup(self):
-        await self.db.pool.execute(
-            """
-            CREATE TABLE IF NOT EXISTS points (
-                guild_id BIGINT NOT NULL,
-                user_id  BIGINT NOT NULL,
-                points   INTEGER NOT NULL DEFAULT 0,
-                PRIMARY KEY (guild_id, user_id)
-            )
-            """
-        )
-
-    async def add_points(self, guild_id: int, user_id: int, amount: int) -> int:
-        row = await self.db.pool.fetchrow(
-            """
+    queries = {
+        "add_points": """
             INSERT INTO points (guild_id, user_id, points)
             VALUES ($1, $2, $3)
             ON CONFLICT (guild_id, user_id)
             DO UPDATE SET points = points.points + EXCLUDED.points
             RETURNING points
-            """,
-            guild_id,
-            user_id,
-            amount,
-        )
-        return row["points"]
-
-    async def remove_points(self, guild_id: int, user_id: int, amount: int) -> int:
-        row = await self.db.pool.fetchrow(
-            """
+        """,
+        "remove_points": """
             INSERT INTO points (guild_id, user_id, points)
             VALUES ($1, $2, 0)
             ON CONFLICT (guild_id, user_id)
             DO UPDATE
             SET points = GREATEST(points.points - $3, 0)
             RETURNING points
-            """,
-            guild_id,
-            user_id,
-            amount,
-        )
+        """,
+        "get_all": "SELECT guild_id, user_id, points FROM points WHERE points > 0",
+    }
+
+    def __init__(self, db: Storage):
+        """
+        Points are kept in memory as a RankIndex per guild, loaded in setup and updated with totals returned by
+        every write, so leaderboards, ranks and point lookups never query database.
+        :param db: database to use
+        """
+        self.db = db
+        self.ranks: dict[int, RankIndex] = {}
+        db.register_queries("points", self.queries)
+
+    async def setup(self):
+        rows = await self.db.fetch("points.get_all")
+        self.ranks.clear()
+
+        for r in rows:
+            self._get_index(r["guild_id"]).update(r["user_id"], r["points"])
+
+    def _get_index(self, guild_id: int) -> RankIndex:
+        index = self.ranks.get(guild_id)
+        if index is None:
+            index = self.ranks[guild_id] = RankIndex()
+        return index
+
+    async def add_points(self, guild_id: int, user_id: int, amount: int) -> int:
+        row = await self.db.fetchrow("points.add_points", guild_id, user_id, amount)
+        self._get_index(guild_id).update(user_id, row["points"])
+        return row["points"]
+
+    async def remove_points(self, guild_id: int, user_id: int, amount: int) -> int:
+        row = await self.db.fetchrow("points.remove_points", guild_id, user_id, amount)
+        self._get_index(guild_id).update(user_id, row["points"])
         return row["points"]
 
     async def get_points(self, guild_id: int, user_id: int) -> int:
-        return (
-            await self.db.pool.fetchval(
-                "SELECT points FROM points WHERE guild_id = $1 AND user_id = $2",
-                guild_id,
-                user_id,
-            )
-            or 0
-        )
+        return self._get_index(guild_id).score(user_id)
 
     async def get_leaderboard(
         self, guild_id: int, min_points: int = 1, limit: int = 10
     ):
-        rows = await self.db.pool.fetch(
-            """
-            SELECT user_id, points
-            FROM points
-            WHERE guild_id = $1 AND points >= $2
-            ORDER BY points DESC
-            LIMIT $3
-            """,
-            guild_id,
-            min_points,
-            limit,
-        )
-        return [(r["user_id"], r["points"]) for r in rows]
+        return self._get_index(guild_id).top(limit, min_points)
+
+    def get_rank(self, guild_id: int, user_id: int) -> tuple[int | None, int]:
+        """:return: tuple of user rank (None if user has no points) and number of ranked users"""
+        index = self._get_index(guild_id)
+        return index.rank(user_id), len(index)
+
+    def get_neighbours(self, guild_id: int, user_id: int, radius: int = 2) -> list[tuple[int, int, int]]:
+        """:return: list of (rank, user_id, points) tuples around user, including the user"""
+        return self._get_index(guild_id).around(user_id, radius)
 
 
 class RetentionManager:
-    def __init__(self, db: Database):
+    queries = {
+        "add_counts": """
+            INSERT INTO daily_retention (guild_id, date, joins, leaves)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (guild_id, date)
+            DO UPDATE SET joins = daily_retention.joins + EXCLUDED.joins,
+                          leaves = daily_retention.leaves + EXCLUDED.leaves
+        """,
+        "get_day": """
+            SELECT joins, leaves
+            FROM daily_retention
+            WHERE guild_id=$1 AND date=$2
+        """,
+    }
+
+    def __init__(self, db: Storage, flush_interval: float = 5):
+        """
+        Join and leave counts are buffered in memory and written with one upsert per guild and day every
+        flush_interval seconds, so a raid wave doesn't queue hundreds of updates on the same row lock.
+        Days are UTC dates taken when the event happens, reads include counts not yet flushed.
+        :param db: database to use
+        :param flush_interval: seconds to buffer counts for before writing them
+        """
         self.db = db
+        self.flush_interval = flush_interval
+        # (guild_id, date) -> [joins, leaves]
+        self._pending: dict[tuple[int, date], list[int]] = {}
+        # Counts being written right now, still counted by reads until the write finishes
+        self._in_flight: dict[tuple[int, date], list[int]] = {}
+        self._flush_task: asyncio.Task | None = None
+        db.register_queries("retention", self.queries)
+
+    @staticmethod
+    def _today() -> date:
+        return datetime.now(timezone.utc).date()
+
+    def _add(self, guild_id: int, joins: int, leaves: int):
+        counts = self._pending.setdefault((guild_id, self._today()), [0, 0])
+        counts[0] += joins
+        counts[1] += leaves
+
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush retention counts: {e}")
+
+        # Counts that arrived during the flush or failed to write
+        self._flush_task = None
+        if self._pending:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def flush(self):
+        """Writes buffered counts, counts that fail to write are kept for the next flush."""
+        if not self._pending:
+            return
 
-    async def setup(self):
-        await self.db.pool.execute("""
-            CREATE TABLE IF NOT EXISTS daily_retention (
-                guild_id BIGINT NOT NULL,
-                date DATE NOT NULL,
-                joins INTEGER NOT NULL DEFAULT 0,
-                leaves INTEGER NOT NULL DEFAULT 0,
-                PRIMARY KEY (guild_id, date)
+        pending, self._pending = self._pending, {}
+        self._in_flight = pending
+        try:
+            await self.db.executemany(
+                "retention.add_counts",
+                [(guild_id, day, joins, leaves) for (guild_id, day), (joins, leaves) in pending.items()]
             )
-        """)
+        except Exception:
+            for key, (joins, leaves) in pending.items():
+                counts = self._pending.setdefault(key, [0, 0])
+                counts[0] += joins
+                counts[1] += leaves
+            raise
+        finally:
+            self._in_flight = {}
 
     async def add_join(self, guild_id: int):
-        await self.db.pool.execute("""
-            INSERT INTO daily_retention (guild_id, date, joins)
-            VALUES ($1, CURRENT_DATE, 1)
-            ON CONFLICT (guild_id, date)
-            DO UPDATE SET joins = daily_retention.joins + 1
-        """, guild_id)
+        self._add(guild_id, 1, 0)
 
     async def add_leave(self, guild_id: int):
-        await self.db.pool.execute("""
-            INSERT INTO daily_retention (guild_id, date, leaves)
-            VALUES ($1, CURRENT_DATE, 1)
-            ON CONFLICT (guild_id, date)
-            DO UPDATE SET leaves = daily_retention.leaves + 1
-        """, guild_id)
-
-    async def get_today(self, guild_id: int):
-        row = await self.db.pool.fetchrow("""
-            SELECT joins, leaves
-            FROM daily_retention
-            WHERE guild_id=$1 AND date=CURRENT_DATE
-        """, guild_id)
+        self._add(guild_id, 0, 1)
 
-        if not row:
-            return 0, 0
+    async def _get_day(self, guild_id: int, day: date) -> tuple[int, int]:
+        row = await self.db.fetchrow("retention.get_day", guild_id, day)
+        joins, leaves = (row["joins"], row["leaves"]) if row else (0, 0)
 
-        return row["joins"], row["leaves"]
+        for buffer in (self._pending, self._in_flight):
+            pending_joins, pending_leaves = buffer.get((guild_id, day), (0, 0))
+            joins += pending_joins
+            leaves += pending_leaves
 
-    async def get_yesterday(self, guild_id: int):
-        row = await self.db.pool.fetchrow("""
-            SELECT joins, leaves
-            FROM daily_retention
-            WHERE guild_id = $1
-            AND date = (NOW() AT TIME ZONE 'UTC')::DATE - INTERVAL '1 day'
-        """, guild_id)
+        return joins, leaves
 
-        if not row:
-            return 0, 0
+    async def get_today(self, guild_id: int):
+        return await self._get_day(guild_id, self._today())
 
-        return row["joins"], row["leaves"]
+    async def get_yesterday(self, guild_id: int):
+        return await self._get_day(guild_id, self._today() - timedelta(days=1))
 
 
 class TeamManager:
-    def __init__(self, db):
-        self.db = db
-
-    async def setup(self):
-        await self.db.pool.execute("""
-        CREATE TABLE IF NOT EXISTS teams (
-            team_id SERIAL PRIMARY KEY,
-            guild_id BIGINT NOT NULL,
-            name TEXT NOT NULL,
-            description TEXT,
-            timezone TEXT,
-            role_id BIGINT NOT NULL,
-            category_id BIGINT NOT NULL,
-            text_channel_id BIGINT NOT NULL,
-            voice_channel_id BIGINT NOT NULL,
-            leader_id BIGINT NOT NULL
-        )
-        """)
-
-        await self.db.pool.execute("""
-        CREATE TABLE IF NOT EXISTS team_invites (
-            invite_id BIGINT PRIMARY KEY,
-            team_id INT,
-            inviter_id BIGINT,
-            invitee_id BIGINT,
-            guild_id BIGINT NOT NULL,
-            status TEXT DEFAULT 'pending',
-            created_at TIMESTAMPTZ DEFAULT NOW()
-        )
-        """)
-
-        await self.db.pool.execute("""
-        CREATE TABLE IF NOT EXISTS team_members (
-            team_id INT NOT NULL,
-            guild_id BIGINT NOT NULL,
-            user_id BIGINT NOT NULL,
-            joined_at TIMESTAMPTZ DEFAULT NOW(),
-            PRIMARY KEY (team_id, user_id)
-        )
-        """)
-
-        await self.db.pool.execute("""
-        CREATE UNIQUE INDEX IF NOT EXISTS one_team_per_user
-        ON team_members (guild_id, user_id)
-        """)
-
-        await self.db.pool.execute("""
-        CREATE TABLE IF NOT EXISTS team_setup_invites (
-            invite_id BIGINT PRIMARY KEY,
-            guild_id BIGINT NOT NULL,
-            user_id BIGINT NOT NULL,
-            status TEXT DEFAULT 'pending',
-            created_at TIMESTAMPTZ DEFAULT NOW()
-        )
-        """)
-        await self.db.pool.execute("""
-            CREATE TABLE IF NOT EXISTS team_join_requests (
-                request_id SERIAL PRIMARY KEY,
-                guild_id BIGINT NOT NULL,
-                team_id INT NOT NULL,
-                user_id BIGINT NOT NULL,
-                status TEXT DEFAULT 'pending',
-                reason TEXT DEFAULT 'Reason not stated',
-                created_at TIMESTAMPTZ DEFAULT NOW()
-            )
-            """)
-
-
-    async def create_team(self, *args):
-        row = await self.db.pool.fetchrow("""
+    queries = {
+        "create_team": """
             INSERT INTO teams (
                 guild_id, name, description, timezone,
                 role_id, category_id, text_channel_id,
@@ -529,197 +800,299 @@ class TeamManager:
             )
             VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9)
             RETURNING team_id
-        """, *args)
+        """,
+        "get_team": """
+            SELECT * FROM teams
+            WHERE team_id=$1
+        """,
+        "delete_team": """
+            DELETE FROM teams
+            WHERE guild_id=$1 AND role_id=$2
+            RETURNING *
+        """,
+        "get_team_by_leader": """
+            SELECT * FROM teams
+            WHERE guild_id=$1 AND leader_id=$2
+        """,
+        "count_invites_today": """
+            SELECT COUNT(*)
+            FROM team_invites
+            WHERE team_id=$1
+            AND inviter_id=$2
+            AND created_at >= (NOW() AT TIME ZONE 'UTC')::DATE
+        """,
+        "create_invite": """
+            INSERT INTO team_invites (invite_id, team_id, inviter_id, invitee_id, guild_id)
+            VALUES ($1,$2,$3,$4,$5)
+            ON CONFLICT (team_id, invitee_id) WHERE status='pending' DO NOTHING
+            RETURNING invite_id
+        """,
+        "get_invite": "SELECT * FROM team_invites WHERE invite_id=$1",
+        "update_invite_status": """
+            UPDATE team_invites
+            SET status=$2
+            WHERE invite_id=$1
+        """,
+        "add_member": """
+            INSERT INTO team_members (team_id, guild_id, user_id)
+            VALUES ($1,$2,$3)
+        """,
+        "remove_member": """
+            DELETE FROM team_members
+            WHERE team_id=$1 AND user_id=$2
+            RETURNING guild_id
+        """,
+        "get_user_team": """
+            SELECT * FROM team_members
+            WHERE guild_id=$1 AND user_id=$2
+        """,
+        "has_pending_invite_for_team": """
+            SELECT 1
+            FROM team_invites
+            WHERE team_id=$1
+            AND invitee_id=$2
+            AND status='pending'
+            LIMIT 1
+        """,
+        "leader_has_team": """
+            SELECT 1 FROM teams
+            WHERE guild_id=$1 AND leader_id=$2
+        """,
+        "create_setup_invite": """
+            INSERT INTO team_setup_invites (invite_id, guild_id, user_id)
+            VALUES ($1,$2,$3)
+        """,
+        "get_setup_invite": "SELECT * FROM team_setup_invites WHERE invite_id=$1",
+        "update_setup_invite": "UPDATE team_setup_invites SET status=$2 WHERE invite_id=$1",
+        "get_setup_invite_by_user": """
+            SELECT * FROM team_setup_invites
+            WHERE guild_id=$1 AND user_id=$2 AND status='pending'
+            LIMIT 1
+        """,
+        "get_all_teams": """
+            SELECT *
+            FROM teams
+            WHERE guild_id=$1
+            ORDER BY team_id DESC
+        """,
+        "get_all_teams_with_member_counts": """
+            SELECT teams.*, COUNT(team_members.user_id) AS member_count
+            FROM teams
+            LEFT JOIN team_members ON team_members.team_id = teams.team_id
+            WHERE teams.guild_id=$1
+            GROUP BY teams.team_id
+            ORDER BY teams.team_id DESC
+        """,
+        "get_team_members": """
+            SELECT user_id
+            FROM team_members
+            WHERE team_id=$1
+        """,
+        "create_join_request": """
+            INSERT INTO team_join_requests (guild_id, team_id, user_id, reason)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (team_id, user_id) WHERE status='pending' DO NOTHING
+            RETURNING request_id
+        """,
+        "get_pending_request": """
+            SELECT * FROM team_join_requests
+            WHERE team_id=$1 AND user_id=$2 AND status='pending'
+        """,
+        "update_request_status": """
+            UPDATE team_join_requests
+            SET status=$3
+            WHERE team_id=$1 AND user_id=$2 AND status='pending'
+        """,
+    }
+
+    def __init__(self, db: Storage):
+        """
+        Teams, members, invites and join requests.
+        Teams, user memberships and member lists are cached in memory since team interactions look them up
+        several times each. Every method that changes them invalidates the affected entries so this process,
+        which is the only writer, never reads stale data. Missing rows are cached too (user without team).
+        :param db: database to use
+        """
+        self.db = db
+        db.register_queries("team", self.queries)
+        self._teams: dict[int, asyncpg.Record | None] = {}
+        self._user_teams: dict[tuple[int, int], asyncpg.Record | None] = {}
+        self._team_members: dict[int, list[asyncpg.Record]] = {}
+        # Bumped on every invalidation so reads that raced with a write don't cache what they fetched
+        self._generation = 0
+        self.cache_lookups = db.metrics.counter(
+            "tortoise_team_cache_lookups_total",
+            "Team cache lookups by cache and result.",
+            ("cache", "result")
+        )
+
+    def _cache_get(self, name: str, cache: dict, key):
+        """Returns (found, value) and counts the lookup."""
+        found = key in cache
+        self.cache_lookups.inc(cache=name, result="hit" if found else "miss")
+        return found, cache.get(key)
+
+    def _cache_set(self, cache: dict, key, value, generation: int):
+        if generation == self._generation:
+            cache[key] = value
+
+    def _invalidate_team(self, team_id: int):
+        self._generation += 1
+        self._teams.pop(team_id, None)
+        self._team_members.pop(team_id, None)
+        for key, membership in list(self._user_teams.items()):
+            if membership is not None and membership["team_id"] == team_id:
+                del self._user_teams[key]
+
+    def _invalidate_membership(self, team_id: int, guild_id: int, user_id: int):
+        self._generation += 1
+        self._team_members.pop(team_id, None)
+        self._user_teams.pop((guild_id, user_id), None)
 
+    async def create_team(self, *args):
+        row = await self.db.fetchrow("team.create_team", *args)
+
+        self._invalidate_team(row["team_id"])
         return row["team_id"]
 
     async def get_team(self, team_id):
-        return await self.db.pool.fetchrow("""
-        SELECT * FROM teams
-        WHERE team_id=$1
-        """, team_id)
+        found, team = self._cache_get("team", self._teams, team_id)
+        if not found:
+            generation = self._generation
+            team = await self.db.fetchrow("team.get_team", team_id)
+            self._cache_set(self._teams, team_id, team, generation)
+        return team
 
     async def delete_team(self, guild_id, role_id):
-        return await self.db.pool.fetchrow("""
-        DELETE FROM teams
-        WHERE guild_id=$1 AND role_id=$2
-        RETURNING *
-        """, guild_id, role_id)
+        team = await self.db.fetchrow("team.delete_team", guild_id, role_id)
+
+        if team is not None:
+            self._invalidate_team(team["team_id"])
+        return team
 
     async def get_team_by_leader(self, guild_id, leader_id):
-        return await self.db.pool.fetchrow("""
-        SELECT * FROM teams
-        WHERE guild_id=$1 AND leader_id=$2
-        """, guild_id, leader_id)
+        return await self.db.fetchrow("team.get_team_by_leader", guild_id, leader_id)
 
     async def can_invite(self, team_id, inviter_id):
-        count = await self.db.pool.fetchval("""
-        SELECT COUNT(*)
-        FROM team_invites
-        WHERE team_id=$1
-        AND inviter_id=$2
-        AND created_at >= (NOW() AT TIME ZONE 'UTC')::DATE
-        """, team_id, inviter_id)
+        count = await self.db.fetchval("team.count_invites_today", team_id, inviter_id)
 
         return count < 3
 
-    async def create_invite(self, invite_id, team_id, inviter_id, invitee_id, guild_id):
-        await self.db.pool.execute("""
-        INSERT INTO team_invites (invite_id, team_id, inviter_id, invitee_id, guild_id)
-        VALUES ($1,$2,$3,$4,$5)
-        """, invite_id, team_id, inviter_id, invitee_id, guild_id)
+    async def create_invite(self, invite_id, team_id, inviter_id, invitee_id, guild_id) -> bool:
+        """:return: False if invitee already has a pending invite for this team"""
+        created = await self.db.fetchval("team.create_invite", invite_id, team_id, inviter_id, invitee_id, guild_id)
+        return created is not None
 
     async def get_invite(self, invite_id):
-        return await self.db.pool.fetchrow("""
-        SELECT * FROM team_invites WHERE invite_id=$1
-        """, invite_id)
+        return await self.db.fetchrow("team.get_invite", invite_id)
 
     async def update_invite_status(self, invite_id, status):
-        await self.db.pool.execute("""
-        UPDATE team_invites
-        SET status=$2
-        WHERE invite_id=$1
-        """, invite_id, status)
+        await self.db.execute("team.update_invite_status", invite_id, status)
 
     async def add_member(self, team_id: int, guild_id: int, user_id: int) -> bool:
         try:
-            await self.db.pool.execute("""
-                INSERT INTO team_members (team_id, guild_id, user_id)
-                VALUES ($1,$2,$3)
-            """, team_id, guild_id, user_id)
+            await self.db.execute("team.add_member", team_id, guild_id, user_id)
             return True
         except Exception:
             return False
+        finally:
+            self._invalidate_membership(team_id, guild_id, user_id)
 
     async def remove_member(self, team_id: int, user_id: int):
-        await self.db.pool.execute("""
-            DELETE FROM team_members
-            WHERE team_id=$1 AND user_id=$2
-        """, team_id, user_id)
+        guild_id = await self.db.fetchval("team.remove_member", team_id, user_id)
+
+        if guild_id is not None:
+            self._invalidate_membership(team_id, guild_id, user_id)
 
     async def get_user_team(self, guild_id: int, user_id: int):
-        return await self.db.pool.fetchrow("""
-            SELECT * FROM team_members
-            WHERE guild_id=$1 AND user_id=$2
-        """, guild_id, user_id)
+        found, membership = self._cache_get("user_team", self._user_teams, (guild_id, user_id))
+        if not found:
+            generation = self._generation
+            membership = await self.db.fetchrow("team.get_user_team", guild_id, user_id)
+            self._cache_set(self._user_teams, (guild_id, user_id), membership, generation)
+        return membership
 
     async def is_member(self, team_id: int, user_id: int):
-        return await self.db.pool.fetchval("""
-            SELECT 1 FROM team_members
-            WHERE team_id=$1 AND user_id=$2
-        """, team_id, user_id)
+        members = await self.get_team_members(team_id)
+        return 1 if any(member["user_id"] == user_id for member in members) else None
 
     async def has_pending_invite_for_team(self, team_id: int, invitee_id: int) -> bool:
-        return await self.db.pool.fetchval("""
-            SELECT 1
-            FROM team_invites
-            WHERE team_id=$1
-            AND invitee_id=$2
-            AND status='pending'
-            LIMIT 1
-        """, team_id, invitee_id) is not None
+        return await self.db.fetchval("team.has_pending_invite_for_team", team_id, invitee_id) is not None
 
     async def leader_has_team(self, guild_id: int, leader_id: int) -> bool:
-        return await self.db.pool.fetchval("""
-            SELECT 1 FROM teams
-            WHERE guild_id=$1 AND leader_id=$2
-        """, guild_id, leader_id) is not None
+        return await self.db.fetchval("team.leader_has_team", guild_id, leader_id) is not None
 
     async def create_setup_invite(self, invite_id, guild_id, user_id):
-        await self.db.pool.execute("""
-        INSERT INTO team_setup_invites (invite_id, guild_id, user_id)
-        VALUES ($1,$2,$3)
-        """, invite_id, guild_id, user_id)
+        await self.db.execute("team.create_setup_invite", invite_id, guild_id, user_id)
 
     async def get_setup_invite(self, invite_id):
-        return await self.db.pool.fetchrow("""
-        SELECT * FROM team_setup_invites WHERE invite_id=$1
-        """, invite_id)
+        return await self.db.fetchrow("team.get_setup_invite", invite_id)
 
     async def update_setup_invite(self, invite_id, status):
-        await self.db.pool.execute("""
-        UPDATE team_setup_invites SET status=$2 WHERE invite_id=$1
-        """, invite_id, status)
+        await self.db.execute("team.update_setup_invite", invite_id, status)
 
     async def get_setup_invite_by_user(self, guild_id: int, user_id: int):
-        return await self.db.pool.fetchrow("""
-            SELECT * FROM team_setup_invites
-            WHERE guild_id=$1 AND user_id=$2 AND status='pending'
-            LIMIT 1
-        """, guild_id, user_id)
+        return await self.db.fetchrow("team.get_setup_invite_by_user", guild_id, user_id)
 
     async def get_all_teams(self, guild_id: int):
-        return await self.db.pool.fetch("""
-            SELECT *
-            FROM teams
-            WHERE guild_id=$1
-            ORDER BY team_id DESC
-        """, guild_id)
+        return await self.db.fetch("team.get_all_teams", guild_id)
+
+    async def get_all_teams_with_member_counts(self, guild_id: int):
+        """Same as get_all_teams with member_count column added, counted in the same query."""
+        return await self.db.fetch("team.get_all_teams_with_member_counts", guild_id)
 
     async def get_team_members(self, team_id: int):
-        return await self.db.pool.fetch("""
-            SELECT user_id
-            FROM team_members
-            WHERE team_id=$1
-        """, team_id)
+        found, members = self._cache_get("team_members", self._team_members, team_id)
+        if not found:
+            generation = self._generation
+            members = await self.db.fetch("team.get_team_members", team_id)
+            self._cache_set(self._team_members, team_id, members, generation)
+        return members
 
     async def create_join_request(self, guild_id: int, team_id: int, user_id: int, reason: str = None) -> bool:
-        existing = await self.db.pool.fetchval("""
-            SELECT 1 FROM team_join_requests 
-            WHERE team_id=$1 AND user_id=$2 AND status='pending'
-        """, team_id, user_id)
-
-        if existing:
-            return False
-
-        await self.db.pool.execute("""
-            INSERT INTO team_join_requests (guild_id, team_id, user_id, reason)
-            VALUES ($1, $2, $3, $4)
-        """, guild_id, team_id, user_id, reason)
-        return True
+        """:return: False if user already has a pending request for this team"""
+        created = await self.db.fetchval("team.create_join_request", guild_id, team_id, user_id, reason)
+        return created is not None
 
     async def get_pending_request(self, team_id: int, user_id: int):
-        return await self.db.pool.fetchrow("""
-            SELECT * FROM team_join_requests 
-            WHERE team_id=$1 AND user_id=$2 AND status='pending'
-        """, team_id, user_id)
+        return await self.db.fetchrow("team.get_pending_request", team_id, user_id)
 
     async def update_request_status(self, team_id: int, user_id: int, status: str):
-        await self.db.pool.execute("""
-            UPDATE team_join_requests 
-            SET status=$3 
-            WHERE team_id=$1 AND user_id=$2 AND status='pending'
-        """, team_id, user_id, status)
+        await self.db.execute("team.update_request_status", team_id, user_id, status)
 
 class GiveawayManager:
-    def __init__(self, db):
-        self.db = db
-
-    async def setup(self):
-        await self.db.pool.execute("""
-        CREATE TABLE IF NOT EXISTS giveaways (
-            message_id BIGINT PRIMARY KEY,
-            guild_id BIGINT NOT NULL,
-            channel_id BIGINT NOT NULL,
-            host_id BIGINT NOT NULL,
-            name TEXT NOT NULL,
-            description TEXT,
-            prizes TEXT NOT NULL,
-            questions JSONB NOT NULL DEFAULT '[]'::jsonb,
-            winners INTEGER NOT NULL DEFAULT 10,
-            ends_at TIMESTAMPTZ NOT NULL,
-            ended BOOLEAN NOT NULL DEFAULT FALSE,
-            winner_ids BIGINT[] NOT NULL DEFAULT '{}'
-        )
-        """)
+    queries = {
+        "create_giveaway": """
+            INSERT INTO giveaways (
+                message_id, guild_id, channel_id, host_id,
+                name, description, prizes, questions,
+                winners, ends_at
+            ) VALUES (
+                $1,$2,$3,$4,$5,$6,$7,$8::jsonb,$9,$10
+            )
+        """,
+        "get_active": "SELECT * FROM giveaways WHERE message_id=$1 AND ended=FALSE",
+        "get_pending": "SELECT * FROM giveaways WHERE ended=FALSE ORDER BY ends_at ASC",
+        "enter": """
+            INSERT INTO giveaway_entries (message_id, user_id)
+            VALUES ($1,$2)
+            ON CONFLICT DO NOTHING
+        """,
+        "get_entries": "SELECT user_id FROM giveaway_entries WHERE message_id=$1",
+        "get_entry_count": "SELECT COUNT(*) FROM giveaway_entries WHERE message_id=$1",
+        "finish": """
+            UPDATE giveaways
+            SET ended=TRUE, winner_ids=$2
+            WHERE message_id=$1
+        """,
+        "get_giveaway": "SELECT * FROM giveaways WHERE message_id=$1",
+        "delete_entries": "DELETE FROM giveaway_entries WHERE message_id=$1",
+        "delete_giveaway": "DELETE FROM giveaways WHERE message_id=$1",
+    }
 
-        await self.db.pool.execute("""
-        CREATE TABLE IF NOT EXISTS giveaway_entries (
-            message_id BIGINT NOT NULL,
-            user_id BIGINT NOT NULL,
-            PRIMARY KEY (message_id, user_id)
-        )
-        """)
+    def __init__(self, db: Storage):
+        self.db = db
+        db.register_queries("giveaway", self.queries)
 
     async def create_giveaway(
         self,
@@ -734,112 +1107,242 @@ class GiveawayManager:
         winners: int,
         ends_at,
     ):
-        await self.db.pool.execute("""
-        INSERT INTO giveaways (
+        await self.db.execute(
+            "giveaway.create_giveaway",
             message_id, guild_id, channel_id, host_id,
-            name, description, prizes, questions,
+            name, description, prizes, questions_json,
             winners, ends_at
-        ) VALUES (
-            $1,$2,$3,$4,$5,$6,$7,$8::jsonb,$9,$10
         )
-        """,
-        message_id, guild_id, channel_id, host_id,
-        name, description, prizes, questions_json,
-        winners, ends_at)
 
     async def get_active(self, message_id: int):
-        return await self.db.pool.fetchrow(
-            "SELECT * FROM giveaways WHERE message_id=$1 AND ended=FALSE",
-            message_id,
-        )
+        return await self.db.fetchrow("giveaway.get_active", message_id)
 
     async def get_pending(self):
-        return await self.db.pool.fetch(
-            "SELECT * FROM giveaways WHERE ended=FALSE ORDER BY ends_at ASC"
-        )
+        return await self.db.fetch("giveaway.get_pending")
 
     async def enter(self, message_id: int, user_id: int) -> bool:
-        result = await self.db.pool.execute("""
-        INSERT INTO giveaway_entries (message_id, user_id)
-        VALUES ($1,$2)
-        ON CONFLICT DO NOTHING
-        """, message_id, user_id)
+        result = await self.db.execute("giveaway.enter", message_id, user_id)
         return result != "INSERT 0 0"
 
     async def get_entries(self, message_id: int):
-        rows = await self.db.pool.fetch(
-            "SELECT user_id FROM giveaway_entries WHERE message_id=$1",
-            message_id,
-        )
+        rows = await self.db.fetch("giveaway.get_entries", message_id)
         return [r['user_id'] for r in rows]
 
     async def get_entry_count(self, message_id: int) -> int:
-        return await self.db.pool.fetchval(
-            "SELECT COUNT(*) FROM giveaway_entries WHERE message_id=$1",
-            message_id,
-        ) or 0
+        return await self.db.fetchval("giveaway.get_entry_count", message_id) or 0
 
     async def finish(self, message_id: int, winner_ids: list[int]):
-        await self.db.pool.execute("""
-        UPDATE giveaways
-        SET ended=TRUE, winner_ids=$2
-        WHERE message_id=$1
-        """, message_id, winner_ids)
+        await self.db.execute("giveaway.finish", message_id, winner_ids)
 
     async def get_giveaway(self, message_id: int):
-        return await self.db.pool.fetchrow(
-            "SELECT * FROM giveaways WHERE message_id=$1",
-            message_id,
-        )
+        return await self.db.fetchrow("giveaway.get_giveaway", message_id)
 
     async def delete_giveaway(self, message_id: int):
-        await self.db.pool.execute(
-            "DELETE FROM giveaway_entries WHERE message_id=$1",
-            message_id,
-        )
-        await self.db.pool.execute(
-            "DELETE FROM giveaways WHERE message_id=$1",
-            message_id,
-        )
+        await self.db.execute("giveaway.delete_entries", message_id)
+        await self.db.execute("giveaway.delete_giveaway", message_id)
 
 class DutyManager:
-    def __init__(self, db: Database):
-        self.db = db
-
-    async def setup(self):
-        await self.db.pool.execute(
-            """
-            CREATE TABLE IF NOT EXISTS duty_schedules (
-                guild_id BIGINT NOT NULL,
-                user_id BIGINT NOT NULL,
-                start_time TEXT NOT NULL,
-                end_time TEXT NOT NULL,
-                timezone TEXT NOT NULL,
-                PRIMARY KEY (guild_id, user_id)
-            )
-            """
-        )
-
-    async def set_schedule(self, guild_id: int, user_id: int, start: str, end: str, tz: str):
-        await self.db.pool.execute(
-            """
+    queries = {
+        "set_schedule": """
             INSERT INTO duty_schedules (guild_id, user_id, start_time, end_time, timezone)
             VALUES ($1, $2, $3, $4, $5)
             ON CONFLICT (guild_id, user_id)
-            DO UPDATE SET 
+            DO UPDATE SET
                 start_time = EXCLUDED.start_time,
                 end_time = EXCLUDED.end_time,
                 timezone = EXCLUDED.timezone
-            """,
-            guild_id, user_id, start, end, tz
-        )
+        """,
+        "remove_schedule": "DELETE FROM duty_schedules WHERE guild_id = $1 AND user_id = $2",
+        "get_all_schedules": "SELECT * FROM duty_schedules",
+    }
+
+    def __init__(self, db: Storage):
+        self.db = db
+        db.register_queries("duty", self.queries)
+
+    async def set_schedule(self, guild_id: int, user_id: int, start: str, end: str, tz: str):
+        await self.db.execute("duty.set_schedule", guild_id, user_id, start, end, tz)
 
     async def remove_schedule(self, guild_id: int, user_id: int):
-        await self.db.pool.execute(
-            "DELETE FROM duty_schedules WHERE guild_id = $1 AND user_id = $2",
-            guild_id, user_id
-        )
+        await self.db.execute("duty.remove_schedule", guild_id, user_id)
 
     async def get_all_schedules(self):
-        return await self.db.pool.fetch("SELECT * FROM duty_schedules")
+        return await self.db.fetch("duty.get_all_schedules")
+
 
+class StateManager:
+    queries = {
+        "get": "SELECT value FROM bot_state WHERE key = $1",
+        "set": """
+            INSERT INTO bot_state (key, value)
+            VALUES ($1, $2)
+            ON CONFLICT (key)
+            DO UPDATE SET value = EXCLUDED.value, updated_at = NOW()
+        """,
+    }
+
+    def __init__(self, db: Storage):
+        self.db = db
+        db.register_queries("state", self.queries)
+
+    async def get(self, key: str) -> str | None:
+        return await self.db.fetchval("state.get", key)
+
+    async def set(self, key: str, value: str):
+        await self.db.execute("state.set", key, value)
+
+class ArchiveManager:
+    queries = {
+        "team_invites": """
+            WITH moved AS (
+                DELETE FROM team_invites
+                WHERE ctid = ANY(ARRAY(
+                    SELECT ctid FROM team_invites
+                    WHERE status <> 'pending' AND created_at < $1
+                    ORDER BY created_at
+                    LIMIT $2
+                    FOR UPDATE SKIP LOCKED
+                ))
+                RETURNING *
+            ), archived AS (
+                INSERT INTO team_invites_archive SELECT * FROM moved
+                RETURNING 1
+            )
+            SELECT COUNT(*) FROM archived
+        """,
+        "team_setup_invites": """
+            WITH moved AS (
+                DELETE FROM team_setup_invites
+                WHERE ctid = ANY(ARRAY(
+                    SELECT ctid FROM team_setup_invites
+                    WHERE status <> 'pending' AND created_at < $1
+                    ORDER BY created_at
+                    LIMIT $2
+                    FOR UPDATE SKIP LOCKED
+                ))
+                RETURNING *
+            ), archived AS (
+                INSERT INTO team_setup_invites_archive SELECT * FROM moved
+                RETURNING 1
+            )
+            SELECT COUNT(*) FROM archived
+        """,
+        "team_join_requests": """
+            WITH moved AS (
+                DELETE FROM team_join_requests
+                WHERE ctid = ANY(ARRAY(
+                    SELECT ctid FROM team_join_requests
+                    WHERE status <> 'pending' AND created_at < $1
+                    ORDER BY created_at
+                    LIMIT $2
+                    FOR UPDATE SKIP LOCKED
+                ))
+                RETURNING *
+            ), archived AS (
+                INSERT INTO team_join_requests_archive SELECT * FROM moved
+                RETURNING 1
+            )
+            SELECT COUNT(*) FROM archived
+        """,
+        "giveaways": """
+            WITH moved AS (
+                DELETE FROM giveaways
+                WHERE ctid = ANY(ARRAY(
+                    SELECT ctid FROM giveaways
+                    WHERE ended AND ends_at < $1
+                    ORDER BY ends_at
+                    LIMIT $2
+                    FOR UPDATE SKIP LOCKED
+                ))
+                RETURNING *
+            ), archived AS (
+                INSERT INTO giveaways_archive
+                SELECT moved.*, (SELECT COUNT(*) FROM giveaway_entries WHERE message_id = moved.message_id)
+                FROM moved
+                RETURNING 1
+            )
+            SELECT COUNT(*) FROM archived
+        """,
+        "giveaway_entries": """
+            WITH deleted AS (
+                DELETE FROM giveaway_entries
+                WHERE ctid = ANY(ARRAY(
+                    SELECT giveaway_entries.ctid
+                    FROM giveaway_entries
+                    JOIN giveaways_archive USING (message_id)
+                    WHERE giveaways_archive.ends_at < $1
+                    ORDER BY giveaways_archive.ends_at
+                    LIMIT $2
+                    FOR UPDATE OF giveaway_entries SKIP LOCKED
+                ))
+                RETURNING 1
+            )
+            SELECT COUNT(*) FROM deleted
+        """,
+        "activity_daily": """
+            WITH deleted AS (
+                DELETE FROM activity_daily
+                WHERE ctid = ANY(ARRAY(
+                    SELECT ctid FROM activity_daily
+                    WHERE day < ($1::TIMESTAMPTZ AT TIME ZONE 'UTC')::DATE
+                    ORDER BY day
+                    LIMIT $2
+                    FOR UPDATE SKIP LOCKED
+                ))
+                RETURNING 1
+            )
+            SELECT COUNT(*) FROM deleted
+        """,
+    }
+    # Table -> days rows are kept for once resolved, tables are archived in this order.
+    # Nominations are left alone, they have no resolved state (promotion deletes them) so every row is a live vote.
+    # Giveaway entries are deleted once their giveaway is archived, its row keeps the entry count.
+    # Daily activity is deleted, nothing reads further back than the 90 day window.
+    retention_days = {
+        "team_invites": 30,
+        "team_setup_invites": 30,
+        "team_join_requests": 30,
+        "giveaways": 90,
+        "giveaway_entries": 90,
+        "activity_daily": 120,
+    }
+
+    def __init__(self, db: Storage, batch_size: int = 500, batch_delay: float = 0.5):
+        """
+        Moves resolved rows past their retention out of history tables into <table>_archive tables, so tables
+        that are looked up by status don't grow forever. Batches take the oldest rows first through an index on
+        the age column, so each one reads only the rows it moves.
+        Each batch is its own short statement and rows locked by live queries are skipped until the next run,
+        the job never makes interactions wait on it for longer than one batch.
+        :param db: database to use
+        :param batch_size: most rows moved by one statement
+        :param batch_delay: seconds to wait between batches of the same table
+        """
+        self.db = db
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.archived_rows = db.metrics.counter(
+            "tortoise_archived_rows_total",
+            "Rows moved out of history tables by the archive job.",
+            ("table",)
+        )
+        db.register_queries("archive", self.queries)
+
+    async def archive_table(self, table: str, cutoff: datetime) -> int:
+        """Archives rows of table resolved before cutoff, returns how many were moved."""
+        moved = 0
+        while True:
+            batch = await self.db.fetchval(f"archive.{table}", cutoff, self.batch_size)
+            moved += batch
+            self.archived_rows.inc(batch, table=table)
+            if batch < self.batch_size:
+                return moved
+            await asyncio.sleep(self.batch_delay)
+
+    async def run(self) -> dict[str, int]:
+        """:return: table -> number of rows moved"""
+        now = datetime.now(timezone.utc)
+        moved = {}
+        for table, days in self.retention_days.items():
+            moved[table] = await self.archive_table(table, now - timedelta(days=days))
+        return moved
@@ -0,0 +1,706 @@
+from __future__ import annotations
+
+import asyncio
+from types import MappingProxyType
+from typing import Any, Callable, Optional, AsyncIterator
+from datetime import date, datetime, timezone
+from contextlib import asynccontextmanager
+
+import asyncpg
+
+from bot.manager import Storage
+from bot.utils.metrics import MetricsRegistry
+
+
+# Query name -> function implementing it, takes query arguments and returns (rows, status)
+HANDLERS: dict[str, Callable] = {}
+
+
+def handles(*names: str):
+    def decorator(function: Callable) -> Callable:
+        for name in names:
+            HANDLERS[name] = function
+        return function
+    return decorator
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class UnsupportedOperation(RuntimeError):
+    """Raised for operations MemoryDatabase deliberately doesn't support, they need Postgres."""
+
+
+class MemoryConnection:
+    def __getattr__(self, item):
+        raise UnsupportedOperation(
+            f"MemoryDatabase only runs registered queries, connection.{item} needs Postgres."
+        )
+
+
+class MemoryDatabase(Storage):
+    def __init__(self, metrics: MetricsRegistry | None = None):
+        """
+        Storage that keeps every table in dicts, for running cogs and benchmarks without Postgres.
+        Each registered query has a Python implementation below with the same semantics as its SQL: same rows,
+        defaults, conflict handling, unique violations and command status. Registering a query without an
+        implementation fails right away so new queries can't silently diverge.
+        Data lives only as long as the process, raw connection access (COPY, transactions) raises UnsupportedOperation.
+        :param metrics: registry to export query metrics to, a private one is used if not passed
+        """
+        super().__init__(metrics)
+        self.tables: dict[str, dict] = {
+            "activity": {},
+            "activity_daily": {},
+            "nominations": {},
+            "nomination_counts": {},
+            "afk_status": {},
+            "points": {},
+            "daily_retention": {},
+            "teams": {},
+            "team_invites": {},
+            "team_members": {},
+            "team_setup_invites": {},
+            "team_join_requests": {},
+            "giveaways": {},
+            "giveaway_entries": {},
+            "duty_schedules": {},
+            "bot_state": {},
+            "team_invites_archive": {},
+            "team_setup_invites_archive": {},
+            "team_join_requests_archive": {},
+            "giveaways_archive": {},
+        }
+        self.sequences = {"teams": 0, "team_join_requests": 0}
+
+    def register_queries(self, namespace: str, queries: dict[str, str]):
+        missing = [name for name in queries if f"{namespace}.{name}" not in HANDLERS]
+        if missing:
+            raise UnsupportedOperation(f"MemoryDatabase has no implementation for {namespace} queries {missing}")
+        super().register_queries(namespace, queries)
+
+    async def connect(self):
+        pass
+
+    async def close(self, timeout: float = 10):
+        pass
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[MemoryConnection]:
+        yield MemoryConnection()
+
+    def get_pool_stats(self) -> dict[str, int]:
+        return {}
+
+    async def _execute(self, name: str, method: str, args: tuple, connection):
+        if name not in self.queries:
+            raise KeyError(f"Query {name} is not registered.")
+
+        handler = HANDLERS[name]
+        # Yield to the loop like a real round trip would, so callers interleave the same way
+        await asyncio.sleep(0)
+
+        if method == "executemany":
+            for arguments in args[0]:
+                handler(self, *arguments)
+            return None
+
+        rows, status = handler(self, *args)
+        rows = [MappingProxyType(dict(row)) for row in rows]
+
+        if method == "execute":
+            return status
+        if method == "fetch":
+            return rows
+        if method == "fetchrow":
+            return rows[0] if rows else None
+        # fetchval
+        return next(iter(rows[0].values())) if rows else None
+
+    def _next_id(self, table: str) -> int:
+        self.sequences[table] += 1
+        return self.sequences[table]
+
+    @staticmethod
+    def _unique_violation(constraint: str):
+        return asyncpg.exceptions.UniqueViolationError(f'duplicate key value violates unique constraint "{constraint}"')
+
+    # Progression
+
+    @handles("progression.add_messages", "progression.add_messages_many")
+    def _add_messages(self, guild_id: int, user_id: int, messages: int):
+        row = self.tables["activity"].get((guild_id, user_id))
+        if row is None:
+            self.tables["activity"][(guild_id, user_id)] = {
+                "guild_id": guild_id, "user_id": user_id, "messages": messages, "active": False, "active_plus": False
+            }
+        else:
+            row["messages"] += messages
+        return [], "INSERT 0 1"
+
+    @handles("progression.add_messages_unnest")
+    def _add_messages_unnest(self, guild_id: int, user_ids: list[int], amounts: list[int]):
+        for user_id, messages in zip(user_ids, amounts):
+            self._add_messages(guild_id, user_id, messages)
+        return [], f"INSERT 0 {min(len(user_ids), len(amounts))}"
+
+    @handles("progression.add_messages_daily_unnest")
+    def _add_messages_daily_unnest(self, guild_id: int, days: list[date], user_ids: list[int], amounts: list[int]):
+        totals: dict[int, int] = {}
+        for day, user_id, messages in zip(days, user_ids, amounts):
+            row = self.tables["activity_daily"].setdefault(
+                (guild_id, day, user_id), {"guild_id": guild_id, "day": day, "user_id": user_id, "messages": 0}
+            )
+            row["messages"] += messages
+            totals[user_id] = totals.get(user_id, 0) + messages
+
+        crossed = []
+        for user_id, messages in totals.items():
+            self._add_messages(guild_id, user_id, messages)
+            total = self.tables["activity"][(guild_id, user_id)]["messages"]
+            if any(total >= milestone > total - messages for milestone in (50, 500)):
+                crossed.append({"user_id": user_id, "messages": total})
+        return crossed, f"SELECT {len(crossed)}"
+
+    @handles("progression.get_recent_activity")
+    def _get_recent_activity(self, guild_id: int, today: date):
+        totals: dict[int, dict] = {}
+        for row in self.tables["activity_daily"].values():
+            age = (today - row["day"]).days
+            if row["guild_id"] != guild_id or age >= 90:
+                continue
+
+            user = totals.setdefault(
+                row["user_id"], {"user_id": row["user_id"], "last_7_days": 0, "last_30_days": 0, "last_90_days": 0}
+            )
+            user["last_90_days"] += row["messages"]
+            if age < 30:
+                user["last_30_days"] += row["messages"]
+            if age < 7:
+                user["last_7_days"] += row["messages"]
+        return list(totals.values()), f"SELECT {len(totals)}"
+
+    def _set_activity_flag(self, guild_id: int, user_id: int, flag: str):
+        row = self.tables["activity"].get((guild_id, user_id))
+        if row is None:
+            return [], "UPDATE 0"
+        row[flag] = True
+        return [], "UPDATE 1"
+
+    @handles("progression.mark_active")
+    def _mark_active(self, guild_id: int, user_id: int):
+        return self._set_activity_flag(guild_id, user_id, "active")
+
+    @handles("progression.mark_active_plus")
+    def _mark_active_plus(self, guild_id: int, user_id: int):
+        return self._set_activity_flag(guild_id, user_id, "active_plus")
+
+    @handles("progression.get_messages")
+    def _get_messages(self, guild_id: int, user_id: int):
+        row = self.tables["activity"].get((guild_id, user_id))
+        return ([{"messages": row["messages"]}] if row else []), "SELECT"
+
+    def _get_not_flagged(self, guild_id: int, flag: str, min_messages: int):
+        rows = [
+            {"user_id": row["user_id"]}
+            for row in self.tables["activity"].values()
+            if row["guild_id"] == guild_id and not row[flag] and row["messages"] >= min_messages
+        ]
+        return rows, f"SELECT {len(rows)}"
+
+    @handles("progression.get_non_active_users")
+    def _get_non_active_users(self, guild_id: int):
+        return self._get_not_flagged(guild_id, "active", 50)
+
+    @handles("progression.get_non_active_plus_users")
+    def _get_non_active_plus_users(self, guild_id: int):
+        return self._get_not_flagged(guild_id, "active_plus", 500)
+
+    def _add_nomination(self, target_id: int, nominator_id: int, stage: str, nominator_role: str):
+        key = (target_id, nominator_id, stage, nominator_role)
+        if key in self.tables["nominations"]:
+            return [], "INSERT 0 0"
+
+        self.tables["nominations"][key] = {
+            "target_id": target_id,
+            "nominator_id": nominator_id,
+            "stage": stage,
+            "nominator_role": nominator_role,
+            "created_at": _now(),
+        }
+        return [], "INSERT 0 1"
+
+    @handles("progression.nominate")
+    def _nominate(self, target_id: int, nominator_id: int, stage: str, nominator_role: str):
+        _, status = self._add_nomination(target_id, nominator_id, stage, nominator_role)
+        if status == "INSERT 0 0":
+            return [{"inserted": False, "apprentices": 0, "fellows": 0, "moderators": 0}], "SELECT 1"
+
+        counts = self.tables["nomination_counts"].setdefault(
+            (target_id, stage),
+            {"target_id": target_id, "stage": stage, "apprentices": 0, "fellows": 0, "moderators": 0}
+        )
+        counts[f"{nominator_role}s"] += 1
+        return [{
+            "inserted": True,
+            "apprentices": counts["apprentices"],
+            "fellows": counts["fellows"],
+            "moderators": counts["moderators"],
+        }], "SELECT 1"
+
+    @handles("progression.clear_stage")
+    def _clear_stage(self, target_id: int, stage: str):
+        self.tables["nomination_counts"].pop((target_id, stage), None)
+        return self._delete("nominations", lambda row: row["target_id"] == target_id and row["stage"] == stage)
+
+    # AFK
+
+    @handles("afk.get_all")
+    def _get_all_afk(self):
+        rows = list(self.tables["afk_status"].values())
+        return rows, f"SELECT {len(rows)}"
+
+    @handles("afk.set_afk")
+    def _set_afk(self, guild_id: int, user_id: int, reason: Optional[str], until: datetime):
+        self.tables["afk_status"][(guild_id, user_id)] = {
+            "guild_id": guild_id, "user_id": user_id, "reason": reason, "until": until
+        }
+        return [], "INSERT 0 1"
+
+    @handles("afk.remove_afk")
+    def _remove_afk(self, guild_id: int, user_id: int):
+        removed = self.tables["afk_status"].pop((guild_id, user_id), None)
+        return [], f"DELETE {int(removed is not None)}"
+
+    # Points
+
+    def _get_points_row(self, guild_id: int, user_id: int) -> dict:
+        row = self.tables["points"].get((guild_id, user_id))
+        if row is None:
+            row = self.tables["points"][(guild_id, user_id)] = {"guild_id": guild_id, "user_id": user_id, "points": 0}
+        return row
+
+    @handles("points.add_points")
+    def _add_points(self, guild_id: int, user_id: int, amount: int):
+        row = self._get_points_row(guild_id, user_id)
+        row["points"] += amount
+        return [{"points": row["points"]}], "INSERT 0 1"
+
+    @handles("points.remove_points")
+    def _remove_points(self, guild_id: int, user_id: int, amount: int):
+        row = self._get_points_row(guild_id, user_id)
+        row["points"] = max(row["points"] - amount, 0)
+        return [{"points": row["points"]}], "INSERT 0 1"
+
+    @handles("points.get_all")
+    def _get_all_points(self):
+        rows = [row for row in self.tables["points"].values() if row["points"] > 0]
+        return rows, f"SELECT {len(rows)}"
+
+    # Retention
+
+    @handles("retention.add_counts")
+    def _add_retention_counts(self, guild_id: int, day, joins: int, leaves: int):
+        row = self.tables["daily_retention"].get((guild_id, day))
+        if row is None:
+            self.tables["daily_retention"][(guild_id, day)] = {
+                "guild_id": guild_id, "date": day, "joins": joins, "leaves": leaves
+            }
+        else:
+            row["joins"] += joins
+            row["leaves"] += leaves
+        return [], "INSERT 0 1"
+
+    @handles("retention.get_day")
+    def _get_retention_day(self, guild_id: int, day):
+        row = self.tables["daily_retention"].get((guild_id, day))
+        return ([{"joins": row["joins"], "leaves": row["leaves"]}] if row else []), "SELECT"
+
+    # Teams
+
+    @handles("team.create_team")
+    def _create_team(
+            self, guild_id, name, description, timezone_name, role_id, category_id, text_channel_id,
+            voice_channel_id, leader_id
+    ):
+        team_id = self._next_id("teams")
+        self.tables["teams"][team_id] = {
+            "team_id": team_id,
+            "guild_id": guild_id,
+            "name": name,
+            "description": description,
+            "timezone": timezone_name,
+            "role_id": role_id,
+            "category_id": category_id,
+            "text_channel_id": text_channel_id,
+            "voice_channel_id": voice_channel_id,
+            "leader_id": leader_id,
+        }
+        return [{"team_id": team_id}], "INSERT 0 1"
+
+    @handles("team.get_team")
+    def _get_team(self, team_id: int):
+        row = self.tables["teams"].get(team_id)
+        return ([row] if row else []), "SELECT"
+
+    @handles("team.delete_team")
+    def _delete_team(self, guild_id: int, role_id: int):
+        return self._delete(
+            "teams", lambda row: row["guild_id"] == guild_id and row["role_id"] == role_id, returning=True
+        )
+
+    @handles("team.get_team_by_leader")
+    def _get_team_by_leader(self, guild_id: int, leader_id: int):
+        return self._select("teams", lambda row: row["guild_id"] == guild_id and row["leader_id"] == leader_id)
+
+    @handles("team.leader_has_team")
+    def _leader_has_team(self, guild_id: int, leader_id: int):
+        rows, status = self._get_team_by_leader(guild_id, leader_id)
+        return [{"?column?": 1} for _ in rows], status
+
+    @handles("team.get_all_teams")
+    def _get_all_teams(self, guild_id: int):
+        rows, status = self._select("teams", lambda row: row["guild_id"] == guild_id)
+        return sorted(rows, key=lambda row: row["team_id"], reverse=True), status
+
+    @handles("team.get_all_teams_with_member_counts")
+    def _get_all_teams_with_member_counts(self, guild_id: int):
+        rows, status = self._get_all_teams(guild_id)
+        counts = {}
+        for member in self.tables["team_members"].values():
+            counts[member["team_id"]] = counts.get(member["team_id"], 0) + 1
+        return [{**row, "member_count": counts.get(row["team_id"], 0)} for row in rows], status
+
+    @handles("team.count_invites_today")
+    def _count_invites_today(self, team_id: int, inviter_id: int):
+        today = _now().replace(hour=0, minute=0, second=0, microsecond=0)
+        rows, _ = self._select(
+            "team_invites",
+            lambda row: row["team_id"] == team_id and row["inviter_id"] == inviter_id and row["created_at"] >= today
+        )
+        return [{"count": len(rows)}], "SELECT 1"
+
+    @handles("team.create_invite")
+    def _create_invite(self, invite_id: int, team_id: int, inviter_id: int, invitee_id: int, guild_id: int):
+        if invite_id in self.tables["team_invites"]:
+            raise self._unique_violation("team_invites_pkey")
+        if self._has_pending_invite_for_team(team_id, invitee_id)[0]:
+            return [], "INSERT 0 0"
+
+        self.tables["team_invites"][invite_id] = {
+            "invite_id": invite_id,
+            "team_id": team_id,
+            "inviter_id": inviter_id,
+            "invitee_id": invitee_id,
+            "guild_id": guild_id,
+            "status": "pending",
+            "created_at": _now(),
+        }
+        return [{"invite_id": invite_id}], "INSERT 0 1"
+
+    @handles("team.get_invite")
+    def _get_invite(self, invite_id: int):
+        row = self.tables["team_invites"].get(invite_id)
+        return ([row] if row else []), "SELECT"
+
+    @handles("team.update_invite_status")
+    def _update_invite_status(self, invite_id: int, status: str):
+        return self._update("team_invites", lambda row: row["invite_id"] == invite_id, status=status)
+
+    @handles("team.has_pending_invite_for_team")
+    def _has_pending_invite_for_team(self, team_id: int, invitee_id: int):
+        rows, _ = self._select(
+            "team_invites",
+            lambda row: row["team_id"] == team_id and row["invitee_id"] == invitee_id and row["status"] == "pending"
+        )
+        return [{"?column?": 1} for _ in rows[:1]], f"SELECT {min(len(rows), 1)}"
+
+    @handles("team.add_member")
+    def _add_member(self, team_id: int, guild_id: int, user_id: int):
+        members = self.tables["team_members"]
+        if (team_id, user_id) in members:
+            raise self._unique_violation("team_members_pkey")
+        if any(row["guild_id"] == guild_id and row["user_id"] == user_id for row in members.values()):
+            raise self._unique_violation("one_team_per_user")
+
+        members[(team_id, user_id)] = {
+            "team_id": team_id, "guild_id": guild_id, "user_id": user_id, "joined_at": _now()
+        }
+        return [], "INSERT 0 1"
+
+    @handles("team.remove_member")
+    def _remove_member(self, team_id: int, user_id: int):
+        removed = self.tables["team_members"].pop((team_id, user_id), None)
+        if removed is None:
+            return [], "DELETE 0"
+        return [{"guild_id": removed["guild_id"]}], "DELETE 1"
+
+    @handles("team.get_user_team")
+    def _get_user_team(self, guild_id: int, user_id: int):
+        return self._select("team_members", lambda row: row["guild_id"] == guild_id and row["user_id"] == user_id)
+
+    @handles("team.get_team_members")
+    def _get_team_members(self, team_id: int):
+        rows, status = self._select("team_members", lambda row: row["team_id"] == team_id)
+        return [{"user_id": row["user_id"]} for row in rows], status
+
+    @handles("team.create_setup_invite")
+    def _create_setup_invite(self, invite_id: int, guild_id: int, user_id: int):
+        if invite_id in self.tables["team_setup_invites"]:
+            raise self._unique_violation("team_setup_invites_pkey")
+
+        self.tables["team_setup_invites"][invite_id] = {
+            "invite_id": invite_id, "guild_id": guild_id, "user_id": user_id, "status": "pending", "created_at": _now()
+        }
+        return [], "INSERT 0 1"
+
+    @handles("team.get_setup_invite")
+    def _get_setup_invite(self, invite_id: int):
+        row = self.tables["team_setup_invites"].get(invite_id)
+        return ([row] if row else []), "SELECT"
+
+    @handles("team.update_setup_invite")
+    def _update_setup_invite(self, invite_id: int, status: str):
+        return self._update("team_setup_invites", lambda row: row["invite_id"] == invite_id, status=status)
+
+    @handles("team.get_setup_invite_by_user")
+    def _get_setup_invite_by_user(self, guild_id: int, user_id: int):
+        rows, _ = self._select(
+            "team_setup_invites",
+            lambda row: row["guild_id"] == guild_id and row["user_id"] == user_id and row["status"] == "pending"
+        )
+        return rows[:1], f"SELECT {min(len(rows), 1)}"
+
+    def _is_pending_request(self, team_id: int, user_id: int) -> Callable[[dict], bool]:
+        return lambda row: row["team_id"] == team_id and row["user_id"] == user_id and row["status"] == "pending"
+
+    @handles("team.create_join_request")
+    def _create_join_request(self, guild_id: int, team_id: int, user_id: int, reason: Optional[str]):
+        # Postgres takes the serial default before it finds the conflict, skipped inserts use up an id too
+        request_id = self._next_id("team_join_requests")
+        rows, _ = self._select("team_join_requests", self._is_pending_request(team_id, user_id))
+        if rows:
+            return [], "INSERT 0 0"
+
+        self.tables["team_join_requests"][request_id] = {
+            "request_id": request_id,
+            "guild_id": guild_id,
+            "team_id": team_id,
+            "user_id": user_id,
+            "status": "pending",
+            "reason": reason,
+            "created_at": _now(),
+        }
+        return [{"request_id": request_id}], "INSERT 0 1"
+
+    @handles("team.get_pending_request")
+    def _get_pending_request(self, team_id: int, user_id: int):
+        return self._select("team_join_requests", self._is_pending_request(team_id, user_id))
+
+    @handles("team.update_request_status")
+    def _update_request_status(self, team_id: int, user_id: int, status: str):
+        return self._update("team_join_requests", self._is_pending_request(team_id, user_id), status=status)
+
+    # Giveaways
+
+    @handles("giveaway.create_giveaway")
+    def _create_giveaway(
+            self, message_id, guild_id, channel_id, host_id, name, description, prizes, questions_json, winners, ends_at
+    ):
+        if message_id in self.tables["giveaways"]:
+            raise self._unique_violation("giveaways_pkey")
+
+        self.tables["giveaways"][message_id] = {
+            "message_id": message_id,
+            "guild_id": guild_id,
+            "channel_id": channel_id,
+            "host_id": host_id,
+            "name": name,
+            "description": description,
+            "prizes": prizes,
+            # jsonb is returned as text by asyncpg without a codec
+            "questions": questions_json,
+            "winners": winners,
+            "ends_at": ends_at,
+            "ended": False,
+            "winner_ids": [],
+        }
+        return [], "INSERT 0 1"
+
+    @handles("giveaway.get_active")
+    def _get_active_giveaway(self, message_id: int):
+        row = self.tables["giveaways"].get(message_id)
+        return ([row] if row and not row["ended"] else []), "SELECT"
+
+    @handles("giveaway.get_pending")
+    def _get_pending_giveaways(self):
+        rows, status = self._select("giveaways", lambda row: not row["ended"])
+        return sorted(rows, key=lambda row: row["ends_at"]), status
+
+    @handles("giveaway.enter")
+    def _enter_giveaway(self, message_id: int, user_id: int):
+        if (message_id, user_id) in self.tables["giveaway_entries"]:
+            return [], "INSERT 0 0"
+
+        self.tables["giveaway_entries"][(message_id, user_id)] = {"message_id": message_id, "user_id": user_id}
+        return [], "INSERT 0 1"
+
+    @handles("giveaway.get_entries")
+    def _get_giveaway_entries(self, message_id: int):
+        rows, status = self._select("giveaway_entries", lambda row: row["message_id"] == message_id)
+        return [{"user_id": row["user_id"]} for row in rows], status
+
+    @handles("giveaway.get_entry_count")
+    def _get_giveaway_entry_count(self, message_id: int):
+        rows, _ = self._select("giveaway_entries", lambda row: row["message_id"] == message_id)
+        return [{"count": len(rows)}], "SELECT 1"
+
+    @handles("giveaway.finish")
+    def _finish_giveaway(self, message_id: int, winner_ids: list[int]):
+        return self._update(
+            "giveaways", lambda row: row["message_id"] == message_id, ended=True, winner_ids=list(winner_ids)
+        )
+
+    @handles("giveaway.get_giveaway")
+    def _get_giveaway(self, message_id: int):
+        row = self.tables["giveaways"].get(message_id)
+        return ([row] if row else []), "SELECT"
+
+    @handles("giveaway.delete_entries")
+    def _delete_giveaway_entries(self, message_id: int):
+        return self._delete("giveaway_entries", lambda row: row["message_id"] == message_id)
+
+    @handles("giveaway.delete_giveaway")
+    def _delete_giveaway(self, message_id: int):
+        return self._delete("giveaways", lambda row: row["message_id"] == message_id)
+
+    # Duty
+
+    @handles("duty.set_schedule")
+    def _set_duty_schedule(self, guild_id: int, user_id: int, start_time: str, end_time: str, timezone_name: str):
+        self.tables["duty_schedules"][(guild_id, user_id)] = {
+            "guild_id": guild_id,
+            "user_id": user_id,
+            "start_time": start_time,
+            "end_time": end_time,
+            "timezone": timezone_name,
+        }
+        return [], "INSERT 0 1"
+
+    @handles("duty.remove_schedule")
+    def _remove_duty_schedule(self, guild_id: int, user_id: int):
+        removed = self.tables["duty_schedules"].pop((guild_id, user_id), None)
+        return [], f"DELETE {int(removed is not None)}"
+
+    @handles("duty.get_all_schedules")
+    def _get_all_duty_schedules(self):
+        rows = list(self.tables["duty_schedules"].values())
+        return rows, f"SELECT {len(rows)}"
+
+    # State
+
+    @handles("state.get")
+    def _get_state(self, key: str):
+        row = self.tables["bot_state"].get(key)
+        return ([{"value": row["value"]}] if row else []), "SELECT"
+
+    @handles("state.set")
+    def _set_state(self, key: str, value: str):
+        self.tables["bot_state"][key] = {"key": key, "value": value, "updated_at": _now()}
+        return [], "INSERT 0 1"
+
+    # Archive
+
+    def _archive(
+            self,
+            table: str,
+            predicate: Callable[[dict], bool],
+            age_column: str,
+            limit: int,
+            **computed: Callable[[dict], Any]
+    ):
+        """Moves up to limit matching rows, oldest by age_column first, into <table>_archive."""
+        matching = sorted(
+            (key for key, row in self.tables[table].items() if predicate(row)),
+            key=lambda matched: self.tables[table][matched][age_column]
+        )
+        keys = matching[:limit]
+        for key in keys:
+            row = self.tables[table].pop(key)
+            archived = {**row, **{column: compute(row) for column, compute in computed.items()}}
+            self.tables[f"{table}_archive"][key] = {**archived, "archived_at": _now()}
+        return [{"count": len(keys)}], "SELECT 1"
+
+    def _is_resolved_before(self, cutoff: datetime) -> Callable[[dict], bool]:
+        return lambda row: row["status"] != "pending" and row["created_at"] < cutoff
+
+    @handles("archive.team_invites")
+    def _archive_team_invites(self, cutoff: datetime, limit: int):
+        return self._archive("team_invites", self._is_resolved_before(cutoff), "created_at", limit)
+
+    @handles("archive.team_setup_invites")
+    def _archive_team_setup_invites(self, cutoff: datetime, limit: int):
+        return self._archive("team_setup_invites", self._is_resolved_before(cutoff), "created_at", limit)
+
+    @handles("archive.team_join_requests")
+    def _archive_team_join_requests(self, cutoff: datetime, limit: int):
+        return self._archive("team_join_requests", self._is_resolved_before(cutoff), "created_at", limit)
+
+    @handles("archive.giveaways")
+    def _archive_giveaways(self, cutoff: datetime, limit: int):
+        return self._archive(
+            "giveaways",
+            lambda row: row["ended"] and row["ends_at"] < cutoff,
+            "ends_at",
+            limit,
+            entry_count=lambda row: len(self._get_giveaway_entries(row["message_id"])[0])
+        )
+
+    @handles("archive.giveaway_entries")
+    def _archive_giveaway_entries(self, cutoff: datetime, limit: int):
+        ends_at = {
+            row["message_id"]: row["ends_at"]
+            for row in self.tables["giveaways_archive"].values()
+            if row["ends_at"] < cutoff
+        }
+        keys = sorted(
+            (key for key, row in self.tables["giveaway_entries"].items() if row["message_id"] in ends_at),
+            key=lambda key: ends_at[key[0]]
+        )[:limit]
+        for key in keys:
+            del self.tables["giveaway_entries"][key]
+        return [{"count": len(keys)}], "SELECT 1"
+
+    @handles("archive.activity_daily")
+    def _archive_activity_daily(self, cutoff: datetime, limit: int):
+        day = cutoff.astimezone(timezone.utc).date()
+        keys = sorted(
+            (key for key, row in self.tables["activity_daily"].items() if row["day"] < day), key=lambda key: key[1]
+        )[:limit]
+        for key in keys:
+            del self.tables["activity_daily"][key]
+        return [{"count": len(keys)}], "SELECT 1"
+
+    # Helpers shared by handlers
+
+    def _select(self, table: str, predicate: Callable[[dict], bool]):
+        rows = [row for row in self.tables[table].values() if predicate(row)]
+        return rows, f"SELECT {len(rows)}"
+
+    def _update(self, table: str, predicate: Callable[[dict], bool], returning: bool = False, **values):
+        """
+        :param returning: return the updated rows like RETURNING * does, otherwise no rows like plain UPDATE
+        """
+        rows = [row for row in self.tables[table].values() if predicate(row)]
+        for row in rows:
+            row.update(values)
+        return (rows if returning else []), f"UPDATE {len(rows)}"
+
+    def _delete(self, table: str, predicate: Callable[[dict], bool], returning: bool = False):
+        """
+        :param returning: return the deleted rows like RETURNING * does, otherwise no rows like plain DELETE
+        """
+        keys = [key for key, row in self.tables[table].items() if predicate(row)]
+        rows = [self.tables[table].pop(key) for key in keys]
+        return (rows if returning else []), f"DELETE {len(rows)}"
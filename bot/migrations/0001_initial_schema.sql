@@ -0,0 +1,125 @@
+-- Baseline schema, matches what managers used to create on every boot.
+-- Uses IF NOT EXISTS so databases created before migrations were introduced are adopted as-is.
+
+CREATE TABLE IF NOT EXISTS activity (
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    messages INTEGER NOT NULL DEFAULT 0,
+    active BOOLEAN NOT NULL DEFAULT FALSE,
+    active_plus BOOLEAN NOT NULL DEFAULT FALSE,
+    PRIMARY KEY (guild_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS nominations (
+    target_id BIGINT NOT NULL,
+    nominator_id BIGINT NOT NULL,
+    stage TEXT NOT NULL,
+    nominator_role TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (target_id, nominator_id, stage, nominator_role)
+);
+
+CREATE TABLE IF NOT EXISTS afk_status (
+    guild_id BIGINT NOT NULL,
+    user_id  BIGINT NOT NULL,
+    reason   TEXT,
+    until    TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS points (
+    guild_id BIGINT NOT NULL,
+    user_id  BIGINT NOT NULL,
+    points   INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS daily_retention (
+    guild_id BIGINT NOT NULL,
+    date DATE NOT NULL,
+    joins INTEGER NOT NULL DEFAULT 0,
+    leaves INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, date)
+);
+
+CREATE TABLE IF NOT EXISTS teams (
+    team_id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT,
+    timezone TEXT,
+    role_id BIGINT NOT NULL,
+    category_id BIGINT NOT NULL,
+    text_channel_id BIGINT NOT NULL,
+    voice_channel_id BIGINT NOT NULL,
+    leader_id BIGINT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS team_invites (
+    invite_id BIGINT PRIMARY KEY,
+    team_id INT,
+    inviter_id BIGINT,
+    invitee_id BIGINT,
+    guild_id BIGINT NOT NULL,
+    status TEXT DEFAULT 'pending',
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS team_members (
+    team_id INT NOT NULL,
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    joined_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (team_id, user_id)
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS one_team_per_user
+ON team_members (guild_id, user_id);
+
+CREATE TABLE IF NOT EXISTS team_setup_invites (
+    invite_id BIGINT PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    status TEXT DEFAULT 'pending',
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS team_join_requests (
+    request_id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    team_id INT NOT NULL,
+    user_id BIGINT NOT NULL,
+    status TEXT DEFAULT 'pending',
+    reason TEXT DEFAULT 'Reason not stated',
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS giveaways (
+    message_id BIGINT PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL,
+    host_id BIGINT NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT,
+    prizes TEXT NOT NULL,
+    questions JSONB NOT NULL DEFAULT '[]'::jsonb,
+    winners INTEGER NOT NULL DEFAULT 10,
+    ends_at TIMESTAMPTZ NOT NULL,
+    ended BOOLEAN NOT NULL DEFAULT FALSE,
+    winner_ids BIGINT[] NOT NULL DEFAULT '{}'
+);
+
+CREATE TABLE IF NOT EXISTS giveaway_entries (
+    message_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    PRIMARY KEY (message_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS duty_schedules (
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    timezone TEXT NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+);
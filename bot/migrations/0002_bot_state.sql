@@ -0,0 +1,7 @@
+-- Small key/value store for bot bookkeeping that has to survive restarts (eg. last synced command tree hash).
+
+CREATE TABLE IF NOT EXISTS bot_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,49 @@
+-- Indexes for queries that used to scan whole tables, see benchmarks/query_plans.py for the plan check.
+
+-- TeamManager.can_invite, invites sent by a member today
+CREATE INDEX IF NOT EXISTS team_invites_team_inviter_created
+ON team_invites (team_id, inviter_id, created_at);
+
+-- TeamManager.has_pending_invite_for_team
+CREATE INDEX IF NOT EXISTS team_invites_pending
+ON team_invites (team_id, invitee_id)
+WHERE status = 'pending';
+
+-- TeamManager.create_join_request, get_pending_request and update_request_status
+CREATE INDEX IF NOT EXISTS team_join_requests_pending
+ON team_join_requests (team_id, user_id)
+WHERE status = 'pending';
+
+-- TeamManager.get_setup_invite_by_user
+CREATE INDEX IF NOT EXISTS team_setup_invites_pending
+ON team_setup_invites (guild_id, user_id)
+WHERE status = 'pending';
+
+-- TeamManager.get_team_by_leader, leader_has_team, delete_team and get_all_teams
+CREATE INDEX IF NOT EXISTS teams_guild_leader
+ON teams (guild_id, leader_id);
+
+CREATE INDEX IF NOT EXISTS teams_guild_role
+ON teams (guild_id, role_id);
+
+-- GiveawayManager.get_pending, only running giveaways are ever looked up by end time
+CREATE INDEX IF NOT EXISTS giveaways_pending_ends_at
+ON giveaways (ends_at)
+WHERE ended = FALSE;
+
+-- ProgressionManager.get_non_active_users and get_non_active_plus_users, covering so no heap access is needed
+CREATE INDEX IF NOT EXISTS activity_not_active
+ON activity (guild_id, messages) INCLUDE (user_id)
+WHERE active = FALSE;
+
+CREATE INDEX IF NOT EXISTS activity_not_active_plus
+ON activity (guild_id, messages) INCLUDE (user_id)
+WHERE active_plus = FALSE;
+
+-- ProgressionManager.clear_stage, primary key has nominator_id between target_id and stage
+CREATE INDEX IF NOT EXISTS nominations_target_stage
+ON nominations (target_id, stage) INCLUDE (nominator_role);
+
+-- PointsManager.get_leaderboard
+CREATE INDEX IF NOT EXISTS points_guild_leaderboard
+ON points (guild_id, points DESC) INCLUDE (user_id);
@@ -0,0 +1,33 @@
+-- At most one pending join request per user and team, and one pending invite per invitee and team.
+-- TeamManager.create_join_request and create_invite rely on these for ON CONFLICT DO NOTHING.
+
+-- Older duplicates left over from double clicks are cancelled, the most recent one stays pending
+UPDATE team_join_requests
+SET status = 'cancelled'
+WHERE status = 'pending'
+AND request_id NOT IN (
+    SELECT MAX(request_id)
+    FROM team_join_requests
+    WHERE status = 'pending'
+    GROUP BY team_id, user_id
+);
+
+UPDATE team_invites
+SET status = 'cancelled'
+WHERE status = 'pending'
+AND invite_id NOT IN (
+    SELECT MAX(invite_id)
+    FROM team_invites
+    WHERE status = 'pending'
+    GROUP BY team_id, invitee_id
+);
+
+DROP INDEX IF EXISTS team_join_requests_pending;
+CREATE UNIQUE INDEX team_join_requests_pending
+ON team_join_requests (team_id, user_id)
+WHERE status = 'pending';
+
+DROP INDEX IF EXISTS team_invites_pending;
+CREATE UNIQUE INDEX team_invites_pending
+ON team_invites (team_id, invitee_id)
+WHERE status = 'pending';
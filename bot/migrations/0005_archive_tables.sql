@@ -0,0 +1,47 @@
+-- Archive tables for rows ArchiveManager moves out of the live tables once they are past retention.
+-- Same columns as the source table without its indexes and constraints, archived rows are only read by hand.
+-- Nominations are not archived: they have no resolved state, every row left is a live vote.
+
+CREATE TABLE IF NOT EXISTS team_invites_archive (
+    LIKE team_invites,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS team_setup_invites_archive (
+    LIKE team_setup_invites,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS team_join_requests_archive (
+    LIKE team_join_requests,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Entries of archived giveaways are deleted, only their count is kept
+CREATE TABLE IF NOT EXISTS giveaways_archive (
+    LIKE giveaways,
+    entry_count INTEGER NOT NULL,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- ArchiveManager batches take the oldest rows past retention first, these keep each batch from reading
+-- anything but the rows it moves.
+CREATE INDEX IF NOT EXISTS team_invites_resolved_created
+ON team_invites (created_at)
+WHERE status <> 'pending';
+
+CREATE INDEX IF NOT EXISTS team_setup_invites_resolved_created
+ON team_setup_invites (created_at)
+WHERE status <> 'pending';
+
+CREATE INDEX IF NOT EXISTS team_join_requests_resolved_created
+ON team_join_requests (created_at)
+WHERE status <> 'pending';
+
+CREATE INDEX IF NOT EXISTS giveaways_ended_ends_at
+ON giveaways (ends_at)
+WHERE ended;
+
+-- Entries are picked by archived giveaway, then looked up through the giveaway_entries primary key
+CREATE INDEX IF NOT EXISTS giveaways_archive_ends_at
+ON giveaways_archive (ends_at);
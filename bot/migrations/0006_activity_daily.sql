@@ -0,0 +1,13 @@
+-- Messages per user and UTC day, written next to the lifetime counter in activity on every flush.
+-- Primary key leads with guild and day so rolling window totals for a guild read one index range.
+CREATE TABLE IF NOT EXISTS activity_daily (
+    guild_id BIGINT NOT NULL,
+    day DATE NOT NULL,
+    user_id BIGINT NOT NULL,
+    messages INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, day, user_id)
+);
+
+-- Archive job deletes the oldest days past retention across all guilds
+CREATE INDEX IF NOT EXISTS activity_daily_day
+ON activity_daily (day);
@@ -0,0 +1,22 @@
+-- Nominations per target and stage by nominator role, kept next to nominations by ProgressionManager.nominate.
+-- The nominate statement upserts its row, which locks it and returns the latest counts, so of concurrent
+-- nominations for the same stage each sees every earlier one and exactly one sees the threshold crossed.
+CREATE TABLE IF NOT EXISTS nomination_counts (
+    target_id BIGINT NOT NULL,
+    stage TEXT NOT NULL,
+    apprentices INTEGER NOT NULL DEFAULT 0,
+    fellows INTEGER NOT NULL DEFAULT 0,
+    moderators INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (target_id, stage)
+);
+
+INSERT INTO nomination_counts (target_id, stage, apprentices, fellows, moderators)
+SELECT
+target_id,
+stage,
+COUNT(*) FILTER (WHERE nominator_role='apprentice'),
+COUNT(*) FILTER (WHERE nominator_role='fellow'),
+COUNT(*) FILTER (WHERE nominator_role='moderator')
+FROM nominations
+GROUP BY target_id, stage
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import re
+import logging
+from pathlib import Path
+
+import asyncpg
+
+from bot.manager import Database
+
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIRECTORY = Path(__file__).parent / "migrations"
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+# Arbitrary key so concurrently starting instances don't apply the same migration twice
+MIGRATION_LOCK_KEY = 7_405_913_371
+# Migrations (eg. index builds) and waiting for the lock can take longer than pool command timeout
+MIGRATION_TIMEOUT = 600
+
+
+class Migration:
+    def __init__(self, version: int, name: str, path: Path):
+        self.version = version
+        self.name = name
+        self.path = path
+
+    @property
+    def sql(self) -> str:
+        return self.path.read_text(encoding="utf-8")
+
+    def __repr__(self):
+        return f"<Migration {self.version:04d}_{self.name}>"
+
+
+class Migrator:
+    def __init__(self, db: Database, directory: Path = MIGRATIONS_DIRECTORY):
+        """
+        Applies ordered SQL migration files from directory and records them in schema_version table.
+        Files are named <version>_<name>.sql and each one runs in its own transaction.
+        :param db: connected database
+        :param directory: directory holding migration files
+        """
+        self.db = db
+        self.directory = directory
+
+    def get_migrations(self) -> list[Migration]:
+        migrations = []
+
+        for path in self.directory.glob("*.sql"):
+            match = MIGRATION_FILE_PATTERN.match(path.name)
+            if match is None:
+                raise ValueError(f"Invalid migration file name {path.name}, expected <version>_<name>.sql")
+            migrations.append(Migration(int(match.group(1)), match.group(2), path))
+
+        migrations.sort(key=lambda migration: migration.version)
+
+        versions = [migration.version for migration in migrations]
+        if len(versions) != len(set(versions)):
+            raise ValueError(f"Duplicate migration versions in {self.directory}")
+
+        return migrations
+
+    async def get_current_version(self) -> int:
+        try:
+            return await self.db.pool.fetchval("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+        except asyncpg.UndefinedTableError:
+            return 0
+
+    async def migrate(self) -> list[Migration]:
+        """
+        Applies every migration newer than the current schema version.
+        In the common case where schema is up to date this is a single query.
+        :return: list of applied migrations
+        """
+        migrations = self.get_migrations()
+        latest_version = migrations[-1].version if migrations else 0
+
+        if await self.get_current_version() >= latest_version:
+            return []
+
+        applied = []
+
+        async with self.db.pool.acquire() as connection:
+            # Session setting, reset when connection is released back to the pool
+            await connection.execute("SET statement_timeout = 0")
+            await connection.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_KEY, timeout=MIGRATION_TIMEOUT)
+            try:
+                await connection.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INTEGER PRIMARY KEY,
+                        name TEXT NOT NULL,
+                        applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                    )
+                    """
+                )
+                # Re-read under lock in case other instance migrated while we were waiting
+                current_version = await connection.fetchval("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+
+                for migration in migrations:
+                    if migration.version <= current_version:
+                        continue
+
+                    logger.info(f"Applying migration {migration}")
+                    async with connection.transaction():
+                        await connection.execute(migration.sql, timeout=MIGRATION_TIMEOUT)
+                        await connection.execute(
+                            "INSERT INTO schema_version (version, name) VALUES ($1, $2)",
+                            migration.version,
+                            migration.name
+                        )
+                    applied.append(migration)
+            finally:
+                await connection.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_KEY)
+
+        return applied
@@ -0,0 +1,58 @@
+import os
+import logging
+import subprocess
+from datetime import datetime, timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+class BuildInfo:
+    def __init__(self, commit_hash: str, commit_message: str, build_time: datetime):
+        """
+        Metadata about the running build.
+        :param commit_hash: short git commit hash or any other version identifier
+        :param commit_message: subject of the commit, can be empty
+        :param build_time: when the build was packaged, or when the process started if unknown
+        """
+        self.commit_hash = commit_hash
+        self.commit_message = commit_message
+        self.build_time = build_time
+
+    @classmethod
+    def capture(cls) -> "BuildInfo":
+        """
+        Values set at packaging time through BOT_BUILD_VERSION, BOT_BUILD_MESSAGE and BOT_BUILD_TIME (ISO format)
+        environment variables take priority, otherwise git is asked once. Never call this from the event loop.
+        """
+        commit_hash = os.getenv("BOT_BUILD_VERSION")
+        commit_message = os.getenv("BOT_BUILD_MESSAGE", "")
+        build_time = cls._parse_build_time(os.getenv("BOT_BUILD_TIME"))
+
+        if not commit_hash:
+            try:
+                output = subprocess.check_output(
+                    ["git", "log", "-1", "--pretty=%h%n%s"],
+                    stderr=subprocess.DEVNULL,
+                    timeout=5,
+                ).decode().strip()
+                commit_hash, _, commit_message = output.partition("\n")
+            except Exception as e:
+                logger.info(f"Could not read build info from git: {e}")
+                commit_hash = "mystery-build"
+                commit_message = ""
+
+        return cls(commit_hash, commit_message, build_time)
+
+    @staticmethod
+    def _parse_build_time(value: str) -> datetime:
+        if value:
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                logger.warning(f"Invalid BOT_BUILD_TIME {value}, falling back to process start time.")
+        return datetime.now(timezone.utc)
+
+
+# Captured on first import, which bot.__main__ does after loading .env and before the event loop starts.
+build_info = BuildInfo.capture()
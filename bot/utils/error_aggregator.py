@@ -0,0 +1,224 @@
+import io
+import re
+import time
+import asyncio
+import hashlib
+import logging
+import traceback
+from collections import deque
+from typing import Optional
+
+import discord
+
+
+logger = logging.getLogger(__name__)
+
+TRACEBACK_FRAME_PATTERN = re.compile(r'File "(?P<file>[^"]+)", line \d+, in (?P<function>\S+)')
+# Ids, counts, addresses etc. that differ between otherwise identical errors
+VOLATILE_PATTERN = re.compile(r"0x[0-9a-fA-F]+|\d+")
+
+
+def fingerprint_exception(error: BaseException) -> str:
+    """Fingerprint from exception type and the file/function of every traceback frame, ignoring line numbers."""
+    frames = [
+        f"{frame.filename}:{frame.name}"
+        for frame in traceback.extract_tb(error.__traceback__)
+    ]
+    return _hash(type(error).__qualname__, *frames)
+
+
+def fingerprint_text(text: str) -> str:
+    """
+    Fingerprint for errors only available as formatted text.
+    Uses traceback frames and exception type found in text, falls back to text with numbers stripped.
+    """
+    frames = [f"{match.group('file')}:{match.group('function')}" for match in TRACEBACK_FRAME_PATTERN.finditer(text)]
+    if not frames:
+        return _hash(VOLATILE_PATTERN.sub("#", text.strip()))
+
+    last_line = text.strip().splitlines()[-1]
+    exception_type = last_line.split(":", 1)[0].strip(" '\"]")
+    return _hash(exception_type, *frames)
+
+
+def _hash(*parts: str) -> str:
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:10]
+
+
+class ErrorRecord:
+    def __init__(self, fingerprint: str, title: str, details: str):
+        """
+        Occurrences of one distinct error.
+        :param fingerprint: hash identifying the error
+        :param title: short one line description from the first occurrence
+        :param details: full traceback or message from the most recent occurrence
+        """
+        self.fingerprint = fingerprint
+        self.title = title
+        self.details = details
+        self.count = 0
+        self.first_seen = time.time()
+        self.last_seen = self.first_seen
+        # Occurrences not yet reported to the error channel
+        self.pending = 0
+        self.last_reported: Optional[float] = None
+        self.flush_task: Optional[asyncio.Task] = None
+
+    def frequency(self) -> float:
+        """Average occurrences per hour since first seen."""
+        hours = max(self.last_seen - self.first_seen, 60) / 3600
+        return self.count / hours
+
+
+class ErrorAggregator:
+    def __init__(
+            self,
+            bot,
+            channel_id: int,
+            window: float = 300,
+            max_reports: int = 5,
+            report_period: float = 60,
+            max_records: int = 500
+    ):
+        """
+        Reports errors to the error log channel without flooding it.
+        Errors are fingerprinted, first occurrence is reported right away and repeats within window are
+        coalesced into one follow-up report with a count. Full tracebacks are uploaded as a file attachment.
+        :param bot: bot instance
+        :param channel_id: error log channel id
+        :param window: seconds during which repeats of an already reported error are coalesced
+        :param max_reports: max messages sent to the channel per report_period, across all errors
+        :param report_period: seconds for max_reports
+        :param max_records: max distinct errors to keep stats for, least recently seen are dropped first
+        """
+        self.bot = bot
+        self.channel_id = channel_id
+        self.window = window
+        self.max_reports = max_reports
+        self.report_period = report_period
+        self.max_records = max_records
+        self.records: dict[str, ErrorRecord] = {}
+        self._report_times: deque[float] = deque()
+        self.occurrences = bot.metrics.counter(
+            "tortoise_errors_total",
+            "Errors reported to error aggregator by error type.",
+            ("error",)
+        )
+        self.suppressed = bot.metrics.counter(
+            "tortoise_errors_suppressed_total",
+            "Error occurrences coalesced or rate limited instead of being sent right away."
+        )
+
+    def report_exception(self, title: str, error: BaseException):
+        details = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+        self._report(fingerprint_exception(error), title, details, type(error).__name__)
+
+    def report(self, message: str, title: Optional[str] = None):
+        """
+        Reports error that is only available as text, eg. already formatted traceback.
+        :param message: error message or traceback
+        :param title: short description, first line of message is used if not passed
+        """
+        lines = message.strip().splitlines()
+        if not title and lines:
+            # Bare traceback header tells nothing, exception line is more useful
+            title = lines[-1] if lines[0].startswith("Traceback") else lines[0]
+        title = title or "Error"
+        error_type = lines[-1].split(":", 1)[0] if lines else "unknown"
+        self._report(fingerprint_text(message), title, message, error_type[:100])
+
+    def get_stats(self, limit: int = 10) -> list[ErrorRecord]:
+        """Most recently seen errors first."""
+        return sorted(self.records.values(), key=lambda record: record.last_seen, reverse=True)[:limit]
+
+    def _report(self, fingerprint: str, title: str, details: str, error_type: str):
+        self.occurrences.inc(error=error_type)
+
+        record = self.records.get(fingerprint)
+        if record is None:
+            record = self.records[fingerprint] = ErrorRecord(fingerprint, title[:200], details)
+            self._trim_records()
+
+        record.count += 1
+        record.pending += 1
+        record.last_seen = time.time()
+        record.details = details
+
+        if record.flush_task is not None:
+            # Already waiting to report this error
+            self.suppressed.inc()
+            return
+
+        delay = 0
+        if record.last_reported is not None:
+            delay = max(0.0, record.last_reported + self.window - time.time())
+        if delay:
+            self.suppressed.inc()
+
+        record.flush_task = asyncio.create_task(self._flush_later(record, delay))
+
+    def _trim_records(self):
+        if len(self.records) <= self.max_records:
+            return
+
+        for record in sorted(self.records.values(), key=lambda item: item.last_seen):
+            if len(self.records) <= self.max_records:
+                break
+            if record.flush_task is None:
+                del self.records[record.fingerprint]
+
+    def _acquire_report_slot(self) -> float:
+        """Returns 0 if report can be sent now, otherwise seconds to wait for a free slot."""
+        now = time.monotonic()
+        while self._report_times and now - self._report_times[0] >= self.report_period:
+            self._report_times.popleft()
+
+        if len(self._report_times) < self.max_reports:
+            self._report_times.append(now)
+            return 0
+
+        return self._report_times[0] + self.report_period - now
+
+    async def _flush_later(self, record: ErrorRecord, delay: float):
+        try:
+            await asyncio.sleep(delay)
+            # Errors from before the bot is ready stay pending until then, without using up report slots
+            await self.bot.wait_until_ready()
+            channel = self.bot.get_channel(self.channel_id)
+            if channel is not None and not self.bot.is_closed():
+                while (wait := self._acquire_report_slot()) > 0:
+                    await asyncio.sleep(wait)
+
+                count = record.pending
+                await self._send(channel, record, count)
+                record.pending -= count
+                record.last_reported = time.time()
+        except Exception as e:
+            # Never report errors from here to avoid recursion
+            logger.error(f"Failed to report error {record.fingerprint}: {e}")
+        finally:
+            record.flush_task = None
+
+        # Occurrences that came in while sending or couldn't be sent get a follow-up report after window,
+        # _report doesn't schedule one for them since this task was still running
+        if record.pending and not self.bot.is_closed():
+            record.flush_task = asyncio.create_task(self._flush_later(record, self.window))
+
+    async def _send(self, channel: discord.abc.Messageable, record: ErrorRecord, count: int):
+        if record.count == 1:
+            summary = "First occurrence"
+        elif record.count == count:
+            summary = f"{count} occurrences"
+        else:
+            summary = f"{count} occurrence(s) since last report, {record.count} total"
+
+        content = (
+            f"**{discord.utils.escape_markdown(record.title)}**\n"
+            f"Fingerprint `{record.fingerprint}` · {summary} · "
+            f"first seen <t:{int(record.first_seen)}:R>, last seen <t:{int(record.last_seen)}:R>"
+        )
+        file = discord.File(
+            io.BytesIO(record.details.encode("utf-8")),
+            filename=f"error-{record.fingerprint}.txt"
+        )
+        await channel.send(content=content[:2000], file=file)
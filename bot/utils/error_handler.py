@@ -1,6 +1,9 @@
-from discord import app_commands
-import discord
+import time
 import logging
+
+import discord
+from discord import app_commands
+
 from bot.utils.embed_handler import failure
 from bot.utils.exceptions import (TortoiseStaffCheckFailure,
                                   TortoiseGuildCheckFailure,
@@ -8,7 +11,36 @@ from bot.utils.exceptions import (TortoiseStaffCheckFailure,
 
 class TortoiseCommandTree(app_commands.CommandTree):
 
+    def __init__(self, client, *args, **kwargs):
+        super().__init__(client, *args, **kwargs)
+        self.command_latency = client.metrics.histogram(
+            "tortoise_app_command_latency_seconds",
+            "Time from app command dispatch until it completed or errored.",
+            ("command",)
+        )
+        self.command_errors = client.metrics.counter(
+            "tortoise_app_command_errors_total",
+            "App command errors by command and error type.",
+            ("command", "error")
+        )
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras["started_at"] = time.perf_counter()
+        return True
+
+    def record_command(self, interaction: discord.Interaction, error: Exception = None):
+        command_name = interaction.command.qualified_name if interaction.command else "unknown"
+
+        started_at = interaction.extras.get("started_at")
+        if started_at is not None:
+            self.command_latency.observe(time.perf_counter() - started_at, command=command_name)
+
+        if error is not None:
+            self.command_errors.inc(command=command_name, error=type(error).__name__)
+
     async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        self.record_command(interaction, error)
+
         if isinstance(error, app_commands.MissingPermissions):
             msg = "You don't have permission to use this command."
 
@@ -32,6 +64,8 @@ class TortoiseCommandTree(app_commands.CommandTree):
 
         elif isinstance(error, app_commands.CommandInvokeError):
             msg = "An unexpected error occurred while running the command."
+            command_name = interaction.command.qualified_name if interaction.command else "unknown"
+            self.client.error_aggregator.report_exception(f"App command '{command_name}' error", error.original)
 
         else:
             msg = "Unknown error occurred."
@@ -0,0 +1,64 @@
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+
+class ExpiringSet:
+    def __init__(self, ttl: float, max_size: int):
+        """
+        Set whose items expire ttl seconds after being added, holding at most max_size items.
+        Items are kept in insertion order so expired ones are always at the front and get removed
+        lazily on access, no background task needed. When full the oldest item is evicted.
+        :param ttl: seconds an item lives after being added
+        :param max_size: max items held, oldest are evicted first when exceeded
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items: OrderedDict[Hashable, float] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def add(self, item: Hashable):
+        self._remove_expired()
+        # Re-adding refreshes expiry and moves item to the back
+        self._items.pop(item, None)
+        self._items[item] = time.monotonic() + self.ttl
+
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.evicted += 1
+
+    def discard(self, item: Hashable):
+        self._items.pop(item, None)
+
+    def consume(self, item: Hashable) -> bool:
+        """
+        Removes item if present and not expired.
+        :return: bool, was the item present
+        """
+        self._remove_expired()
+        if self._items.pop(item, None) is not None:
+            self.hits += 1
+            return True
+
+        self.misses += 1
+        return False
+
+    def __contains__(self, item: Hashable) -> bool:
+        self._remove_expired()
+        return item in self._items
+
+    def __len__(self) -> int:
+        self._remove_expired()
+        return len(self._items)
+
+    def _remove_expired(self):
+        now = time.monotonic()
+        while self._items:
+            item, expires_at = next(iter(self._items.items()))
+            if expires_at > now:
+                break
+            del self._items[item]
+            self.expired += 1
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+from enum import IntEnum
+from collections import deque
+from typing import Optional, Union
+
+import discord
+
+
+logger = logging.getLogger(__name__)
+
+# Discord limits for a single message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARACTERS_PER_MESSAGE = 6000
+
+
+class LogPriority(IntEnum):
+    # Sent right away together with whatever else is queued, never waits behind other lanes
+    CRITICAL = 0
+    HIGH = 1
+    NORMAL = 2
+    LOW = 3
+
+
+class ChannelQueue:
+    def __init__(self, channel_id: int):
+        """
+        Pending log embeds for one channel, one lane per priority.
+        :param channel_id: channel to send embeds to
+        """
+        self.channel_id = channel_id
+        self.lanes: dict[LogPriority, deque[discord.Embed]] = {priority: deque() for priority in LogPriority}
+        self.urgent = asyncio.Event()
+        self.worker: Optional[asyncio.Task] = None
+
+    def __len__(self):
+        return sum(len(lane) for lane in self.lanes.values())
+
+    def has_critical(self) -> bool:
+        return bool(self.lanes[LogPriority.CRITICAL])
+
+    def drop_lowest(self) -> bool:
+        """Drops oldest embed from the lowest priority non-empty lane, critical embeds are never dropped."""
+        for priority in reversed(LogPriority):
+            if priority is not LogPriority.CRITICAL and self.lanes[priority]:
+                self.lanes[priority].popleft()
+                return True
+        return False
+
+    def pop_batch(self) -> list[discord.Embed]:
+        """Takes as many embeds as fit in one message, higher priority lanes first."""
+        batch = []
+        characters = 0
+
+        for priority in LogPriority:
+            lane = self.lanes[priority]
+            while lane and len(batch) < MAX_EMBEDS_PER_MESSAGE:
+                embed_characters = len(lane[0])
+                if batch and characters + embed_characters > MAX_EMBED_CHARACTERS_PER_MESSAGE:
+                    return batch
+                batch.append(lane.popleft())
+                characters += embed_characters
+
+        return batch
+
+
+class LogSink:
+    def __init__(self, bot, linger: float = 2.0, max_queue_size: int = 500):
+        """
+        Queues log embeds per channel and sends them packed into as few messages as possible.
+        Instead of one message per event, embeds that arrive within linger seconds are sent together,
+        up to 10 embeds per message. Critical embeds are flushed right away.
+        :param bot: bot instance
+        :param linger: seconds to wait for more embeds before sending a non-critical batch
+        :param max_queue_size: max embeds queued per channel, lowest priority ones are dropped first when full
+        """
+        self.bot = bot
+        self.linger = linger
+        self.max_queue_size = max_queue_size
+        self.queues: dict[int, ChannelQueue] = {}
+        self.embeds_queued = bot.metrics.counter(
+            "tortoise_log_sink_embeds_total",
+            "Log embeds queued by priority.",
+            ("priority",)
+        )
+        self.messages_sent = bot.metrics.counter(
+            "tortoise_log_sink_messages_total",
+            "Messages sent by log sink."
+        )
+        self.embeds_dropped = bot.metrics.counter(
+            "tortoise_log_sink_dropped_total",
+            "Log embeds dropped because queue was full or sending failed."
+        )
+        bot.metrics.gauge(
+            "tortoise_log_sink_queue_size",
+            "Log embeds waiting to be sent.",
+            ("channel",),
+            lambda: {(str(channel_id),): len(queue) for channel_id, queue in self.queues.items()}
+        )
+
+    def send(
+            self,
+            channel: Union[int, discord.abc.Snowflake],
+            embed: discord.Embed,
+            priority: LogPriority = LogPriority.NORMAL
+    ):
+        """
+        Queues embed to be sent to channel, returns right away.
+        :param channel: channel or channel id
+        :param embed: embed to send
+        :param priority: lane to queue the embed in
+        """
+        channel_id = channel if isinstance(channel, int) else channel.id
+
+        queue = self.queues.get(channel_id)
+        if queue is None:
+            queue = self.queues[channel_id] = ChannelQueue(channel_id)
+
+        if len(queue) >= self.max_queue_size and queue.drop_lowest():
+            self.embeds_dropped.inc()
+
+        queue.lanes[priority].append(embed)
+        self.embeds_queued.inc(priority=priority.name.lower())
+
+        if priority is LogPriority.CRITICAL:
+            queue.urgent.set()
+
+        if queue.worker is None:
+            queue.worker = asyncio.create_task(self._worker(queue))
+
+    async def flush(self):
+        """Sends everything that is queued right away, used on shutdown."""
+        for queue in self.queues.values():
+            while len(queue):
+                await self._send_batch(queue)
+
+    async def _worker(self, queue: ChannelQueue):
+        try:
+            while len(queue):
+                if not queue.has_critical() and len(queue) < MAX_EMBEDS_PER_MESSAGE:
+                    # Give related events time to arrive so they share one message, unless something urgent comes
+                    try:
+                        await asyncio.wait_for(queue.urgent.wait(), self.linger)
+                    except asyncio.TimeoutError:
+                        pass
+
+                queue.urgent.clear()
+                await self._send_batch(queue)
+        finally:
+            queue.worker = None
+
+    async def _send_batch(self, queue: ChannelQueue):
+        batch = queue.pop_batch()
+        if not batch:
+            return
+
+        channel = self.bot.get_channel(queue.channel_id)
+        if channel is None:
+            logger.warning(f"Log channel {queue.channel_id} not found, dropping {len(batch)} embeds.")
+            self.embeds_dropped.inc(len(batch))
+            return
+
+        try:
+            await channel.send(embeds=batch)
+            self.messages_sent.inc()
+        except discord.HTTPException as e:
+            logger.error(f"Failed to send {len(batch)} log embeds to {queue.channel_id}: {e}")
+            self.embeds_dropped.inc(len(batch))
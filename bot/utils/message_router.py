@@ -0,0 +1,232 @@
+import time
+import asyncio
+import logging
+from functools import cached_property
+from typing import Callable, Optional
+
+import discord
+
+from bot.constants import admin_role_id, moderator_role_id, trusted_role_id
+
+
+logger = logging.getLogger(__name__)
+
+
+class MessageContext:
+    def __init__(self, message: discord.Message):
+        """
+        Classification of a single message, computed once and shared by every routed handler.
+        Anything expensive (role scans, permissions, content extraction) is computed lazily
+        on first access so handlers that never need it don't pay for it.
+        :param message: message that was received
+        """
+        self.message = message
+        self.author = message.author
+        self.is_dm = message.guild is None
+        self.is_bot = message.author.bot
+        self.guild_id = None if message.guild is None else message.guild.id
+        self.channel_id = message.channel.id
+        self.is_member = isinstance(message.author, discord.Member)
+
+    @cached_property
+    def role_ids(self) -> frozenset:
+        if not self.is_member:
+            return frozenset()
+        return frozenset(role.id for role in self.author.roles)
+
+    @cached_property
+    def is_staff(self) -> bool:
+        return moderator_role_id in self.role_ids or admin_role_id in self.role_ids
+
+    @cached_property
+    def is_trusted(self) -> bool:
+        return trusted_role_id in self.role_ids
+
+    @cached_property
+    def permissions(self) -> discord.Permissions:
+        if not self.is_member:
+            return discord.Permissions.none()
+        return self.author.guild_permissions
+
+    @cached_property
+    def clean_content(self) -> str:
+        return self.message.clean_content
+
+    @cached_property
+    def extracted_content(self) -> str:
+        """Single line summary of text, attachments, embeds and stickers, capped at 500 characters."""
+        parts: list[str] = []
+
+        if self.clean_content:
+            parts.append(self.clean_content.strip())
+
+        for attachment in self.message.attachments:
+            parts.append(f"[Attachment] {attachment.url}")
+
+        for embed in self.message.embeds:
+            if embed.url:
+                parts.append(f"[Embed URL] {embed.url}")
+            elif embed.title or embed.description:
+                preview = (embed.title or embed.description or "").strip()
+                if preview:
+                    parts.append(f"[Embed] {preview[:200]}")
+
+        if self.message.stickers:
+            parts.append("[Sticker]")
+
+        if not parts:
+            return "[Empty message payload]"
+
+        return " | ".join(parts)[:500]
+
+
+def message_route(
+        *,
+        guild_id: Optional[int] = None,
+        channel_id: Optional[int] = None,
+        guild_only: bool = False,
+        dm_only: bool = False,
+        allow_bots: bool = False,
+        skip_staff: bool = False,
+        predicate: Optional[Callable] = None
+):
+    """
+    Marks cog method as message handler, it will be subscribed to the bot message router once the cog is added.
+    Decorated method receives MessageContext and only runs if all of the passed conditions match.
+
+    :param guild_id: only route messages from this guild
+    :param channel_id: only route messages from this channel
+    :param guild_only: only route guild messages
+    :param dm_only: only route DM messages
+    :param allow_bots: also route messages authored by bots
+    :param skip_staff: don't route messages from moderators/admins
+    :param predicate: additional check called with (cog, context), should be cheap and synchronous
+    """
+    def decorator(func):
+        func.__message_route__ = {
+            "guild_id": guild_id,
+            "channel_id": channel_id,
+            "guild_only": guild_only or guild_id is not None,
+            "dm_only": dm_only,
+            "allow_bots": allow_bots,
+            "skip_staff": skip_staff,
+            "predicate": predicate,
+        }
+        return func
+    return decorator
+
+
+class MessageRoute:
+    def __init__(self, cog, callback: Callable, options: dict):
+        self.cog = cog
+        self.callback = callback
+        self.name = f"{cog.qualified_name}.{callback.__name__}"
+        self.guild_id = options["guild_id"]
+        self.channel_id = options["channel_id"]
+        self.guild_only = options["guild_only"]
+        self.dm_only = options["dm_only"]
+        self.allow_bots = options["allow_bots"]
+        self.skip_staff = options["skip_staff"]
+        self.predicate = options["predicate"]
+
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def matches(self, context: MessageContext) -> bool:
+        if context.is_bot and not self.allow_bots:
+            return False
+        if self.guild_only and context.is_dm:
+            return False
+        if self.dm_only and not context.is_dm:
+            return False
+        if self.guild_id is not None and context.guild_id != self.guild_id:
+            return False
+        if self.channel_id is not None and context.channel_id != self.channel_id:
+            return False
+        if self.skip_staff and context.is_staff:
+            return False
+        if self.predicate is not None and not self.predicate(self.cog, context):
+            return False
+        return True
+
+    def record(self, elapsed: float):
+        self.calls += 1
+        self.total_seconds += elapsed
+        if elapsed > self.max_seconds:
+            self.max_seconds = elapsed
+
+
+class MessageRouter:
+    def __init__(self, bot):
+        """
+        Classifies every message once and dispatches it only to the cog handlers whose predicates match.
+        Each matching handler runs in its own task, same as regular discord.py listeners would.
+        :param bot: bot instance, used for scheduling and error reporting
+        """
+        self.bot = bot
+        self.routes: list[MessageRoute] = []
+        # Set to False on shutdown so no new handlers are started
+        self.accepting = True
+        self._running: set[asyncio.Task] = set()
+        self.latency = bot.metrics.histogram(
+            "tortoise_listener_latency_seconds",
+            "Time spent in event listeners and routed message handlers.",
+            ("cog", "listener")
+        )
+        self.errors = bot.metrics.counter(
+            "tortoise_listener_errors_total",
+            "Unhandled exceptions raised by event listeners and routed message handlers.",
+            ("cog", "listener")
+        )
+
+    def add_cog(self, cog):
+        for base in reversed(type(cog).__mro__):
+            for attribute_name, value in base.__dict__.items():
+                options = getattr(value, "__message_route__", None)
+                if options is None:
+                    continue
+                route = MessageRoute(cog, getattr(cog, attribute_name), options)
+                self.routes.append(route)
+                logger.info(f"Subscribed message route {route.name}")
+
+    def remove_cog(self, cog):
+        self.routes = [route for route in self.routes if route.cog is not cog]
+
+    def dispatch(self, message: discord.Message):
+        if not self.accepting:
+            return
+
+        context = MessageContext(message)
+        for route in self.routes:
+            try:
+                matched = route.matches(context)
+            except Exception:
+                logger.exception(f"Predicate of message route {route.name} failed.")
+                continue
+            if matched:
+                task = asyncio.create_task(self._run(route, context), name=f"message-route:{route.name}")
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+    async def drain(self):
+        """Stops accepting messages and waits for handlers that are already running to finish."""
+        self.accepting = False
+        if self._running:
+            await asyncio.wait(set(self._running))
+
+    async def _run(self, route: MessageRoute, context: MessageContext):
+        cog_name = route.cog.qualified_name
+        listener_name = route.callback.__name__
+        start = time.perf_counter()
+        try:
+            await route.callback(context)
+        except Exception:
+            route.errors += 1
+            self.errors.inc(cog=cog_name, listener=listener_name)
+            await self.bot.on_error(f"on_message:{route.name}", context.message)
+        finally:
+            elapsed = time.perf_counter() - start
+            route.record(elapsed)
+            self.latency.observe(elapsed, cog=cog_name, listener=listener_name)
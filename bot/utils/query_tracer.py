@@ -0,0 +1,82 @@
+import time
+import logging
+from collections import deque
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    def __init__(self, query: str, caller: str):
+        """
+        Executions of one named query from one caller.
+        :param query: registered query name eg. points.add_points
+        :param caller: manager method that ran it eg. PointsManager.add_points
+        """
+        self.query = query
+        self.caller = caller
+        self.calls = 0
+        self.rows = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seen = time.time()
+
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+
+class SlowQuery:
+    def __init__(self, query: str, caller: str, seconds: float, rows: int):
+        self.query = query
+        self.caller = caller
+        self.seconds = seconds
+        self.rows = rows
+        self.at = time.time()
+
+
+class QueryTracer:
+    def __init__(self, slow_threshold: float = 0.5, max_records: int = 500, max_slow: int = 50):
+        """
+        Per statement latency, row counts and callers of named queries, for finding what makes interactions
+        miss the 3 second deadline.
+        Executions slower than slow_threshold are logged as a warning and kept in a rolling list of the most
+        recent ones.
+        :param slow_threshold: seconds above which an execution is logged as slow, None disables the slow log
+        :param max_records: max (query, caller) pairs to keep stats for, least recently seen are dropped first
+        :param max_slow: how many of the most recent slow executions to keep
+        """
+        self.slow_threshold = slow_threshold
+        self.max_records = max_records
+        self.records: dict[tuple[str, str], QueryStats] = {}
+        self.slow: deque[SlowQuery] = deque(maxlen=max_slow)
+
+    def record(self, query: str, caller: str, seconds: float, rows: int):
+        stats = self.records.get((query, caller))
+        if stats is None:
+            stats = self.records[(query, caller)] = QueryStats(query, caller)
+            self._trim_records()
+
+        stats.calls += 1
+        stats.rows += rows
+        stats.total_seconds += seconds
+        stats.max_seconds = max(stats.max_seconds, seconds)
+        stats.last_seen = time.time()
+
+        if self.slow_threshold is not None and seconds >= self.slow_threshold:
+            self.slow.append(SlowQuery(query, caller, seconds, rows))
+            logger.warning(f"Slow query {query} from {caller} took {seconds * 1000:.0f}ms, {rows} rows")
+
+    def get_top(self, limit: int = 10) -> list[QueryStats]:
+        """Most expensive statements first, by total time spent in them."""
+        return sorted(self.records.values(), key=lambda stats: stats.total_seconds, reverse=True)[:limit]
+
+    def get_slow(self, limit: int = 10) -> list[SlowQuery]:
+        """Most recent slow executions first."""
+        return list(reversed(self.slow))[:limit]
+
+    def _trim_records(self):
+        if len(self.records) <= self.max_records:
+            return
+
+        oldest = min(self.records.values(), key=lambda stats: stats.last_seen)
+        del self.records[(oldest.query, oldest.caller)]
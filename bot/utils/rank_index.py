@@ -0,0 +1,60 @@
+import bisect
+from typing import Optional
+
+
+class RankIndex:
+    def __init__(self):
+        """
+        Users ordered by score, highest first, for rank and leaderboard lookups without querying database.
+        Kept as a sorted list of (-score, user_id) so rank lookups are a binary search. Updates shift the list
+        which is a memmove, cheap for the few thousand users that ever get points.
+        Users with ties share the same rank (1, 2, 2, 4), users without points are not ranked.
+        """
+        self._scores: dict[int, int] = {}
+        self._order: list[tuple[int, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def update(self, user_id: int, score: int):
+        old_score = self._scores.pop(user_id, None)
+        if old_score is not None:
+            del self._order[bisect.bisect_left(self._order, (-old_score, user_id))]
+
+        if score > 0:
+            self._scores[user_id] = score
+            bisect.insort(self._order, (-score, user_id))
+
+    def score(self, user_id: int) -> int:
+        return self._scores.get(user_id, 0)
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """1 based rank or None if user has no points."""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        # Number of users with strictly higher score, (-score,) sorts before every (-score, user_id)
+        return bisect.bisect_left(self._order, (-score,)) + 1
+
+    def top(self, limit: int, min_score: int = 1) -> list[tuple[int, int]]:
+        """:return: list of (user_id, score) tuples, highest first"""
+        return [
+            (user_id, -negative_score)
+            for negative_score, user_id in self._order[:limit]
+            if -negative_score >= min_score
+        ]
+
+    def around(self, user_id: int, radius: int = 2) -> list[tuple[int, int, int]]:
+        """
+        Users placed right above and below user, including the user.
+        :return: list of (rank, user_id, score) tuples, empty if user has no points
+        """
+        score = self._scores.get(user_id)
+        if score is None:
+            return []
+
+        position = bisect.bisect_left(self._order, (-score, user_id))
+        neighbours = []
+        for negative_score, neighbour_id in self._order[max(position - radius, 0):position + radius + 1]:
+            neighbours.append((self.rank(neighbour_id), neighbour_id, -negative_score))
+        return neighbours
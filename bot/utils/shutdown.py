@@ -0,0 +1,73 @@
+import time
+import signal
+import asyncio
+import logging
+from typing import Awaitable
+
+
+logger = logging.getLogger(__name__)
+console_logger = logging.getLogger("console")
+
+
+class ShutdownCoordinator:
+    def __init__(self, bot, deadline: float = 25.0):
+        """
+        Drains in-memory state before the bot disconnects, all within deadline seconds.
+        Order is: stop accepting messages and wait for running handlers, call cog_shutdown on every cog
+        that defines it (flush caches, persist or cancel tasks), then flush buffered retention counts and queued
+        log embeds.
+        Whatever doesn't finish within the deadline is abandoned so the process still exits in time,
+        SIGTERM is usually followed by SIGKILL after a grace period.
+        :param bot: bot instance
+        :param deadline: seconds the whole drain is allowed to take
+        """
+        self.bot = bot
+        self.deadline = deadline
+        self.stopping = False
+        self._drained = asyncio.Event()
+        self._ends_at = 0.0
+
+    def install_signal_handlers(self):
+        loop = asyncio.get_running_loop()
+        for shutdown_signal in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(shutdown_signal, self._on_signal, shutdown_signal)
+            except (NotImplementedError, RuntimeError):
+                # Windows event loops don't support signal handlers, fall back to default behaviour
+                pass
+
+    def _on_signal(self, received_signal: signal.Signals):
+        console_logger.info(f"Received {received_signal.name}, shutting down..")
+        asyncio.create_task(self.bot.close())
+
+    async def drain(self):
+        """Safe to call multiple times, later calls wait for the first one to finish."""
+        if self.stopping:
+            await self._drained.wait()
+            return
+
+        self.stopping = True
+        start = time.perf_counter()
+        self._ends_at = time.monotonic() + self.deadline
+
+        try:
+            await self._step("message handlers", self.bot.message_router.drain())
+
+            cogs = [cog for cog in self.bot.cogs.values() if hasattr(cog, "cog_shutdown")]
+            await asyncio.gather(*(self._step(cog.qualified_name, cog.cog_shutdown()) for cog in cogs))
+
+            if self.bot.retention_manager is not None:
+                await self._step("retention counts", self.bot.retention_manager.flush())
+            await self._step("log sink", self.bot.log_sink.flush())
+        finally:
+            self._drained.set()
+            console_logger.info(f"Shutdown drain finished in {time.perf_counter() - start:.2f}s")
+
+    async def _step(self, name: str, awaitable: Awaitable):
+        remaining = self._ends_at - time.monotonic()
+        try:
+            await asyncio.wait_for(awaitable, timeout=max(remaining, 0.1))
+        except asyncio.TimeoutError:
+            logger.warning(f"Shutdown step {name} did not finish before deadline.")
+        except Exception as e:
+            logger.exception(f"Shutdown step {name} failed: {e}")
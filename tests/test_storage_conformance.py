@@ -0,0 +1,628 @@
+"""
+Runs every manager method against both storage backends and checks they return the same results.
+
+Each test runs one scenario of manager calls and compares what it observed with the expected values written in
+the test, on MemoryDatabase and on Database. A backend that diverges from the SQL semantics (rows, defaults,
+conflict handling, command status) fails on the same assertion the other one passes.
+
+Postgres runs need an empty database to migrate and truncate, set TEST_DATABASE_URL to use one. Without it only
+MemoryDatabase runs and the Postgres cases are skipped.
+
+Usage:
+    python -m pytest tests
+    TEST_DATABASE_URL=postgresql://localhost/tortoise_test python -m pytest tests
+"""
+from __future__ import annotations
+
+import os
+import asyncio
+from typing import Any, Callable, Awaitable
+from datetime import datetime, timedelta, timezone
+from contextlib import asynccontextmanager
+
+import pytest
+import asyncpg
+
+from bot.migrator import Migrator
+from bot.memory_database import MemoryDatabase, UnsupportedOperation
+from bot.manager import (
+    Storage, Database, ProgressionManager, AFKManager, PointsManager, RetentionManager, TeamManager, GiveawayManager,
+    DutyManager, StateManager, ArchiveManager
+)
+
+
+POSTGRES_DSN = os.getenv("TEST_DATABASE_URL")
+MANAGERS = (
+    ProgressionManager, AFKManager, PointsManager, RetentionManager, TeamManager, GiveawayManager, DutyManager,
+    StateManager, ArchiveManager
+)
+TRUNCATE_SQL = """
+TRUNCATE activity, activity_daily, nominations, nomination_counts, afk_status, points, daily_retention, teams,
+    team_invites, team_members, team_setup_invites, team_join_requests, giveaways, giveaway_entries, duty_schedules,
+    bot_state, team_invites_archive, team_setup_invites_archive, team_join_requests_archive, giveaways_archive
+RESTART IDENTITY
+"""
+# Filled in by NOW() defaults, only checked to be set since the two backends can't agree on the exact value
+GENERATED_COLUMNS = {"created_at", "joined_at", "updated_at", "archived_at"}
+
+GUILD_ID = 577192344529404154
+OTHER_GUILD_ID = 123456789012345678
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+TODAY = NOW.date()
+
+
+@pytest.fixture(params=[
+    "memory",
+    pytest.param("postgres", marks=pytest.mark.skipif(POSTGRES_DSN is None, reason="TEST_DATABASE_URL is not set"))
+])
+def backend(request) -> str:
+    return request.param
+
+
+@asynccontextmanager
+async def open_storage(backend: str):
+    """Yields a connected, empty storage with every manager registered on it."""
+    if backend == "memory":
+        db = MemoryDatabase()
+    else:
+        db = Database(POSTGRES_DSN, command_timeout=None)
+
+    managers = {manager: manager(db) for manager in MANAGERS}
+    await db.connect()
+    try:
+        if isinstance(db, Database):
+            await Migrator(db).migrate()
+            await db.pool.execute(TRUNCATE_SQL)
+        yield db, managers
+    finally:
+        await db.close()
+
+
+def run(backend: str, scenario: Callable[[Storage, dict], Awaitable[Any]]):
+    async def main():
+        async with open_storage(backend) as (db, managers):
+            return await scenario(db, managers)
+
+    return asyncio.run(main())
+
+
+def as_dict(row) -> dict | None:
+    """Record or memory row as a plain dict, generated timestamps replaced with whether they are set."""
+    if row is None:
+        return None
+    return {
+        column: isinstance(value, datetime) if column in GENERATED_COLUMNS else value
+        for column, value in dict(row).items()
+    }
+
+
+def test_progression_counts(backend):
+    async def scenario(db: Storage, managers: dict):
+        progression: ProgressionManager = managers[ProgressionManager]
+        observed = []
+
+        await progression.add_messages_bulk(GUILD_ID, {1: 10, 2: 20})
+        await progression.add_messages_bulkops(GUILD_ID, {1: 5, 3: 30})
+        await progression.add_messages_bulkops(GUILD_ID, {})
+        await progression.add_messages_bulk_unnest(GUILD_ID, {2: 30, 4: 400})
+        await progression.add_messages_bulk_unnest(GUILD_ID, {})
+        await progression.add_messages_bulk(OTHER_GUILD_ID, {1: 1000})
+        observed.append([await progression.get_messages(GUILD_ID, user_id) for user_id in (1, 2, 3, 4, 5)])
+
+        crossed = await progression.add_messages_bulk_daily(GUILD_ID, {
+            (TODAY, 1): 20,
+            (TODAY - timedelta(days=10), 1): 15,
+            (TODAY, 4): 120,
+            (TODAY - timedelta(days=100), 5): 7,
+        })
+        observed.append(sorted(crossed))
+        observed.append(await progression.add_messages_bulk_daily(GUILD_ID, {}))
+        observed.append([await progression.get_messages(GUILD_ID, user_id) for user_id in (1, 4, 5)])
+        observed.append(await progression.get_recent_activity(GUILD_ID))
+
+        observed.append(sorted(await progression.get_non_active_users(GUILD_ID)))
+        observed.append(sorted(await progression.get_non_active_plus_users(GUILD_ID)))
+        await progression.mark_active(GUILD_ID, 1)
+        await progression.mark_active_plus(GUILD_ID, 4)
+        await progression.mark_active(GUILD_ID, 999)
+        observed.append(sorted(await progression.get_non_active_users(GUILD_ID)))
+        observed.append(sorted(await progression.get_non_active_plus_users(GUILD_ID)))
+        observed.append(await progression.get_non_active_users(OTHER_GUILD_ID))
+        return observed
+
+    assert run(backend, scenario) == [
+        [15, 50, 30, 400, 0],
+        [(1, 50), (4, 520)],
+        [],
+        [50, 520, 7],
+        {1: (20, 35, 35), 4: (120, 120, 120)},
+        [1, 2, 4],
+        [4],
+        [2, 4],
+        [],
+        [1],
+    ]
+
+
+def test_progression_copy(backend):
+    async def scenario(db: Storage, managers: dict):
+        progression: ProgressionManager = managers[ProgressionManager]
+        await progression.add_messages_bulk(GUILD_ID, {1: 10})
+        await progression.add_messages_bulk_copy(GUILD_ID, {1: 5, 2: 7})
+        return [await progression.get_messages(GUILD_ID, user_id) for user_id in (1, 2)]
+
+    if backend == "memory":
+        # COPY and transactions need a raw connection, MemoryDatabase refuses instead of pretending
+        with pytest.raises(UnsupportedOperation):
+            run(backend, scenario)
+    else:
+        assert run(backend, scenario) == [15, 7]
+
+
+def test_nominations(backend):
+    async def scenario(db: Storage, managers: dict):
+        progression: ProgressionManager = managers[ProgressionManager]
+        observed = [
+            await progression.nominate(1, 10, "fellow", "apprentice"),
+            await progression.nominate(1, 11, "fellow", "moderator"),
+            await progression.nominate(1, 10, "fellow", "apprentice"),
+            await progression.nominate(1, 10, "fellow", "fellow"),
+            await progression.nominate(1, 12, "veteran", "moderator"),
+            await progression.clear_stage(1, "fellow"),
+            await progression.nominate(1, 10, "fellow", "apprentice"),
+            await progression.nominate(1, 13, "veteran", "moderator"),
+        ]
+        # Concurrent nominations for one stage each see every earlier one, so exactly one sees a given count
+        concurrent = await asyncio.gather(*(
+            progression.nominate(2, nominator_id, "boot", "apprentice") for nominator_id in range(5)
+        ))
+        observed.append(sorted(concurrent))
+        return observed
+
+    assert run(backend, scenario) == [
+        (True, (1, 0, 0)),
+        (True, (1, 0, 1)),
+        (False, (0, 0, 0)),
+        (True, (1, 1, 1)),
+        (True, (0, 0, 1)),
+        None,
+        (True, (1, 0, 0)),
+        (True, (0, 0, 2)),
+        [(True, (apprentices, 0, 0)) for apprentices in range(1, 6)],
+    ]
+
+
+def test_afk(backend):
+    async def scenario(db: Storage, managers: dict):
+        afk: AFKManager = managers[AFKManager]
+        await afk.setup()
+        await afk.set_afk(GUILD_ID, 1, NOW + timedelta(hours=1), "lunch")
+        await afk.set_afk(GUILD_ID, 2, NOW - timedelta(hours=1), None)
+        await afk.set_afk(GUILD_ID, 1, NOW + timedelta(hours=2), "dinner")
+        await afk.set_afk(GUILD_ID, 3, NOW, "gone")
+        await afk.remove_afk(GUILD_ID, 3)
+        await afk.remove_afk(GUILD_ID, 999)
+
+        # Fresh manager so the cache is loaded from what was written instead of what was cached on write
+        reloaded = AFKManager(db)
+        await reloaded.setup()
+        return [
+            reloaded.get_afk(GUILD_ID, 1),
+            reloaded.get_afk(GUILD_ID, 2),
+            reloaded.get_afk(GUILD_ID, 3),
+            reloaded.get_expired(),
+        ]
+
+    assert run(backend, scenario) == [
+        {"reason": "dinner", "until": NOW + timedelta(hours=2)},
+        {"reason": None, "until": NOW - timedelta(hours=1)},
+        None,
+        [(GUILD_ID, 2)],
+    ]
+
+
+def test_points(backend):
+    async def scenario(db: Storage, managers: dict):
+        points: PointsManager = managers[PointsManager]
+        await points.setup()
+        observed = [
+            await points.add_points(GUILD_ID, 1, 10),
+            await points.add_points(GUILD_ID, 1, 5),
+            await points.add_points(GUILD_ID, 2, 30),
+            await points.add_points(GUILD_ID, 3, 20),
+            await points.remove_points(GUILD_ID, 3, 50),
+            await points.remove_points(GUILD_ID, 4, 5),
+            await points.add_points(OTHER_GUILD_ID, 1, 100),
+        ]
+
+        reloaded = PointsManager(db)
+        await reloaded.setup()
+        observed += [
+            await reloaded.get_points(GUILD_ID, 1),
+            await reloaded.get_points(GUILD_ID, 3),
+            await reloaded.get_leaderboard(GUILD_ID),
+            await reloaded.get_leaderboard(GUILD_ID, min_points=20),
+            reloaded.get_rank(GUILD_ID, 1),
+            reloaded.get_rank(GUILD_ID, 3),
+            reloaded.get_neighbours(GUILD_ID, 1, radius=1),
+        ]
+        return observed
+
+    assert run(backend, scenario) == [
+        10, 15, 30, 20, 0, 0, 100,
+        15,
+        0,
+        [(2, 30), (1, 15)],
+        [(2, 30)],
+        (2, 2),
+        (None, 2),
+        [(1, 2, 30), (2, 1, 15)],
+    ]
+
+
+def test_retention(backend):
+    async def scenario(db: Storage, managers: dict):
+        retention: RetentionManager = managers[RetentionManager]
+        await retention.add_join(GUILD_ID)
+        await retention.add_join(GUILD_ID)
+        await retention.add_leave(GUILD_ID)
+        # Buffered counts are included before they are written
+        observed = [await retention.get_today(GUILD_ID)]
+        await retention.flush()
+        await retention.flush()
+        await retention.add_leave(GUILD_ID)
+        await retention.flush()
+
+        reloaded = RetentionManager(db)
+        observed += [
+            await reloaded.get_today(GUILD_ID),
+            await reloaded.get_yesterday(GUILD_ID),
+            await reloaded.get_today(OTHER_GUILD_ID),
+        ]
+        return observed
+
+    assert run(backend, scenario) == [(2, 1), (2, 2), (0, 0), (0, 0)]
+
+
+def test_teams(backend):
+    async def scenario(db: Storage, managers: dict):
+        teams: TeamManager = managers[TeamManager]
+        observed = []
+
+        team_id = await teams.create_team(GUILD_ID, "Turtles", "Slow", "UTC", 100, 101, 102, 103, 1)
+        other_team_id = await teams.create_team(GUILD_ID, "Hares", None, None, 200, 201, 202, 203, 2)
+        observed.append((team_id, other_team_id))
+        observed.append(as_dict(await teams.get_team(team_id)))
+        observed.append(as_dict(await teams.get_team(999)))
+        observed.append(as_dict(await teams.get_team_by_leader(GUILD_ID, 2)))
+        observed.append([await teams.leader_has_team(GUILD_ID, 1), await teams.leader_has_team(GUILD_ID, 3)])
+
+        observed.append(await teams.can_invite(team_id, 1))
+        observed.append([
+            await teams.create_invite(1001, team_id, 1, 10, GUILD_ID),
+            await teams.create_invite(1002, team_id, 1, 10, GUILD_ID),
+            await teams.create_invite(1003, team_id, 1, 11, GUILD_ID),
+            await teams.create_invite(1004, team_id, 1, 12, GUILD_ID),
+        ])
+        observed.append(await teams.can_invite(team_id, 1))
+        observed.append(as_dict(await teams.get_invite(1001)))
+        observed.append(await teams.has_pending_invite_for_team(team_id, 10))
+        await teams.update_invite_status(1001, "accepted")
+        await teams.update_invite_status(999, "accepted")
+        observed.append(await teams.has_pending_invite_for_team(team_id, 10))
+        observed.append((await teams.get_invite(1001))["status"])
+        # Invitee has no pending invite anymore so a new one can be sent
+        observed.append(await teams.create_invite(1005, team_id, 1, 10, GUILD_ID))
+
+        observed.append([
+            await teams.add_member(team_id, GUILD_ID, 10),
+            await teams.add_member(team_id, GUILD_ID, 10),
+            await teams.add_member(other_team_id, GUILD_ID, 10),
+            await teams.add_member(team_id, GUILD_ID, 11),
+        ])
+        observed.append(as_dict(await teams.get_user_team(GUILD_ID, 10)))
+        observed.append(as_dict(await teams.get_user_team(GUILD_ID, 12)))
+        observed.append(sorted(member["user_id"] for member in await teams.get_team_members(team_id)))
+        observed.append([await teams.is_member(team_id, 10), await teams.is_member(team_id, 12)])
+        observed.append([
+            (row["team_id"], row["member_count"]) for row in await teams.get_all_teams_with_member_counts(GUILD_ID)
+        ])
+        await teams.remove_member(team_id, 11)
+        await teams.remove_member(team_id, 999)
+        observed.append(sorted(member["user_id"] for member in await teams.get_team_members(team_id)))
+        observed.append([row["team_id"] for row in await teams.get_all_teams(GUILD_ID)])
+        observed.append(await teams.get_all_teams(OTHER_GUILD_ID))
+
+        observed.append(as_dict(await teams.delete_team(GUILD_ID, 200)))
+        observed.append(as_dict(await teams.delete_team(GUILD_ID, 200)))
+        observed.append(as_dict(await teams.get_team(other_team_id)))
+        return observed
+
+    turtles = {
+        "team_id": 1, "guild_id": GUILD_ID, "name": "Turtles", "description": "Slow", "timezone": "UTC",
+        "role_id": 100, "category_id": 101, "text_channel_id": 102, "voice_channel_id": 103, "leader_id": 1,
+    }
+    hares = {
+        "team_id": 2, "guild_id": GUILD_ID, "name": "Hares", "description": None, "timezone": None,
+        "role_id": 200, "category_id": 201, "text_channel_id": 202, "voice_channel_id": 203, "leader_id": 2,
+    }
+    assert run(backend, scenario) == [
+        (1, 2),
+        turtles,
+        None,
+        hares,
+        [True, False],
+        True,
+        [True, False, True, True],
+        False,
+        {
+            "invite_id": 1001, "team_id": 1, "inviter_id": 1, "invitee_id": 10, "guild_id": GUILD_ID,
+            "status": "pending", "created_at": True,
+        },
+        True,
+        False,
+        "accepted",
+        True,
+        [True, False, False, True],
+        {"team_id": 1, "guild_id": GUILD_ID, "user_id": 10, "joined_at": True},
+        None,
+        [10, 11],
+        [1, None],
+        [(2, 0), (1, 2)],
+        [10],
+        [2, 1],
+        [],
+        hares,
+        None,
+        None,
+    ]
+
+
+def test_team_setup_invites_and_requests(backend):
+    async def scenario(db: Storage, managers: dict):
+        teams: TeamManager = managers[TeamManager]
+        observed = []
+
+        await teams.create_setup_invite(2001, GUILD_ID, 10)
+        with pytest.raises(asyncpg.exceptions.UniqueViolationError):
+            await teams.create_setup_invite(2001, GUILD_ID, 11)
+        observed.append(as_dict(await teams.get_setup_invite(2001)))
+        observed.append((await teams.get_setup_invite_by_user(GUILD_ID, 10))["invite_id"])
+        await teams.update_setup_invite(2001, "used")
+        observed.append((await teams.get_setup_invite(2001))["status"])
+        observed.append(await teams.get_setup_invite_by_user(GUILD_ID, 10))
+        observed.append(await teams.get_setup_invite(999))
+
+        observed.append([
+            await teams.create_join_request(GUILD_ID, 1, 10, "Let me in"),
+            await teams.create_join_request(GUILD_ID, 1, 10, "Again"),
+            await teams.create_join_request(GUILD_ID, 1, 11),
+        ])
+        observed.append(as_dict(await teams.get_pending_request(1, 10)))
+        observed.append((await teams.get_pending_request(1, 11))["reason"])
+        await teams.update_request_status(1, 10, "accepted")
+        observed.append(await teams.get_pending_request(1, 10))
+        observed.append(await teams.create_join_request(GUILD_ID, 1, 10, "Once more"))
+        observed.append((await teams.get_pending_request(1, 10))["request_id"])
+        return observed
+
+    assert run(backend, scenario) == [
+        {"invite_id": 2001, "guild_id": GUILD_ID, "user_id": 10, "status": "pending", "created_at": True},
+        2001,
+        "used",
+        None,
+        None,
+        [True, False, True],
+        {
+            "request_id": 1, "guild_id": GUILD_ID, "team_id": 1, "user_id": 10, "status": "pending",
+            "reason": "Let me in", "created_at": True,
+        },
+        None,
+        None,
+        True,
+        # Conflicting insert still takes a value from the sequence
+        4,
+    ]
+
+
+def test_giveaways(backend):
+    async def scenario(db: Storage, managers: dict):
+        giveaways: GiveawayManager = managers[GiveawayManager]
+        observed = []
+
+        await giveaways.create_giveaway(3001, GUILD_ID, 1, 2, "Nitro", "Monthly", "1x Nitro", "[]", 1, NOW)
+        await giveaways.create_giveaway(
+            3002, GUILD_ID, 1, 2, "Books", None, "3x Book", "[]", 3, NOW - timedelta(days=1)
+        )
+        with pytest.raises(asyncpg.exceptions.UniqueViolationError):
+            await giveaways.create_giveaway(3001, GUILD_ID, 1, 2, "Nitro", None, "1x Nitro", "[]", 1, NOW)
+        observed.append(as_dict(await giveaways.get_active(3001)))
+        observed.append([row["message_id"] for row in await giveaways.get_pending()])
+
+        observed.append([
+            await giveaways.enter(3001, 10),
+            await giveaways.enter(3001, 10),
+            await giveaways.enter(3001, 11),
+            await giveaways.enter(3002, 10),
+        ])
+        observed.append(sorted(await giveaways.get_entries(3001)))
+        observed.append(await giveaways.get_entry_count(3001))
+        observed.append(await giveaways.get_entry_count(999))
+
+        await giveaways.finish(3001, [11])
+        observed.append(await giveaways.get_active(3001))
+        observed.append({
+            column: value for column, value in as_dict(await giveaways.get_giveaway(3001)).items()
+            if column in ("ended", "winner_ids")
+        })
+        observed.append([row["message_id"] for row in await giveaways.get_pending()])
+
+        await giveaways.delete_giveaway(3001)
+        observed.append(await giveaways.get_giveaway(3001))
+        observed.append(await giveaways.get_entries(3001))
+        observed.append(await giveaways.get_entries(3002))
+        return observed
+
+    assert run(backend, scenario) == [
+        {
+            "message_id": 3001, "guild_id": GUILD_ID, "channel_id": 1, "host_id": 2, "name": "Nitro",
+            "description": "Monthly", "prizes": "1x Nitro", "questions": "[]", "winners": 1, "ends_at": NOW,
+            "ended": False, "winner_ids": [],
+        },
+        [3002, 3001],
+        [True, False, True, True],
+        [10, 11],
+        2,
+        0,
+        None,
+        {"ended": True, "winner_ids": [11]},
+        [3002],
+        None,
+        [],
+        [10],
+    ]
+
+
+def test_duty_and_state(backend):
+    async def scenario(db: Storage, managers: dict):
+        duty: DutyManager = managers[DutyManager]
+        state: StateManager = managers[StateManager]
+
+        await duty.set_schedule(GUILD_ID, 1, "09:00", "17:00", "UTC")
+        await duty.set_schedule(GUILD_ID, 2, "10:00", "12:00", "Europe/Zagreb")
+        await duty.set_schedule(GUILD_ID, 1, "08:00", "16:00", "America/New_York")
+        await duty.set_schedule(GUILD_ID, 3, "00:00", "01:00", "UTC")
+        await duty.remove_schedule(GUILD_ID, 3)
+        await duty.remove_schedule(GUILD_ID, 999)
+        schedules = sorted((as_dict(row) for row in await duty.get_all_schedules()), key=lambda row: row["user_id"])
+
+        await state.set("last_flush", "1")
+        await state.set("last_flush", "2")
+        return [schedules, await state.get("last_flush"), await state.get("missing")]
+
+    assert run(backend, scenario) == [
+        [
+            {
+                "guild_id": GUILD_ID, "user_id": 1, "start_time": "08:00", "end_time": "16:00",
+                "timezone": "America/New_York",
+            },
+            {
+                "guild_id": GUILD_ID, "user_id": 2, "start_time": "10:00", "end_time": "12:00",
+                "timezone": "Europe/Zagreb",
+            },
+        ],
+        "2",
+        None,
+    ]
+
+
+def test_archive(backend):
+    async def scenario(db: Storage, managers: dict):
+        teams: TeamManager = managers[TeamManager]
+        giveaways: GiveawayManager = managers[GiveawayManager]
+        progression: ProgressionManager = managers[ProgressionManager]
+        archive = ArchiveManager(db, batch_size=2, batch_delay=0)
+
+        for invite_id in (1, 2, 3):
+            await teams.create_invite(invite_id, 1, 1, invite_id, GUILD_ID)
+        await teams.update_invite_status(1, "accepted")
+        await teams.update_invite_status(2, "declined")
+        await teams.create_setup_invite(1, GUILD_ID, 1)
+        await teams.create_join_request(GUILD_ID, 1, 1)
+        await teams.update_request_status(1, 1, "declined")
+
+        await giveaways.create_giveaway(1, GUILD_ID, 1, 1, "Old", None, "Prize", "[]", 1, NOW - timedelta(days=100))
+        await giveaways.create_giveaway(2, GUILD_ID, 1, 1, "Recent", None, "Prize", "[]", 1, NOW - timedelta(days=1))
+        await giveaways.create_giveaway(3, GUILD_ID, 1, 1, "Running", None, "Prize", "[]", 1, NOW - timedelta(days=200))
+        for message_id in (1, 2, 3):
+            await giveaways.enter(message_id, 10)
+            await giveaways.enter(message_id, 11)
+        await giveaways.finish(1, [10])
+        await giveaways.finish(2, [10])
+
+        await progression.add_messages_bulk_daily(GUILD_ID, {
+            (TODAY, 1): 1,
+            (TODAY - timedelta(days=150), 1): 2,
+            (TODAY - timedelta(days=200), 1): 3,
+        })
+        await progression.nominate(1, 10, "fellow", "apprentice")
+
+        # Cutoff in the future archives every resolved row of the status tables regardless of created_at
+        observed = [
+            await archive.archive_table("team_invites", NOW + timedelta(days=1)),
+            await archive.archive_table("team_setup_invites", NOW + timedelta(days=1)),
+            await archive.archive_table("team_join_requests", NOW + timedelta(days=1)),
+            await archive.run(),
+            await archive.run(),
+        ]
+        observed += [
+            [await teams.get_invite(invite_id) is not None for invite_id in (1, 2, 3)],
+            [await giveaways.get_giveaway(message_id) is not None for message_id in (1, 2, 3)],
+            [await giveaways.get_entry_count(message_id) for message_id in (1, 2, 3)],
+            await progression.get_recent_activity(GUILD_ID),
+            await progression.nominate(1, 11, "fellow", "moderator"),
+        ]
+        return observed
+
+    nothing_left = {
+        "team_invites": 0, "team_setup_invites": 0, "team_join_requests": 0, "giveaways": 0, "giveaway_entries": 0,
+        "activity_daily": 0,
+    }
+    assert run(backend, scenario) == [
+        2,
+        0,
+        1,
+        {**nothing_left, "giveaways": 1, "giveaway_entries": 2, "activity_daily": 2},
+        nothing_left,
+        [False, False, True],
+        [False, True, True],
+        [0, 2, 2],
+        {1: (1, 1, 1)},
+        (True, (1, 0, 1)),
+    ]
+
+
+def test_statements_without_returning_return_no_rows(backend):
+    async def scenario(db: Storage, managers: dict):
+        teams: TeamManager = managers[TeamManager]
+        giveaways: GiveawayManager = managers[GiveawayManager]
+        progression: ProgressionManager = managers[ProgressionManager]
+
+        await teams.create_invite(1, 1, 1, 10, GUILD_ID)
+        await teams.create_setup_invite(1, GUILD_ID, 10)
+        await teams.create_join_request(GUILD_ID, 1, 10)
+        await giveaways.create_giveaway(1, GUILD_ID, 1, 1, "Nitro", None, "Prize", "[]", 1, NOW)
+        await giveaways.enter(1, 10)
+        await progression.nominate(1, 10, "fellow", "apprentice")
+
+        return [
+            await db.fetch("team.update_invite_status", 1, "accepted"),
+            await db.execute("team.update_invite_status", 1, "accepted"),
+            await db.execute("team.update_invite_status", 999, "accepted"),
+            await db.fetch("team.update_setup_invite", 1, "used"),
+            await db.fetch("team.update_request_status", 1, 10, "accepted"),
+            await db.execute("team.update_request_status", 1, 10, "accepted"),
+            await db.fetch("giveaway.finish", 1, [10]),
+            await db.fetch("progression.clear_stage", 1, "fellow"),
+            await db.fetch("giveaway.delete_entries", 1),
+            await db.execute("giveaway.delete_giveaway", 1),
+            await db.execute("giveaway.delete_giveaway", 1),
+        ]
+
+    assert run(backend, scenario) == [
+        [], "UPDATE 1", "UPDATE 0", [], [], "UPDATE 0", [], [], [], "DELETE 1", "DELETE 0"
+    ]
+
+
+def test_memory_database_refuses_unsupported_operations():
+    db = MemoryDatabase()
+    with pytest.raises(UnsupportedOperation):
+        db.register_queries("custom", {"select_everything": "SELECT * FROM activity"})
+    assert "custom.select_everything" not in db.queries
+
+    async def use_raw_connection():
+        async with db.acquire() as connection:
+            await connection.execute("SELECT 1")
+
+    with pytest.raises(UnsupportedOperation):
+        asyncio.run(use_raw_connection())